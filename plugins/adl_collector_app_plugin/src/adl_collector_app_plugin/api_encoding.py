@@ -0,0 +1,178 @@
+"""
+Compact encodings for the collector API.
+
+Observer clients on metered connections can cut their traffic two ways, both
+negotiated through standard HTTP headers, so plain JSON clients are unaffected:
+
+- Compressed request bodies: send "Content-Encoding: gzip" (or "br" when the
+  optional brotli package is installed) with a compressed JSON or MessagePack
+  body. Decompressed bodies are capped at DATA_UPLOAD_MAX_MEMORY_SIZE.
+- MessagePack: send "Content-Type: application/msgpack" for the request body
+  and/or "Accept: application/msgpack" for the response. Datetimes are
+  rendered as ISO 8601 strings, exactly as in the JSON responses.
+
+Responses of the views using CompactEncodingMixin are gzip-compressed for
+clients sending "Accept-Encoding: gzip".
+"""
+import io
+import json
+import zlib
+
+import msgpack
+from django.conf import settings
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from rest_framework import exceptions, parsers, renderers, status
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+class UnsupportedContentEncoding(exceptions.APIException):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_detail = "Unsupported Content-Encoding."
+    default_code = "unsupported_content_encoding"
+
+
+class RequestBodyTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Decompressed request body exceeds the maximum upload size."
+    default_code = "request_body_too_large"
+
+
+def decompress_body(body: bytes, content_encoding: str) -> bytes:
+    """
+    Undo a request's Content-Encoding ("gzip", "br" or "identity"). Raises
+    UnsupportedContentEncoding, RequestBodyTooLarge or ParseError.
+    """
+    content_encoding = (content_encoding or "identity").strip().lower()
+    if content_encoding == "identity" or not body:
+        return body
+
+    limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+    if content_encoding in ("gzip", "x-gzip"):
+        decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        try:
+            data = decompressor.decompress(body, (limit + 1) if limit is not None else 0)
+        except zlib.error as exc:
+            raise exceptions.ParseError(f"Invalid gzip body - {exc}")
+        finished = decompressor.eof
+    elif content_encoding == "br":
+        try:
+            import brotli
+        except ImportError:
+            raise UnsupportedContentEncoding("Content-Encoding br is not available on this server; use gzip.")
+        decompressor = brotli.Decompressor()
+        try:
+            if limit is None:
+                data = decompressor.process(body)
+            else:
+                data = decompressor.process(body, output_buffer_limit=limit + 1)
+        except brotli.error as exc:
+            raise exceptions.ParseError(f"Invalid brotli body - {exc}")
+        finished = decompressor.is_finished()
+    else:
+        raise UnsupportedContentEncoding(f'Unsupported Content-Encoding "{content_encoding}".')
+
+    if limit is not None and len(data) > limit:
+        raise RequestBodyTooLarge()
+    if not finished:
+        raise exceptions.ParseError("Truncated compressed body.")
+    return data
+
+
+def unpack_msgpack(data: bytes):
+    try:
+        # timestamp=3: MessagePack timestamps arrive as aware datetimes, which
+        # the serializers' DateTimeFields accept like ISO strings
+        return msgpack.unpackb(data, raw=False, timestamp=3)
+    except (ValueError, TypeError) as exc:
+        raise exceptions.ParseError(f"MessagePack parse error - {exc}")
+
+
+def _decompressed_stream(stream, parser_context):
+    request = (parser_context or {}).get("request")
+    content_encoding = request.META.get("HTTP_CONTENT_ENCODING") if request is not None else None
+    if not content_encoding:
+        return stream
+    return io.BytesIO(decompress_body(stream.read(), content_encoding))
+
+
+class DecompressingJSONParser(parsers.JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        return super().parse(_decompressed_stream(stream, parser_context), media_type, parser_context)
+
+
+class MessagePackParser(parsers.BaseParser):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return unpack_msgpack(_decompressed_stream(stream, parser_context).read())
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = MSGPACK_MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # DRF's JSON encoder for everything MessagePack has no type for
+        # (datetimes, decimals, lazy strings), so values match the JSON responses
+        return msgpack.packb(data, default=self._encoder.default, use_bin_type=True)
+
+
+PARSER_CLASSES = [DecompressingJSONParser, MessagePackParser, parsers.FormParser, parsers.MultiPartParser]
+RENDERER_CLASSES = [renderers.JSONRenderer, MessagePackRenderer]
+
+
+class CompactEncodingMixin:
+    """
+    APIView mixin accepting compressed and MessagePack request bodies and
+    negotiating MessagePack and gzip-compressed responses.
+    """
+    parser_classes = PARSER_CLASSES
+    renderer_classes = RENDERER_CLASSES
+
+    @method_decorator(gzip_page)
+    def dispatch(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)
+
+
+def parse_request_body(request):
+    """
+    The decoded body of a plain Django request, for views outside DRF's
+    request handling. Raises APIException subclasses like DRF's parsers.
+    """
+    body = decompress_body(request.body, request.headers.get("Content-Encoding"))
+    if request.content_type == MSGPACK_MEDIA_TYPE:
+        return unpack_msgpack(body) if body else {}
+    if not body:
+        return {}
+    try:
+        return json.loads(body.decode(settings.DEFAULT_CHARSET))
+    except ValueError as exc:
+        raise exceptions.ParseError(f"JSON parse error - {exc}")
+
+
+_negotiator = DefaultContentNegotiation()
+
+
+def render_response_body(request, data):
+    """
+    Render data in the encoding a plain Django request's Accept header asks
+    for, JSON by default. Returns (content, content_type).
+    """
+    drf_request = request if isinstance(request, Request) else Request(request)
+    available = [renderer_class() for renderer_class in RENDERER_CLASSES]
+    try:
+        renderer, media_type = _negotiator.select_renderer(drf_request, available)
+    except exceptions.NotAcceptable:
+        renderer, media_type = available[0], available[0].media_type
+    return renderer.render(data, media_type), renderer.media_type
@@ -0,0 +1,108 @@
+"""
+Archive tier for processed submission records.
+
+archive_processed_records() moves CollectorSubmissionRecord rows that were
+processed more than ADL_COLLECTOR_ARCHIVE_AFTER_DAYS ago into
+ArchivedSubmissionRecord, batch_size rows per transaction. Each batch copies
+its rows and deletes the originals atomically, so the job can be stopped at
+any point and simply run again to resume. Pending and test records are never
+archived, and submissions themselves stay in place: they carry the
+idempotency and SYNOP lineage, and their archived records remain reachable
+through CollectorSubmission.all_records(), and the submission snippet lists
+them in a read-only panel. Archived records no longer take
+part in revision resolution (CollectorSubmissionRecord.objects.
+supersede_stale_revisions), so keep the age well above how late a revision
+can plausibly arrive.
+
+Celery beat runs it daily (archive_submission_records_task); the
+archive_submission_records management command runs it on demand.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone as dj_timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def get_archive_after_days() -> int:
+    return getattr(settings, "ADL_COLLECTOR_ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS)
+
+
+def archive_processed_records(older_than_days=None, batch_size=ARCHIVE_BATCH_SIZE, max_batches=None) -> int:
+    """
+    Move processed records older than older_than_days (default: the setting)
+    to the archive table. Stops after max_batches batches if given. Returns the
+    number of records moved.
+    """
+    if older_than_days is None:
+        older_than_days = get_archive_after_days()
+    if older_than_days <= 0:
+        return 0
+
+    cutoff = dj_timezone.now() - datetime.timedelta(days=older_than_days)
+    moved = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        count = _archive_batch(cutoff, batch_size)
+        moved += count
+        batches += 1
+        if count < batch_size:
+            break
+
+    if moved:
+        logger.info("Archived %d processed CollectorSubmissionRecord row(s) older than %s", moved, cutoff)
+    return moved
+
+
+def _archive_batch(cutoff, batch_size) -> int:
+    from .models import ArchivedSubmissionRecord, CollectorSubmissionRecord
+
+    with transaction.atomic():
+        rows = CollectorSubmissionRecord.objects.filter(
+            is_processed=True,
+            processed_at__lt=cutoff,
+        ).order_by("pk")
+        if connection.features.has_select_for_update_skip_locked:
+            # Leave rows locked by a concurrent run (or an admin edit) for the next pass
+            rows = rows.select_for_update(skip_locked=True, of=("self",))
+        rows = list(
+            rows.values_list(
+                "pk",
+                "submission_id",
+                "station_link_id",
+                "variable_mapping_id",
+                "value",
+                "submission__observation_time",
+                "processed_at",
+                "error_message",
+            )[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        ArchivedSubmissionRecord.objects.bulk_create(
+            [
+                ArchivedSubmissionRecord(
+                    id=pk,
+                    submission_id=submission_id,
+                    station_link_id=station_link_id,
+                    variable_mapping_id=variable_mapping_id,
+                    value=value,
+                    observation_time=observation_time,
+                    processed_at=processed_at,
+                    error_message=error_message,
+                )
+                for (pk, submission_id, station_link_id, variable_mapping_id, value,
+                     observation_time, processed_at, error_message) in rows
+            ],
+            # A row already archived by an interrupted run is not copied twice
+            ignore_conflicts=True,
+        )
+        CollectorSubmissionRecord.objects.filter(pk__in=[row[0] for row in rows]).delete()
+    return len(rows)
@@ -0,0 +1,123 @@
+"""
+Cached observer authorization map.
+
+get_observer_authz(user) answers "which station links may this user submit
+to, as which observer, with which direct-entry variable mappings?" from the
+cache, so the observer API and submission validation need no queries for it.
+
+Entries are keyed by a global generation number, which signals.py bumps on
+every save or delete of a station link, observer, variable mapping or
+station. Bumping makes every user's cached map unreachable at once; these
+are rare admin edits, so rebuilding on the next request is cheap. See
+cache_counters.py for how the generation is kept.
+
+The map holds plain values (ids and flags), never model instances, so an
+entry can only ever say what the rows said when it was built, and callers
+that need a row read it from the database.
+"""
+from django.core.cache import cache
+
+from .cache_counters import aget_counter, get_counter, invalidate
+
+AUTHZ_CACHE_TIMEOUT = 60 * 60
+_GENERATION_KEY = "adl_collector:authz_generation"
+
+
+def get_observer_authz(user) -> dict:
+    """
+    {station_link_id: grant} for every station link the user is an observer
+    of, enabled or not; see _grants() for the keys of a grant. Callers check
+    the enabled flags, e.g. with is_active().
+    """
+    if not user or not user.is_authenticated:
+        return {}
+
+    key = f"adl_collector:authz:{get_counter(_GENERATION_KEY)}:{user.pk}"
+    authz = cache.get(key)
+    if authz is None:
+        authz = _build_authz(user)
+        cache.set(key, authz, AUTHZ_CACHE_TIMEOUT)
+    return authz
+
+
+async def aget_observer_authz(user) -> dict:
+    """get_observer_authz() for async views, through the async cache and ORM APIs."""
+    if not user or not user.is_authenticated:
+        return {}
+
+    key = f"adl_collector:authz:{await aget_counter(_GENERATION_KEY)}:{user.pk}"
+    authz = await cache.aget(key)
+    if authz is None:
+        authz = _grants([row async for row in _observers(user)])
+        if authz:
+            _add_direct_entry_vm_ids(authz, [row async for row in _direct_entry_vm_rows(authz)])
+        await cache.aset(key, authz, AUTHZ_CACHE_TIMEOUT)
+    return authz
+
+
+def is_active(grant) -> bool:
+    """Whether a grant lets its user submit: both the observer and the station link are enabled."""
+    return grant["observer_enabled"] and grant["station_link_enabled"]
+
+
+def invalidate_observer_authz():
+    invalidate(_GENERATION_KEY)
+
+
+def _build_authz(user) -> dict:
+    authz = _grants(_observers(user))
+    if authz:
+        _add_direct_entry_vm_ids(authz, _direct_entry_vm_rows(authz))
+    return authz
+
+
+def _observers(user):
+    from .models import ManualObservationStationLinkObserver
+
+    # Ordered so that an enabled observer row wins over a disabled one for the same link
+    return (
+        ManualObservationStationLinkObserver.objects
+        .filter(user=user)
+        .order_by("enabled", "pk")
+        .values_list(
+            "station_link_id",
+            "pk",
+            "enabled",
+            "station_link__enabled",
+            "station_link__network_connection_id",
+            "station_link__station__name",
+        )
+    )
+
+
+def _direct_entry_vm_rows(authz):
+    from .models import ManualObservationStationLinkVariableMapping
+
+    return ManualObservationStationLinkVariableMapping.objects.filter(
+        station_link_id__in=list(authz),
+        show_in_direct_entry=True,
+    ).values_list("station_link_id", "pk")
+
+
+def _grants(observer_rows) -> dict:
+    return {
+        station_link_id: {
+            "observer_id": observer_id,
+            "observer_enabled": observer_enabled,
+            "station_link_enabled": station_link_enabled,
+            "network_connection_id": network_connection_id,
+            "station_name": station_name,
+            "direct_entry_vm_ids": frozenset(),
+        }
+        for (
+            station_link_id, observer_id, observer_enabled, station_link_enabled, network_connection_id, station_name
+        ) in observer_rows
+    }
+
+
+def _add_direct_entry_vm_ids(authz, vm_rows):
+    vm_ids = {}
+    for station_link_id, vm_id in vm_rows:
+        vm_ids.setdefault(station_link_id, set()).add(vm_id)
+    for station_link_id, ids in vm_ids.items():
+        authz[station_link_id]["direct_entry_vm_ids"] = frozenset(ids)
@@ -0,0 +1,56 @@
+"""
+Counters that version cached entries.
+
+A cached entry embeds the current value of a counter in its key, so bumping
+the counter makes every entry cached under an earlier value unreachable at
+once; those then expire on their own. Counters never expire, and are seeded
+from the clock, so a counter lost to eviction never brings back entries
+cached under an earlier number.
+
+invalidate() bumps a counter and bumps it again when the transaction
+commits, so an entry rebuilt from pre-commit data in the meantime does not
+outlive it.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_counter(key):
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key)
+    return value
+
+
+def get_counters(keys) -> list:
+    """get_counter() for each of keys, in one cache round trip when all exist."""
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            values[key] = get_counter(key)
+    return [values[key] for key in keys]
+
+
+async def aget_counter(key):
+    """get_counter() for async code, through the async cache API."""
+    value = await cache.aget(key)
+    if value is None:
+        await cache.aadd(key, time.time_ns(), None)
+        value = await cache.aget(key)
+    return value
+
+
+def bump_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate(key):
+    """Bump the counter now and again on commit."""
+    bump_counter(key)
+    transaction.on_commit(lambda: bump_counter(key))
@@ -0,0 +1,75 @@
+"""
+Compaction of stored submission payloads.
+
+Submissions store their raw payload in CollectorSubmission.data. In compact
+storage (ADL_COLLECTOR_SUBMISSION_DATA_STORAGE = "compact", opt-in) new
+submissions keep only what the row and its records cannot rebuild, such as
+meta and client info; CollectorSubmission.payload rebuilds the rest on demand.
+
+compact_submission_data() applies the same to rows stored before, batch_size
+rows per transaction in primary-key order, so it can be stopped and re-run at
+any point. A payload's records are only dropped when they match the
+submission's stored records exactly; SYNOP payloads and anything else with
+nothing derivable are left as they are. PostgreSQL reclaims the freed space
+on the next VACUUM.
+
+Run it from the compact_submission_data management command.
+"""
+import logging
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+COMPACT_BATCH_SIZE = 500
+
+
+def compact_submission_data(batch_size=COMPACT_BATCH_SIZE, max_batches=None) -> int:
+    """
+    Compact the data of every submission not compacted yet. Stops after
+    max_batches batches if given. Returns the number of rows rewritten.
+    """
+    compacted = 0
+    batches = 0
+    last_pk = 0
+    while max_batches is None or batches < max_batches:
+        last_pk, count, scanned = _compact_batch(last_pk, batch_size)
+        compacted += count
+        batches += 1
+        if scanned < batch_size:
+            break
+    
+    if compacted:
+        logger.info("Compacted the data of %d CollectorSubmission row(s)", compacted)
+    return compacted
+
+
+def _compact_batch(after_pk, batch_size):
+    from .models import CollectorSubmission
+    from .models.submission import COMPACT_MARKER, compact_payload
+    
+    with transaction.atomic():
+        submissions = list(
+            CollectorSubmission.objects
+            .filter(pk__gt=after_pk)
+            .exclude(data__has_key=COMPACT_MARKER)
+            .order_by("pk")
+            .select_for_update()
+            .prefetch_related("records", "archived_records")[:batch_size]
+        )
+        if not submissions:
+            return after_pk, 0, 0
+        
+        changed = []
+        for sub in submissions:
+            records = [
+                (record.variable_mapping_id, record.value)
+                for record in sorted(sub.all_records(), key=lambda record: record.pk)
+            ]
+            data = compact_payload(sub.data, records)
+            if data is not sub.data:
+                sub.data = data
+                changed.append(sub)
+        
+        CollectorSubmission.objects.bulk_update(changed, ["data"])
+    return submissions[-1].pk, len(changed), len(submissions)
@@ -1,3 +1,6 @@
+import os
+
+
 def setup(settings):
     """
     This function is called after adl has setup its own Django settings file but
@@ -6,3 +9,92 @@ def setup(settings):
 
     settings.INSTALLED_APPS += ["some_custom_plugin_dep"]
     """
+    # Failed ingestion attempts before a record is dead-lettered, and the
+    # backoff after the first failure (doubled for each further one).
+    settings.ADL_COLLECTOR_INGEST_MAX_ATTEMPTS = int(
+        os.getenv("ADL_COLLECTOR_INGEST_MAX_ATTEMPTS", 5)
+    )
+    settings.ADL_COLLECTOR_INGEST_RETRY_BASE_SECONDS = int(
+        os.getenv("ADL_COLLECTOR_INGEST_RETRY_BASE_SECONDS", 300)
+    )
+
+    # Processed submission records older than this many days are moved to the
+    # archive table by the archive_submission_records command. 0 disables it.
+    settings.ADL_COLLECTOR_ARCHIVE_AFTER_DAYS = int(
+        os.getenv("ADL_COLLECTOR_ARCHIVE_AFTER_DAYS", 90)
+    )
+
+    # "full" stores the raw payload as received; "compact" stores only the
+    # parts that the submission row and its records can not rebuild, so the
+    # raw values are lost if those records are deleted.
+    settings.ADL_COLLECTOR_SUBMISSION_DATA_STORAGE = os.getenv(
+        "ADL_COLLECTOR_SUBMISSION_DATA_STORAGE", "full"
+    )
+
+    # Token buckets for the submission endpoints: each observer and each
+    # connection may burst this many submissions, refilled at the given rate.
+    # Requests over a limit get 429 with Retry-After. 0 disables a bucket.
+    settings.ADL_COLLECTOR_OBSERVER_SUBMISSIONS_PER_MINUTE = int(
+        os.getenv("ADL_COLLECTOR_OBSERVER_SUBMISSIONS_PER_MINUTE", 30)
+    )
+    settings.ADL_COLLECTOR_OBSERVER_SUBMISSION_BURST = int(
+        os.getenv("ADL_COLLECTOR_OBSERVER_SUBMISSION_BURST", 200)
+    )
+    settings.ADL_COLLECTOR_CONNECTION_SUBMISSIONS_PER_MINUTE = int(
+        os.getenv("ADL_COLLECTOR_CONNECTION_SUBMISSIONS_PER_MINUTE", 600)
+    )
+    settings.ADL_COLLECTOR_CONNECTION_SUBMISSION_BURST = int(
+        os.getenv("ADL_COLLECTOR_CONNECTION_SUBMISSION_BURST", 2000)
+    )
+
+    # Days of configuration changes kept for delta sync. Clients that have
+    # not synced for longer get a full sync.
+    settings.ADL_COLLECTOR_CONFIG_CHANGE_RETENTION_DAYS = int(
+        os.getenv("ADL_COLLECTOR_CONFIG_CHANGE_RETENTION_DAYS", 30)
+    )
+
+    # Django cache alias shared by all workers for decoded SYNOP messages, so a
+    # message previewed in one process is not decoded again when saved in
+    # another. Empty keeps decodes in each process only.
+    settings.ADL_COLLECTOR_SYNOP_DECODE_CACHE = os.getenv("ADL_COLLECTOR_SYNOP_DECODE_CACHE", "default")
+
+    # Days a submission's idempotency key, and the response stored with it, is
+    # kept for replaying client retries.
+    settings.ADL_COLLECTOR_IDEMPOTENCY_KEY_RETENTION_DAYS = int(
+        os.getenv("ADL_COLLECTOR_IDEMPOTENCY_KEY_RETENTION_DAYS", 30)
+    )
+
+    # Seconds between the periodic drains of the ingestion outbox, which
+    # dispatch entries whose own drain could not be scheduled, e.g. during a
+    # broker outage. 0 leaves it to the drain_ingestion_outbox command.
+    settings.ADL_COLLECTOR_OUTBOX_DRAIN_INTERVAL_SECONDS = int(
+        os.getenv("ADL_COLLECTOR_OUTBOX_DRAIN_INTERVAL_SECONDS", 60)
+    )
+
+    # Periodic tasks, run by celery beat
+    beat_schedule = {
+        # The pending-record counters only gate the ingestion sweeps; the
+        # recount stops a counter that drifted low from hiding records for long
+        "adl_collector_refresh_pending_record_counts": {
+            "task": "adl_collector_app_plugin.tasks.refresh_pending_record_counts_task",
+            "schedule": 60 * 60,
+        },
+        "adl_collector_archive_submission_records": {
+            "task": "adl_collector_app_plugin.tasks.archive_submission_records_task",
+            "schedule": 24 * 60 * 60,
+        },
+        "adl_collector_prune_idempotency_keys": {
+            "task": "adl_collector_app_plugin.tasks.prune_idempotency_keys_task",
+            "schedule": 24 * 60 * 60,
+        },
+        "adl_collector_prune_config_change_log": {
+            "task": "adl_collector_app_plugin.tasks.prune_config_change_log_task",
+            "schedule": 24 * 60 * 60,
+        },
+    }
+    if settings.ADL_COLLECTOR_OUTBOX_DRAIN_INTERVAL_SECONDS > 0:
+        beat_schedule["adl_collector_drain_ingestion_outbox"] = {
+            "task": "adl_collector_app_plugin.tasks.drain_ingestion_outbox_task",
+            "schedule": settings.ADL_COLLECTOR_OUTBOX_DRAIN_INTERVAL_SECONDS,
+        }
+    settings.CELERY_BEAT_SCHEDULE = {**(getattr(settings, "CELERY_BEAT_SCHEDULE", None) or {}), **beat_schedule}
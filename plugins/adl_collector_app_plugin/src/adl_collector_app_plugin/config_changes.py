@@ -0,0 +1,239 @@
+"""
+Delta sync of observer station-link configuration.
+
+signals.py writes a ConfigChangeLogEntry in the transaction of every change
+an observer's app cares about: a station link (including its schedule), one
+of its variable mappings, a user's observer row, and the stations, ADL
+parameters and units their payloads name. get_config_changes(user, cursor)
+reads the entries after the client's cursor, through the primary key index,
+and answers with only what changed for that user:
+
+- station links whose link-level configuration changed, or that the user
+  can now see, in full (the cached payload of station_config.py);
+- variable mappings that changed on the other links;
+- tombstones for links the user can no longer see and mappings that were
+  deleted or taken out of direct entry.
+
+Without a cursor, or with one older than the retained log, the answer is a
+full sync of every visible link. prune_config_change_log() deletes entries
+older than ADL_COLLECTOR_CONFIG_CHANGE_RETENTION_DAYS; clients that have not
+synced for longer get a full sync.
+
+Primary keys are handed out at insert time, but entries become visible when
+their transaction commits, so an entry can appear below one that a client
+has already read. The cursor therefore carries, next to the newest entry
+read, the gaps below it: keys missing from the log that may still be
+committed. The next sync reads those again. A gap followed by entries older
+than GAP_TIMEOUT_SECONDS belongs to a transaction that was rolled back, and
+is dropped.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Max, Min, Q
+from django.utils import timezone as dj_timezone
+
+from .authz import get_observer_authz, is_active
+from .station_config import get_station_link_config
+
+DEFAULT_RETENTION_DAYS = 30
+GAP_TIMEOUT_SECONDS = 60 * 60
+# Beyond this many gap ranges, the cursor falls back to just below the first
+MAX_CURSOR_GAPS = 50
+
+
+def get_retention_days() -> int:
+    return getattr(settings, "ADL_COLLECTOR_CONFIG_CHANGE_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+
+
+def record_config_change(station_link_id, variable_mapping_id=None, user_id=None, deleted=False):
+    from .models import ConfigChangeLogEntry
+    
+    ConfigChangeLogEntry.objects.create(
+        station_link_id=station_link_id,
+        variable_mapping_id=variable_mapping_id,
+        user_id=user_id,
+        deleted=deleted,
+    )
+
+
+def record_station_change(station):
+    """Log a change to every link of station, whose name appears in their payloads."""
+    from .models import ConfigChangeLogEntry, ManualObservationStationLink
+    
+    ConfigChangeLogEntry.objects.bulk_create([
+        ConfigChangeLogEntry(station_link_id=station_link_id)
+        for station_link_id in ManualObservationStationLink.objects.filter(station=station).values_list(
+            "pk", flat=True
+        )
+    ])
+
+
+def record_variable_mapping_changes(mappings):
+    """Log a change to each variable mapping in the queryset mappings."""
+    from .models import ConfigChangeLogEntry
+    
+    ConfigChangeLogEntry.objects.bulk_create([
+        ConfigChangeLogEntry(station_link_id=station_link_id, variable_mapping_id=pk)
+        for pk, station_link_id in mappings.values_list("pk", "station_link_id")
+    ])
+
+
+def encode_config_cursor(latest, gaps=()) -> str:
+    """
+    Opaque cursor for the entries up to latest, except the (first, last)
+    ranges of keys in gaps.
+    """
+    if not gaps:
+        return str(latest)
+    ranges = ",".join(str(first) if first == last else f"{first}-{last}" for first, last in gaps)
+    return f"{latest}:{ranges}"
+
+
+def decode_config_cursor(cursor):
+    """(latest, gaps) of an encode_config_cursor() cursor; raises ValueError if it is not one."""
+    latest, _, ranges = cursor.partition(":")
+    latest = int(latest)
+    gaps = []
+    for gap in ranges.split(",") if ranges else []:
+        first, _, last = gap.partition("-")
+        first = int(first)
+        last = int(last) if "-" in gap else first
+        if not 0 < first <= last <= latest:
+            raise ValueError(f"Invalid gap {gap!r}")
+        gaps.append((first, last))
+    if latest < 0 or len(gaps) > MAX_CURSOR_GAPS:
+        raise ValueError("Invalid cursor")
+    return latest, gaps
+
+
+def get_config_changes(user, cursor=None) -> dict:
+    """
+    The configuration changes visible to user since cursor (None for a full
+    sync, else a decode_config_cursor() result), with the cursor to send
+    next time.
+    """
+    from .models import ConfigChangeLogEntry
+    
+    authz = get_observer_authz(user)
+    visible = {station_link_id for station_link_id, grant in authz.items() if is_active(grant)}
+    
+    bounds = ConfigChangeLogEntry.objects.aggregate(oldest=Min("pk"), latest=Max("pk"))
+    latest = bounds["latest"] or 0
+    # Found before anything is read, so an entry committed meanwhile is either read now or a gap
+    gaps = _open_gaps(latest)
+    if len(gaps) > MAX_CURSOR_GAPS:
+        next_cursor = encode_config_cursor(gaps[0][0] - 1)
+    else:
+        next_cursor = encode_config_cursor(latest, gaps)
+    
+    changes = {
+        "cursor": next_cursor,
+        "full_sync": False,
+        "station_links": [],
+        "variable_mappings": [],
+        "deleted_station_links": [],
+        "deleted_variable_mappings": [],
+    }
+    
+    # A cursor from before the retained log (or from another database) cannot be resumed
+    if cursor is not None:
+        cursor, cursor_gaps = cursor
+    if cursor is None or cursor > latest or (bounds["oldest"] is not None and cursor < bounds["oldest"] - 1):
+        changes["full_sync"] = True
+        changes["station_links"] = [get_station_link_config(station_link_id)[1] for station_link_id in sorted(visible)]
+        return changes
+    
+    unread = Q(pk__gt=cursor, pk__lte=latest)
+    for first, last in cursor_gaps:
+        unread |= Q(pk__range=(first, last))
+    entries = (
+        ConfigChangeLogEntry.objects
+        .filter(unread)
+        .filter(Q(station_link_id__in=list(authz)) | Q(user_id=user.pk))
+        .order_by("pk")
+        .values_list("station_link_id", "variable_mapping_id", "user_id")
+    )
+    touched_links = set()
+    touched_mappings = {}
+    for station_link_id, variable_mapping_id, user_id in entries:
+        if user_id is not None and user_id != user.pk:
+            # Another user's access changed; this user's view of the link did not
+            continue
+        if variable_mapping_id is None:
+            touched_links.add(station_link_id)
+        else:
+            touched_mappings[variable_mapping_id] = station_link_id
+    
+    for station_link_id in sorted(touched_links):
+        if station_link_id in visible:
+            changes["station_links"].append(get_station_link_config(station_link_id)[1])
+        else:
+            changes["deleted_station_links"].append(station_link_id)
+    
+    # Mappings of links sent in full above are already up to date
+    mapping_ids_by_link = {}
+    for variable_mapping_id, station_link_id in touched_mappings.items():
+        if station_link_id in visible and station_link_id not in touched_links:
+            mapping_ids_by_link.setdefault(station_link_id, set()).add(variable_mapping_id)
+    
+    for station_link_id, mapping_ids in sorted(mapping_ids_by_link.items()):
+        # The cached payload lists exactly the link's current direct-entry mappings
+        _, data = get_station_link_config(station_link_id)
+        current = {mapping["id"]: mapping for mapping in data["variable_mappings"]}
+        for variable_mapping_id in sorted(mapping_ids):
+            if variable_mapping_id in current:
+                changes["variable_mappings"].append(
+                    {"station_link_id": station_link_id, **current[variable_mapping_id]}
+                )
+            else:
+                changes["deleted_variable_mappings"].append(variable_mapping_id)
+    return changes
+
+
+def _open_gaps(latest) -> list:
+    """
+    (first, last) ranges of the keys up to latest that are missing from the
+    log and are followed by an entry created within GAP_TIMEOUT_SECONDS, so
+    their transaction may still commit.
+    """
+    from .models import ConfigChangeLogEntry
+    
+    threshold = dj_timezone.now() - datetime.timedelta(seconds=GAP_TIMEOUT_SECONDS)
+    first_recent = ConfigChangeLogEntry.objects.filter(
+        created_at__gte=threshold, pk__lte=latest
+    ).aggregate(first=Min("pk"))["first"]
+    if first_recent is None:
+        return []
+    previous = ConfigChangeLogEntry.objects.filter(pk__lt=first_recent).aggregate(previous=Max("pk"))["previous"] or 0
+    
+    gaps = []
+    for pk, created_at in (
+            ConfigChangeLogEntry.objects
+            .filter(pk__gt=previous, pk__lte=latest)
+            .order_by("pk")
+            .values_list("pk", "created_at")
+    ):
+        if pk > previous + 1 and created_at >= threshold:
+            gaps.append((previous + 1, pk - 1))
+        previous = pk
+    return gaps
+
+
+def prune_config_change_log(older_than_days=None) -> int:
+    """
+    Delete log entries older than older_than_days (default: the setting),
+    always keeping the newest, which anchors cursor validation. Returns the
+    number of entries deleted.
+    """
+    from .models import ConfigChangeLogEntry
+    
+    if older_than_days is None:
+        older_than_days = get_retention_days()
+    
+    newest = ConfigChangeLogEntry.objects.aggregate(newest=Max("pk"))["newest"]
+    if newest is None:
+        return 0
+    cutoff = dj_timezone.now() - datetime.timedelta(days=older_than_days)
+    deleted, _ = ConfigChangeLogEntry.objects.filter(created_at__lt=cutoff, pk__lt=newest).delete()
+    return deleted
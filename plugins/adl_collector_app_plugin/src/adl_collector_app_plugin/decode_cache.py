@@ -0,0 +1,102 @@
+"""
+Cache of decoded FM12 SYNOP messages.
+
+The office SYNOP form and the API both decode a message for the preview and
+again when it is saved, and archived messages are often re-submitted
+unchanged. decode_fm12_cached() decodes each message once: results are kept
+in an in-process LRU and, unless ADL_COLLECTOR_SYNOP_DECODE_CACHE is empty,
+in that Django cache alias (default: "default"), so a preview served by one
+worker process saves the decode in another.
+
+Entries are keyed by the message with its whitespace normalized, which
+pymetdecoder ignores, and by the pymetdecoder version, so an upgrade never
+serves results of the previous decoder. Failed decodes are not cached.
+Callers get their own copy of the decoded dict.
+"""
+import copy
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from importlib import metadata
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .synop_utils import decode_fm12
+
+DEFAULT_DECODE_CACHE = "default"
+DECODE_LRU_SIZE = 256
+DECODE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+
+
+def normalize_fm12(raw_message: str) -> str:
+    return " ".join(raw_message.split())
+
+
+@functools.cache
+def _decoder_version() -> str:
+    try:
+        return metadata.version("pymetdecoder")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _cache_key(normalized: str) -> str:
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    return f"adl_collector:fm12:{_decoder_version()}:{digest}"
+
+
+def _shared_cache():
+    alias = getattr(settings, "ADL_COLLECTOR_SYNOP_DECODE_CACHE", DEFAULT_DECODE_CACHE)
+    return caches[alias] if alias else None
+
+
+def _remember(key, decoded):
+    with _lru_lock:
+        _lru[key] = decoded
+        _lru.move_to_end(key)
+        while len(_lru) > DECODE_LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def get_cached_decodes(raw_messages) -> dict:
+    """{raw message: decoded copy} for those of raw_messages already decoded."""
+    keys = {raw: _cache_key(normalize_fm12(raw)) for raw in raw_messages}
+    found = {}
+    with _lru_lock:
+        for key in keys.values():
+            if key in _lru:
+                _lru.move_to_end(key)
+                found[key] = _lru[key]
+    
+    shared = _shared_cache()
+    missing = [key for key in set(keys.values()) if key not in found]
+    if shared is not None and missing:
+        for key, decoded in shared.get_many(missing).items():
+            _remember(key, decoded)
+            found[key] = decoded
+    return {raw: copy.deepcopy(found[key]) for raw, key in keys.items() if key in found}
+
+
+def store_decodes(decoded_by_raw: dict):
+    """Cache {raw message: decoded} results decoded elsewhere, e.g. in a worker process."""
+    entries = {_cache_key(normalize_fm12(raw)): decoded for raw, decoded in decoded_by_raw.items()}
+    for key, decoded in entries.items():
+        _remember(key, copy.deepcopy(decoded))
+    shared = _shared_cache()
+    if shared is not None and entries:
+        shared.set_many(entries, DECODE_CACHE_TIMEOUT)
+
+
+def decode_fm12_cached(raw_message: str) -> dict:
+    """decode_fm12() through the cache. Raises like decode_fm12()."""
+    cached = get_cached_decodes([raw_message]).get(raw_message)
+    if cached is not None:
+        return cached
+    decoded = decode_fm12(normalize_fm12(raw_message))
+    store_decodes({raw_message: decoded})
+    return decoded
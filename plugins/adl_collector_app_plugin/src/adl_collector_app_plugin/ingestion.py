@@ -0,0 +1,170 @@
+"""
+Ingestion triggering through a transactional outbox.
+
+A new non-test submission writes an IngestionOutboxEntry in its own
+transaction (enqueue_ingestion). Once that commits, the connection's outbox
+is drained. The outbox itself batches the triggers: a link has at most one
+undispatched entry, and a drain sends one task for all the links of a
+connection it finds pending, so a burst of submissions costs a task per
+drain rather than one per submission.
+
+The drain (drain_ingestion_outbox) claims undispatched entries in batches,
+marking them dispatched in a short transaction, then groups them by connection
+and sends one process_station_link_batch task per connection once that
+transaction has committed. If the broker is down the entries not yet sent are
+put back in the outbox for the next drain, so an outage loses no trigger,
+and the backlog can be queried at any time. Celery beat drains every connection each
+ADL_COLLECTOR_OUTBOX_DRAIN_INTERVAL_SECONDS, so entries whose own drain could
+not be scheduled are dispatched once the broker is back; the
+drain_ingestion_outbox management command does the same on demand.
+
+Every sweep that reads a record counts an ingestion attempt against it and
+backs it off (ADL_COLLECTOR_INGEST_RETRY_BASE_SECONDS, doubling per attempt up
+to a day) until after_save_records() marks it processed. Values the core
+rejects, or whose sweep dies before saving them, are therefore retried with
+exponential backoff and dead-lettered after ADL_COLLECTOR_INGEST_MAX_ATTEMPTS
+attempts; see retry_delay() and CollectorSubmissionRecord.objects.begin_attempts().
+"""
+import datetime
+import logging
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone as dj_timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_BASE_SECONDS = 300
+MAX_RETRY_DELAY = datetime.timedelta(days=1)
+DRAIN_BATCH_SIZE = 500
+# Dispatched entries are kept this long for inspection, then deleted by the drain
+DISPATCHED_RETENTION = datetime.timedelta(days=1)
+
+
+def get_max_attempts() -> int:
+    return getattr(settings, "ADL_COLLECTOR_INGEST_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+
+
+def retry_delay(attempts: int) -> datetime.timedelta:
+    """Backoff before the next ingestion attempt of a record that has been attempted `attempts` times."""
+    base = getattr(settings, "ADL_COLLECTOR_INGEST_RETRY_BASE_SECONDS", DEFAULT_RETRY_BASE_SECONDS)
+    seconds = base * 2 ** max(attempts - 1, 0)
+    return min(datetime.timedelta(seconds=seconds), MAX_RETRY_DELAY)
+
+
+def enqueue_ingestion(pairs):
+    """
+    Write outbox entries for (connection_id, station_link_id) pairs in the
+    current transaction, and drain each connection's outbox once it commits.
+    """
+    from .models import IngestionOutboxEntry
+    
+    pairs = set(pairs)
+    if not pairs:
+        return
+    
+    # Links that already have an undispatched entry hit the partial unique
+    # constraint and are skipped
+    IngestionOutboxEntry.objects.bulk_create(
+        [
+            IngestionOutboxEntry(connection_id=connection_id, station_link_id=station_link_id)
+            for connection_id, station_link_id in pairs
+        ],
+        ignore_conflicts=True,
+    )
+    
+    for connection_id in {connection_id for connection_id, _ in pairs}:
+        transaction.on_commit(partial(_request_drain_logged, connection_id))
+
+
+def _request_drain_logged(connection_id):
+    try:
+        request_drain(connection_id)
+    except Exception:
+        # The entries are committed; the next drain picks them up
+        logger.exception("Failed to drain the ingestion outbox for connection pk=%s.", connection_id)
+
+
+def request_drain(connection_id):
+    """Drain the connection's outbox entries, including those of submissions committed meanwhile."""
+    drain_ingestion_outbox(connection_id=connection_id)
+
+
+def drain_ingestion_outbox(connection_id=None, batch_size=DRAIN_BATCH_SIZE) -> int:
+    """
+    Dispatch undispatched outbox entries — for one connection, or all if
+    connection_id is None — as one process_station_link_batch task per
+    connection per batch. Returns the number of entries dispatched.
+
+    Each batch is claimed in its own short transaction, which locks the
+    entries (skipping any another drain holds) only to mark them dispatched;
+    the tasks are published after it commits, so no row lock is held across a
+    broker round trip. If publishing fails, the links not yet published are
+    returned to the outbox for the next drain and the error propagates.
+    """
+    from adl.core.tasks import process_station_link_batch
+    from .models import IngestionOutboxEntry
+    
+    dispatched = 0
+    while True:
+        with transaction.atomic():
+            qs = IngestionOutboxEntry.objects.select_for_update(skip_locked=True).filter(dispatched_at__isnull=True)
+            if connection_id is not None:
+                qs = qs.filter(connection_id=connection_id)
+            entries = list(qs.order_by("pk").values_list("pk", "connection_id", "station_link_id")[:batch_size])
+            IngestionOutboxEntry.objects.filter(pk__in=[pk for pk, _, _ in entries]).update(
+                dispatched_at=dj_timezone.now()
+            )
+        if not entries:
+            break
+        
+        sl_ids_by_connection = defaultdict(set)
+        for _, entry_connection_id, station_link_id in entries:
+            sl_ids_by_connection[entry_connection_id].add(station_link_id)
+        
+        unpublished = set(sl_ids_by_connection)
+        try:
+            for entry_connection_id, sl_ids in sl_ids_by_connection.items():
+                process_station_link_batch.delay(entry_connection_id, sorted(sl_ids))
+                unpublished.discard(entry_connection_id)
+        except Exception:
+            _return_to_outbox(entries, unpublished)
+            raise
+        
+        dispatched += len(entries)
+        logger.debug(
+            "Drained %d ingestion outbox entr(ies) across %d connection(s).",
+            len(entries), len(sl_ids_by_connection),
+        )
+        if len(entries) < batch_size:
+            break
+    
+    IngestionOutboxEntry.objects.filter(
+        dispatched_at__lt=dj_timezone.now() - DISPATCHED_RETENTION
+    ).delete()
+    
+    return dispatched
+
+
+def _return_to_outbox(entries, connection_ids):
+    """
+    Undo the claim of the claimed entries (pk, connection_id, station_link_id)
+    of connection_ids, whose task could not be published. They are replaced
+    by fresh undispatched entries; a link enqueued again since the claim
+    already has one.
+    """
+    from .models import IngestionOutboxEntry
+    
+    returned = [entry for entry in entries if entry[1] in connection_ids]
+    with transaction.atomic():
+        IngestionOutboxEntry.objects.filter(pk__in=[pk for pk, _, _ in returned]).delete()
+        IngestionOutboxEntry.objects.bulk_create(
+            [
+                IngestionOutboxEntry(connection_id=entry_connection_id, station_link_id=station_link_id)
+                for _, entry_connection_id, station_link_id in returned
+            ],
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from ...archive import ARCHIVE_BATCH_SIZE, archive_processed_records, get_archive_after_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Move processed collector submission records older than ADL_COLLECTOR_ARCHIVE_AFTER_DAYS to the archive "
+        "table. Safe to interrupt and re-run: every batch is moved in its own transaction."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=None,
+                            help=f"Defaults to ADL_COLLECTOR_ARCHIVE_AFTER_DAYS ({get_archive_after_days()}).")
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches.")
+    
+    def handle(self, *args, **options):
+        count = archive_processed_records(
+            older_than_days=options["older_than_days"],
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {count} submission record(s)."))
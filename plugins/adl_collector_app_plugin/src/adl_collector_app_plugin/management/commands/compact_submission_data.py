@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from ...compaction import COMPACT_BATCH_SIZE, compact_submission_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop the parts of stored collector submission payloads that the submission row and its records already "
+        "carry. Safe to interrupt and re-run: every batch is rewritten in its own transaction."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=COMPACT_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches.")
+    
+    def handle(self, *args, **options):
+        count = compact_submission_data(batch_size=options["batch_size"], max_batches=options["max_batches"])
+        self.stdout.write(self.style.SUCCESS(f"Compacted {count} submission(s)."))
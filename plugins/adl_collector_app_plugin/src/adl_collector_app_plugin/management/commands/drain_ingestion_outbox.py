@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ...ingestion import DRAIN_BATCH_SIZE, drain_ingestion_outbox
+
+
+class Command(BaseCommand):
+    help = "Dispatch pending ingestion triggers from the collector outbox, e.g. after a broker outage."
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--connection", type=int, help="Only drain this ManualObservationConnection.")
+        parser.add_argument("--batch-size", type=int, default=DRAIN_BATCH_SIZE)
+    
+    def handle(self, *args, **options):
+        count = drain_ingestion_outbox(connection_id=options["connection"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Dispatched {count} ingestion outbox entr(ies)."))
@@ -0,0 +1,45 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ...synop_bulletin import ingest_bulletin
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive every station report of an FM12 AAXX bulletin file and create a collector submission from each."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Bulletin file, or - for standard input.")
+        parser.add_argument("--year", type=int, required=True, help="Observation year (FM12 only carries the day).")
+        parser.add_argument("--month", type=int, required=True, help="Observation month.")
+        parser.add_argument("--user", required=True, help="Username recorded as the submitter.")
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Decoding processes, for large files. By default reports are decoded in this process.",
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get_by_natural_key(options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user {options['user']!r}.")
+        
+        if options["path"] == "-":
+            bulletin = sys.stdin.read()
+        else:
+            with open(options["path"], encoding="utf-8") as fp:
+                bulletin = fp.read()
+        
+        results = ingest_bulletin(bulletin, user, options["year"], options["month"], workers=options["workers"])
+        for result in results:
+            if result["status"] == "error":
+                self.stderr.write(f"Report {result['index']} ({result.get('station_id') or '?'}): {result['error']}")
+        
+        created = sum(1 for result in results if result["status"] == "created")
+        errors = sum(1 for result in results if result["status"] == "error")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} report(s): {created} submission(s) created, {errors} error(s)."
+        ))
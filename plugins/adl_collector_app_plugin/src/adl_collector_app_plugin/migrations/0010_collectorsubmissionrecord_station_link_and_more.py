@@ -0,0 +1,57 @@
+# Generated by Django 6.0.7 on 2026-10-16 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_station_link_and_pending_counts(apps, schema_editor):
+    CollectorSubmission = apps.get_model("adl_collector_app_plugin", "CollectorSubmission")
+    CollectorSubmissionRecord = apps.get_model("adl_collector_app_plugin", "CollectorSubmissionRecord")
+    ManualObservationStationLink = apps.get_model("adl_collector_app_plugin", "ManualObservationStationLink")
+    
+    CollectorSubmissionRecord.objects.filter(station_link__isnull=True).update(
+        station_link_id=Subquery(
+            CollectorSubmission.objects.filter(pk=OuterRef("submission_id")).values("station_link_id")[:1]
+        )
+    )
+    
+    pending = (
+        CollectorSubmissionRecord.objects
+        .filter(
+            station_link=OuterRef("pk"),
+            is_processed=False,
+            submission__is_test_submission=False,
+        )
+        .order_by()
+        .values("station_link")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    ManualObservationStationLink.objects.update(pending_record_count=Coalesce(Subquery(pending), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adl_collector_app_plugin', '0009_alter_manualobservationstationlink_start_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collectorsubmissionrecord',
+            name='station_link',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='submission_records', to='adl_collector_app_plugin.manualobservationstationlink'),
+        ),
+        migrations.AddField(
+            model_name='manualobservationstationlink',
+            name='pending_record_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_station_link_and_pending_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='collectorsubmissionrecord',
+            index=models.Index(condition=models.Q(('is_processed', False)), fields=['station_link', 'submission'], name='collector_record_pending_idx'),
+        ),
+    ]
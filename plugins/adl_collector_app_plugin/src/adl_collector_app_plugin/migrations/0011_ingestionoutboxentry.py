@@ -0,0 +1,30 @@
+# Generated by Django 6.0.7 on 2026-10-16 10:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adl_collector_app_plugin', '0010_collectorsubmissionrecord_station_link_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionOutboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True)),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingestion_outbox', to='adl_collector_app_plugin.manualobservationconnection')),
+                ('station_link', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingestion_outbox', to='adl_collector_app_plugin.manualobservationstationlink')),
+            ],
+            options={
+                'verbose_name': 'Ingestion Outbox Entry',
+                'verbose_name_plural': 'Ingestion Outbox Entries',
+                'indexes': [models.Index(condition=models.Q(('dispatched_at__isnull', True)), fields=['connection', 'id'], name='collector_outbox_pending_idx'), models.Index(fields=['dispatched_at'], name='collector_outbox_sent_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('dispatched_at__isnull', True)), fields=('station_link',), name='uq_outbox_pending_per_link')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.7 on 2026-10-16 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adl_collector_app_plugin', '0011_ingestionoutboxentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collectorsubmissionrecord',
+            name='ingest_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='collectorsubmissionrecord',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='collectorsubmissionrecord',
+            name='is_dead_letter',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.7 on 2026-10-16 11:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adl_collector_app_plugin', '0012_collectorsubmissionrecord_retry_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSubmissionRecord',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('value', models.FloatField()),
+                ('observation_time', models.DateTimeField()),
+                ('processed_at', models.DateTimeField(null=True)),
+                ('error_message', models.TextField(blank=True, default='')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('station_link', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_submission_records', to='adl_collector_app_plugin.manualobservationstationlink')),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_records', to='adl_collector_app_plugin.collectorsubmission')),
+                ('variable_mapping', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='adl_collector_app_plugin.manualobservationstationlinkvariablemapping')),
+            ],
+            options={
+                'verbose_name': 'Archived Submission Record',
+                'verbose_name_plural': 'Archived Submission Records',
+                'indexes': [models.Index(fields=['station_link', 'observation_time'], name='collector_archive_link_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.7 on 2026-10-16 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adl_collector_app_plugin', '0014_submissionidempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfigChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('station_link_id', models.IntegerField()),
+                ('variable_mapping_id', models.IntegerField(blank=True, null=True)),
+                ('user_id', models.IntegerField(blank=True, null=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Configuration Change Log Entry',
+                'verbose_name_plural': 'Configuration Change Log Entries',
+            },
+        ),
+    ]
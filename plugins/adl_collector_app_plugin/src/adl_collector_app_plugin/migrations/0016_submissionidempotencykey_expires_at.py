@@ -0,0 +1,19 @@
+# Generated by Django 6.0.7 on 2026-10-16 14:10
+
+import adl_collector_app_plugin.models.idempotency
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adl_collector_app_plugin', '0015_configchangelogentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submissionidempotencykey',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=adl_collector_app_plugin.models.idempotency.idempotency_key_expiry),
+        ),
+    ]
@@ -8,3 +8,7 @@ from .station_link import (  # noqa: F401
 )
 from .submission import CollectorSubmission, CollectorSubmissionRecord  # noqa: F401
 from .synop import SynopParameterMapping, SynopMessage  # noqa: F401
+from .ingestion import IngestionOutboxEntry  # noqa: F401
+from .archive import ArchivedSubmissionRecord  # noqa: F401
+from .idempotency import SubmissionIdempotencyKey  # noqa: F401
+from .config_change import ConfigChangeLogEntry  # noqa: F401
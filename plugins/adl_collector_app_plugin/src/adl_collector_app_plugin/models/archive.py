@@ -0,0 +1,49 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .station_link import ManualObservationStationLink, ManualObservationStationLinkVariableMapping
+from .submission import CollectorSubmission
+
+
+class ArchivedSubmissionRecord(models.Model):
+    """
+    Cold tier for CollectorSubmissionRecord: processed records past
+    ADL_COLLECTOR_ARCHIVE_AFTER_DAYS are moved here by archive.archive_processed_records(),
+    so the live table only holds recent and pending work.
+
+    Rows keep the original record's primary key, so record ids stay valid
+    across tiers, and the observation time is copied from the submission so
+    history queries need no join. Read both tiers through
+    CollectorSubmission.all_records().
+    """
+    id = models.BigIntegerField(primary_key=True)
+    submission = models.ForeignKey(
+        CollectorSubmission,
+        on_delete=models.CASCADE,
+        related_name="archived_records",
+    )
+    station_link = models.ForeignKey(
+        ManualObservationStationLink,
+        on_delete=models.CASCADE,
+        related_name="archived_submission_records",
+        null=True,
+    )
+    variable_mapping = models.ForeignKey(ManualObservationStationLinkVariableMapping, on_delete=models.CASCADE)
+    value = models.FloatField()
+    observation_time = models.DateTimeField()
+    processed_at = models.DateTimeField(null=True)
+    error_message = models.TextField(blank=True, default="")
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    # Archived records are always processed; lets them stand in for live ones
+    is_processed = True
+    
+    class Meta:
+        verbose_name = _("Archived Submission Record")
+        verbose_name_plural = _("Archived Submission Records")
+        indexes = [
+            models.Index(fields=["station_link", "observation_time"], name="collector_archive_link_time_idx"),
+        ]
+    
+    def __str__(self):
+        return f"Archived record {self.pk} of submission {self.submission_id}"
@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ConfigChangeLogEntry(models.Model):
+    """
+    One change to an observer-facing station-link configuration, written by
+    signals.py in the transaction of the change. The sync cursor of
+    config_changes.get_config_changes() is built from primary keys.
+
+    Ids are plain integers rather than foreign keys so that entries outlive
+    what they describe and deletions can be tombstoned. An entry without
+    variable_mapping_id concerns the whole link; one with user_id concerns
+    that user's access to the link.
+    """
+    id = models.BigAutoField(primary_key=True)
+    station_link_id = models.IntegerField()
+    variable_mapping_id = models.IntegerField(null=True, blank=True)
+    user_id = models.IntegerField(null=True, blank=True)
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = _("Configuration Change Log Entry")
+        verbose_name_plural = _("Configuration Change Log Entries")
+    
+    def __str__(self):
+        target = f"variable mapping {self.variable_mapping_id}" if self.variable_mapping_id else "configuration"
+        action = "deleted" if self.deleted else "changed"
+        return f"Station link {self.station_link_id} {target} {action}"
@@ -0,0 +1,91 @@
+import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .submission import CollectorSubmission
+
+DEFAULT_IDEMPOTENCY_KEY_RETENTION_DAYS = 30
+
+
+def get_idempotency_key_retention_days() -> int:
+    return getattr(
+        settings, "ADL_COLLECTOR_IDEMPOTENCY_KEY_RETENTION_DAYS", DEFAULT_IDEMPOTENCY_KEY_RETENTION_DAYS
+    )
+
+
+def idempotency_key_expiry():
+    return timezone.now() + datetime.timedelta(days=get_idempotency_key_retention_days())
+
+
+class SubmissionIdempotencyKey(models.Model):
+    """
+    The response given to the first request that carried a client
+    idempotency_key, per submitting user. Retries with the same key are
+    answered from here with one indexed lookup, before any validation or
+    hashing. Rows are deleted with their submission, or by prune_expired()
+    once ADL_COLLECTOR_IDEMPOTENCY_KEY_RETENTION_DAYS have passed; a retry
+    after that is deduplicated by content hash instead.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    key = models.CharField(max_length=128)
+    submission = models.ForeignKey(
+        CollectorSubmission,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    response_status = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(default=idempotency_key_expiry, db_index=True)
+    
+    class Meta:
+        verbose_name = _("Submission Idempotency Key")
+        verbose_name_plural = _("Submission Idempotency Keys")
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="uq_idempotency_user_key"),
+        ]
+    
+    def __str__(self):
+        return f"Idempotency key {self.key} of user {self.user_id}"
+    
+    @classmethod
+    def lookup(cls, user, keys):
+        """{key: (response_status, response_body)} for those of keys the user has already used."""
+        rows = cls._stored_responses(user, keys)
+        if rows is None:
+            return {}
+        return {key: (response_status, response_body) for key, response_status, response_body in rows}
+    
+    @classmethod
+    async def alookup(cls, user, keys):
+        """lookup() for async views, through the async ORM API."""
+        rows = cls._stored_responses(user, keys)
+        if rows is None:
+            return {}
+        return {key: (response_status, response_body) async for key, response_status, response_body in rows}
+    
+    @classmethod
+    def _stored_responses(cls, user, keys):
+        """The unexpired (key, response_status, response_body) rows of the user's keys; None if no key is usable."""
+        keys = [key for key in keys if isinstance(key, str) and key]
+        if not keys:
+            return None
+        return (
+            cls.objects
+            .filter(user=user, key__in=keys, expires_at__gt=timezone.now())
+            .values_list("key", "response_status", "response_body")
+        )
+    
+    @classmethod
+    def prune_expired(cls) -> int:
+        """Delete expired keys; returns how many were deleted."""
+        deleted, _ = cls.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
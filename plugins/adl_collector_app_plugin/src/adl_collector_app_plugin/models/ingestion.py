@@ -0,0 +1,52 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .connection import ManualObservationConnection
+from .station_link import ManualObservationStationLink
+
+
+class IngestionOutboxEntry(models.Model):
+    """
+    Transactional outbox for ingestion triggers. A row is written in the same
+    transaction as the submission that needs ingesting, and turned into a
+    process_station_link_batch task by ingestion.drain_ingestion_outbox(), so a
+    trigger survives the broker being unavailable when the submission commits.
+
+    At most one undispatched row exists per station link: later submissions
+    for the link before the drain add nothing.
+    """
+    connection = models.ForeignKey(
+        ManualObservationConnection,
+        on_delete=models.CASCADE,
+        related_name="ingestion_outbox",
+    )
+    station_link = models.ForeignKey(
+        ManualObservationStationLink,
+        on_delete=models.CASCADE,
+        related_name="ingestion_outbox",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _("Ingestion Outbox Entry")
+        verbose_name_plural = _("Ingestion Outbox Entries")
+        indexes = [
+            models.Index(
+                fields=["connection", "id"],
+                name="collector_outbox_pending_idx",
+                condition=models.Q(dispatched_at__isnull=True),
+            ),
+            models.Index(fields=["dispatched_at"], name="collector_outbox_sent_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["station_link"],
+                name="uq_outbox_pending_per_link",
+                condition=models.Q(dispatched_at__isnull=True),
+            ),
+        ]
+    
+    def __str__(self):
+        state = f"dispatched {self.dispatched_at.isoformat()}" if self.dispatched_at else "pending"
+        return f"Ingestion trigger for station link {self.station_link_id} ({state})"
@@ -1,5 +1,7 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.utils.translation import gettext_lazy as _
 from modelcluster.fields import ParentalKey
 from wagtail.admin.panels import InlinePanel, FieldPanel
@@ -43,6 +45,13 @@ class ManualObservationStationLink(StationLink):
         verbose_name=_("Schedule"),
     )
     
+    # Unprocessed, non-test CollectorSubmissionRecord rows for this link that are
+    # not dead-lettered, kept current by CollectorSubmissionRecord.objects.bulk_create()
+    # and the plugin's after_save_records(), for the monitoring views. It is only a
+    # hint, never a reason to skip a link: sweeps probe the records themselves.
+    # refresh_pending_record_counts() recounts it hourly from celery beat.
+    pending_record_count = models.PositiveIntegerField(default=0, editable=False)
+    
     panels = StationLink.panels + [
         FieldPanel("start_date"),
         InlinePanel("variable_mappings", label=_("Variable Mappings")),
@@ -63,6 +72,40 @@ class ManualObservationStationLink(StationLink):
         Returns None if no start date is set.
         """
         return self.start_date
+    
+    @classmethod
+    def adjust_pending_record_count(cls, station_link_id, delta: int):
+        """Add delta (which may be negative) to a link's pending_record_count, never going below 0."""
+        if delta:
+            cls.objects.filter(pk=station_link_id).update(
+                pending_record_count=Greatest(F("pending_record_count") + delta, 0)
+            )
+    
+    @classmethod
+    def refresh_pending_record_counts(cls, queryset=None):
+        """
+        Recount pending_record_count from the records for every link in queryset
+        (all links if None), in a single UPDATE. Corrects any drift, e.g. from
+        records deleted in the admin.
+        """
+        from .submission import CollectorSubmissionRecord
+        
+        pending = (
+            CollectorSubmissionRecord.objects
+            .filter(
+                station_link=OuterRef("pk"),
+                is_processed=False,
+                is_dead_letter=False,
+                submission__is_test_submission=False,
+            )
+            .order_by()
+            .values("station_link")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        if queryset is None:
+            queryset = cls.objects.all()
+        return queryset.update(pending_record_count=Coalesce(Subquery(pending), 0))
 
 
 class ManualObservationStationLinkVariableMapping(Orderable):
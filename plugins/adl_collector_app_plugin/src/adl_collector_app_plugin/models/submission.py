@@ -1,7 +1,12 @@
+from collections import Counter, defaultdict
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connection, models
+from django.db.models import F, Q, Subquery, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
@@ -9,12 +14,71 @@ from wagtail.admin.panels import InlinePanel, FieldPanel
 from wagtail.models import Orderable
 from wagtail.snippets.models import register_snippet
 
+from ..panels import ArchivedRecordsPanel, SubmittedPayloadPanel
 from .station_link import (
     ManualObservationStationLink,
     ManualObservationStationLinkVariableMapping,
     ManualObservationStationLinkObserver,
 )
 
+SUBMISSION_DATA_FULL = "full"
+SUBMISSION_DATA_COMPACT = "compact"
+DEFAULT_SUBMISSION_DATA_STORAGE = SUBMISSION_DATA_FULL
+
+# Payload keys the submission row and its records already carry, in the order
+# CollectorSubmission.payload rebuilds them
+DERIVED_PAYLOAD_KEYS = (
+    "idempotency_key",
+    "submission_time",
+    "observation_time",
+    "station_link_id",
+    "is_test_submission",
+    "records",
+)
+# Lists the derived keys a compacted payload had; its presence marks compact data
+COMPACT_MARKER = "_derived"
+
+
+def get_submission_data_storage() -> str:
+    return getattr(settings, "ADL_COLLECTOR_SUBMISSION_DATA_STORAGE", DEFAULT_SUBMISSION_DATA_STORAGE)
+
+
+def _records_match(payload_records, records) -> bool:
+    """Whether the payload's records are exactly records, as (variable_mapping_id, value) pairs."""
+    if not isinstance(payload_records, list) or len(payload_records) != len(records):
+        return False
+    try:
+        return all(
+            set(raw) == {"variable_mapping_id", "value"}
+            and int(raw["variable_mapping_id"]) == vm_id
+            and float(raw["value"]) == float(value)
+            for raw, (vm_id, value) in zip(payload_records, records)
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+def compact_payload(payload, records):
+    """
+    The compact form of a submission payload: the keys that cannot be rebuilt
+    from the submission row, plus the COMPACT_MARKER list of derived keys that
+    were dropped. records are the submission's (variable_mapping_id, value)
+    pairs; "records" is dropped only if the payload's records match them and
+    carry nothing else. Payloads with nothing to drop are returned unchanged.
+    """
+    if not isinstance(payload, dict) or COMPACT_MARKER in payload:
+        return payload
+    
+    derived = [key for key in DERIVED_PAYLOAD_KEYS if key in payload]
+    if "records" in derived and not _records_match(payload["records"], records):
+        derived.remove("records")
+    if not derived:
+        return payload
+    
+    compact = {key: value for key, value in payload.items() if key not in derived}
+    compact[COMPACT_MARKER] = derived
+    return compact
+
 
 @register_snippet
 class CollectorSubmission(ClusterableModel):
@@ -60,7 +124,9 @@ class CollectorSubmission(ClusterableModel):
         FieldPanel("submission_time"),
         FieldPanel("observation_time"),
         FieldPanel("data"),
+        SubmittedPayloadPanel(heading=_("Submitted Payload")),
         InlinePanel("records", label=_("Processed Records")),
+        ArchivedRecordsPanel(heading=_("Archived Records")),
     ]
     
     class Meta:
@@ -86,6 +152,48 @@ class CollectorSubmission(ClusterableModel):
             who = "unknown"
         return f"Submission {self.id} by {who} at {self.submission_time.isoformat()}"
     
+    @classmethod
+    def stored_data(cls, payload, records):
+        """
+        What to store in data for a new submission's raw payload, under
+        ADL_COLLECTOR_SUBMISSION_DATA_STORAGE. records are the
+        (variable_mapping_id, value) pairs saved as its CollectorSubmissionRecords.
+        """
+        if get_submission_data_storage() == SUBMISSION_DATA_COMPACT:
+            return compact_payload(payload, records)
+        return payload
+    
+    @property
+    def is_compact(self):
+        return isinstance(self.data, dict) and COMPACT_MARKER in self.data
+    
+    @cached_property
+    def payload(self):
+        """
+        The payload as submitted, rebuilt from the row and its live and
+        archived records if data is compact. Datetimes come back as ISO 8601
+        in UTC and values as floats, as validated. Prefetch "records" and
+        "archived_records" when calling this for many submissions.
+        """
+        if not self.is_compact:
+            return self.data
+        
+        derived_values = {
+            "idempotency_key": lambda: self.idempotency_key,
+            "submission_time": lambda: self.submission_time.isoformat(),
+            "observation_time": lambda: self.observation_time.isoformat(),
+            "station_link_id": lambda: self.station_link_id,
+            "is_test_submission": lambda: self.is_test_submission,
+            "records": lambda: [
+                {"variable_mapping_id": record.variable_mapping_id, "value": record.value}
+                for record in sorted(self.all_records(), key=lambda record: record.pk)
+            ],
+        }
+        derived = self.data[COMPACT_MARKER]
+        payload = {key: derived_values[key]() for key in DERIVED_PAYLOAD_KEYS if key in derived}
+        payload.update((key, value) for key, value in self.data.items() if key != COMPACT_MARKER)
+        return payload
+    
     @property
     def submitter(self):
         """Returns the User who submitted, regardless of pathway."""
@@ -93,6 +201,13 @@ class CollectorSubmission(ClusterableModel):
             return self.observer.user
         return self.office_submitted_by
     
+    def all_records(self):
+        """
+        Live and archived records of this submission. Prefetch "records" and
+        "archived_records" when calling this for many submissions.
+        """
+        return [*self.records.all(), *self.archived_records.all()]
+    
     def clean(self):
         if self.observer_id is None and self.office_submitted_by_id is None:
             raise ValidationError("Either observer or office_submitted_by must be set.")
@@ -104,9 +219,230 @@ class CollectorSubmission(ClusterableModel):
             raise ValidationError("observation_time cannot be in the future.")
 
 
+class CollectorSubmissionRecordQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Fill the denormalized station_link from each record's submission, and
+        add the pending (unprocessed, not dead-lettered, non-test) records
+        created to their links' pending_record_count.
+        """
+        objs = list(objs)
+        pending_by_link = Counter()
+        for obj in objs:
+            if obj.station_link_id is None:
+                obj.station_link_id = obj.submission.station_link_id
+            if obj.is_pending and not obj.submission.is_test_submission:
+                pending_by_link[obj.station_link_id] += 1
+        
+        created = super().bulk_create(objs, *args, **kwargs)
+        
+        for station_link_id, count in pending_by_link.items():
+            ManualObservationStationLink.adjust_pending_record_count(station_link_id, count)
+        return created
+    
+    def mark_processed(self, ids, processed_at, batch_size=1000) -> int:
+        """
+        Mark the still-unprocessed records among ids as processed, settling the
+        ingestion attempt begin_attempts() counted, one bounded UPDATE per
+        batch_size ids so no single statement holds its locks for long.
+        Returns the number of rows changed.
+        """
+        ids = sorted(set(ids))
+        updated = 0
+        for i in range(0, len(ids), batch_size):
+            updated += (
+                self.filter(pk__in=ids[i:i + batch_size], is_processed=False)
+                .update(is_processed=True, processed_at=processed_at, ingest_attempts=0, next_attempt_at=None)
+            )
+        return updated
+    
+    def begin_attempts(self, attempts_by_id, attempted_at, max_attempts, retry_delay, batch_size=1000) -> set:
+        """
+        Count an ingestion attempt against each record as a sweep reads it, from
+        a {pk: ingest_attempts as read} mapping. Until mark_processed() settles
+        it, the record backs off until attempted_at + retry_delay(attempts), so
+        a sweep that dies before after_save_records() is retried later rather
+        than at once, and each such failure counts toward max_attempts.
+        Records that already used up max_attempts are dead-lettered instead,
+        taken off their links' pending_record_count, and stay out of every
+        sweep until requeued.
+
+        Only records still pending with the attempt count read are updated, so
+        sweeps racing over a record count one attempt. Runs one UPDATE per
+        distinct attempt count in each batch_size batch. Returns the ids of
+        the records that used up max_attempts, for the sweep to leave out.
+        """
+        items = sorted(attempts_by_id.items())
+        dead_letter_ids = set()
+        dead_by_link = Counter()
+        for i in range(0, len(items), batch_size):
+            ids_by_attempts = defaultdict(list)
+            for pk, attempts in items[i:i + batch_size]:
+                ids_by_attempts[attempts].append(pk)
+            
+            for attempts, pks in ids_by_attempts.items():
+                rows = self.model.objects.filter(
+                    pk__in=pks, ingest_attempts=attempts, is_processed=False, is_dead_letter=False
+                )
+                if attempts >= max_attempts:
+                    dead_letter_ids.update(pks)
+                    dead = list(rows.values_list("pk", "station_link_id"))
+                    dead_by_link.update(station_link_id for _, station_link_id in dead)
+                    self.model.objects.filter(pk__in=[pk for pk, _ in dead]).update(
+                        next_attempt_at=None, is_dead_letter=True
+                    )
+                else:
+                    rows.update(
+                        ingest_attempts=attempts + 1,
+                        next_attempt_at=attempted_at + retry_delay(attempts + 1),
+                    )
+        
+        for station_link_id, count in dead_by_link.items():
+            ManualObservationStationLink.adjust_pending_record_count(station_link_id, -count)
+        return dead_letter_ids
+    
+    def dead_letter_exhausted(self, ids, max_attempts, batch_size=1000) -> int:
+        """
+        Dead-letter the pending records among ids, whose attempt has failed, that
+        have used up max_attempts; the others keep backing off until the retry
+        begin_attempts() scheduled. Returns the number of records dead-lettered.
+        """
+        ids = sorted(set(ids))
+        dead_lettered = 0
+        for i in range(0, len(ids), batch_size):
+            dead_lettered += self.filter(
+                pk__in=ids[i:i + batch_size],
+                ingest_attempts__gte=max_attempts,
+                is_processed=False,
+                is_dead_letter=False,
+            ).update(next_attempt_at=None, is_dead_letter=True)
+        return dead_lettered
+    
+    def failed(self):
+        """
+        Unprocessed records that have failed ingestion at least once, dead-lettered
+        or backing off. A first attempt still in flight — read by a sweep that
+        has neither settled it nor outlived its back-off — is not a failure yet.
+        """
+        in_flight = Q(ingest_attempts=1, error_message="", next_attempt_at__gt=timezone.now())
+        return (
+            self.filter(is_processed=False)
+            .filter(Q(is_dead_letter=True) | Q(ingest_attempts__gt=0))
+            .exclude(in_flight & Q(is_dead_letter=False))
+        )
+    
+    def requeue(self) -> set:
+        """
+        Clear the retry state of the failed records in this queryset so the next
+        sweep picks them up again. Returns the ids of the station links touched;
+        their pending_record_count must be refreshed, as dead letters rejoin it.
+        """
+        failed = self.failed()
+        station_link_ids = set(failed.values_list("station_link_id", flat=True).distinct())
+        failed.update(ingest_attempts=0, next_attempt_at=None, is_dead_letter=False, error_message="")
+        return station_link_ids
+    
+    def supersede_stale_revisions(self, processed_at, batch_size=1000) -> Counter:
+        """
+        Resolve revisions in the database: among the non-test records in this
+        queryset, rank every (station link, observation time, ADL parameter) by
+        submission (submission_time, created_at, id) and then record id, newest
+        first, and mark the pending records that are not the latest revision as
+        processed, with an error_message saying so, so that no sweep reads them
+        again. Ranking by ADL parameter rather than variable mapping also
+        retires the extra values of a link that maps one parameter twice; the
+        highest record id wins, as it would in _fold_parcels().
+
+        Processed records take part in the ranking, so a late-arriving older
+        revision cannot overwrite a newer one already ingested. Only observation
+        times that still have pending records are ranked; dead letters are left
+        for an operator to requeue or discard.
+
+        Returns the number of records superseded per station link id.
+        """
+        records = self.filter(submission__is_test_submission=False)
+        pending_times = records.filter(is_processed=False, is_dead_letter=False).values(
+            "submission__observation_time"
+        )
+        
+        ranked = (
+            records
+            .filter(submission__observation_time__in=Subquery(pending_times))
+            .annotate(
+                revision=Window(
+                    RowNumber(),
+                    partition_by=[
+                        F("station_link_id"),
+                        F("submission__observation_time"),
+                        F("variable_mapping__adl_parameter_id"),
+                    ],
+                    order_by=[
+                        F("submission__submission_time").desc(),
+                        F("submission__created_at").desc(),
+                        F("submission_id").desc(),
+                        F("pk").desc(),
+                    ],
+                )
+            )
+            .filter(revision__gt=1)
+            .values_list("pk", "station_link_id", "is_processed", "is_dead_letter")
+        )
+        
+        superseded_by_link = Counter()
+        ids = []
+        for pk, station_link_id, is_processed, is_dead_letter in ranked:
+            if not is_processed and not is_dead_letter:
+                ids.append(pk)
+                superseded_by_link[station_link_id] += 1
+        
+        for i in range(0, len(ids), batch_size):
+            self.model.objects.filter(pk__in=ids[i:i + batch_size]).update(
+                is_processed=True,
+                processed_at=processed_at,
+                error_message="Superseded by a later revision.",
+            )
+        return superseded_by_link
+    
+    def set_error_messages(self, messages_by_id, batch_size=1000) -> None:
+        """
+        Write a per-record error_message from a {record pk: message} mapping.
+
+        On PostgreSQL each batch is one UPDATE ... FROM (VALUES ...) statement;
+        elsewhere the batch is applied with one UPDATE per distinct message.
+        """
+        items = sorted(messages_by_id.items())
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            if connection.vendor == "postgresql":
+                table = connection.ops.quote_name(self.model._meta.db_table)
+                values = ", ".join(["(%s::bigint, %s::text)"] * len(batch))
+                params = [param for pair in batch for param in pair]
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"UPDATE {table} AS r SET error_message = v.message "
+                        f"FROM (VALUES {values}) AS v(id, message) WHERE r.id = v.id",
+                        params,
+                    )
+            else:
+                ids_by_message = {}
+                for pk, message in batch:
+                    ids_by_message.setdefault(message, []).append(pk)
+                for message, pks in ids_by_message.items():
+                    self.filter(pk__in=pks).update(error_message=message)
+
+
 @register_snippet
 class CollectorSubmissionRecord(Orderable):
     submission = ParentalKey(CollectorSubmission, on_delete=models.CASCADE, related_name="records")
+    # Denormalized from submission.station_link so pending-work lookups need no join
+    station_link = models.ForeignKey(
+        ManualObservationStationLink,
+        on_delete=models.CASCADE,
+        related_name="submission_records",
+        null=True,
+        blank=True,
+        editable=False,
+    )
     variable_mapping = models.ForeignKey(ManualObservationStationLinkVariableMapping, on_delete=models.CASCADE)
     value = models.FloatField()
     
@@ -114,9 +450,23 @@ class CollectorSubmissionRecord(Orderable):
     processed_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(blank=True, default="")
     
+    # Retry state for values the core did not save (see after_save_records)
+    ingest_attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, editable=False)
+    is_dead_letter = models.BooleanField(default=False, editable=False)
+    
+    objects = CollectorSubmissionRecordQuerySet.as_manager()
+    
     class Meta:
         indexes = [
             models.Index(fields=["variable_mapping", "is_processed"]),
+            # Covers only the pending set, so it stays small however much
+            # processed history accumulates
+            models.Index(
+                fields=["station_link", "submission"],
+                name="collector_record_pending_idx",
+                condition=models.Q(is_processed=False),
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -124,3 +474,17 @@ class CollectorSubmissionRecord(Orderable):
                 name="unique_mapping_per_submission",
             ),
         ]
+    
+    def save(self, *args, **kwargs):
+        # Records added through the snippet admin bypass bulk_create()
+        adding = self._state.adding
+        if self.station_link_id is None and self.submission_id is not None:
+            self.station_link_id = self.submission.station_link_id
+        super().save(*args, **kwargs)
+        if adding and self.is_pending and not self.submission.is_test_submission:
+            ManualObservationStationLink.adjust_pending_record_count(self.station_link_id, 1)
+    
+    @property
+    def is_pending(self):
+        """Still to be ingested: counted in the link's pending_record_count."""
+        return not self.is_processed and not self.is_dead_letter
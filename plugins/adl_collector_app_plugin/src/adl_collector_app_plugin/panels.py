@@ -0,0 +1,43 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from wagtail.admin.panels import Panel
+
+
+class ArchivedRecordsPanel(Panel):
+    """
+    Read-only list of a submission's archived records, which
+    InlinePanel("records") cannot show: they left the live table when
+    archive.archive_processed_records() moved them.
+    """
+    
+    class BoundPanel(Panel.BoundPanel):
+        template_name = "adl_collector_app_plugin/panels/archived_records.html"
+        
+        def is_shown(self):
+            return bool(self.instance.pk) and self.instance.archived_records.exists()
+        
+        def get_context_data(self, parent_context=None):
+            context = super().get_context_data(parent_context)
+            context["archived_records"] = (
+                self.instance.archived_records.select_related("variable_mapping").order_by("pk")
+            )
+            return context
+
+
+class SubmittedPayloadPanel(Panel):
+    """
+    Read-only view of a compact submission's payload as submitted, rebuilt by
+    CollectorSubmission.payload; its data field holds only the remainder.
+    """
+    
+    class BoundPanel(Panel.BoundPanel):
+        template_name = "adl_collector_app_plugin/panels/submitted_payload.html"
+        
+        def is_shown(self):
+            return bool(self.instance.pk) and self.instance.is_compact
+        
+        def get_context_data(self, parent_context=None):
+            context = super().get_context_data(parent_context)
+            context["payload"] = json.dumps(self.instance.payload, indent=2, cls=DjangoJSONEncoder)
+            return context
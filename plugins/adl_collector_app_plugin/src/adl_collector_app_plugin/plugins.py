@@ -1,19 +1,20 @@
-import datetime
 import logging
 from collections import defaultdict
-from typing import List, Any
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
-from adl.core.models import DataParameter
 from adl.core.registries import Plugin
+from django.db.models import Exists, OuterRef, Q
 from django.urls import path, include
 from django.utils import timezone as dj_timezone
 
+from .ingestion import get_max_attempts, retry_delay
 from .views import field_pwa, field_service_worker
 
 from .models import (
     CollectorSubmissionRecord,
     ManualObservationStationLink,
-    ManualObservationStationLinkVariableMapping,
 )
 
 logger = logging.getLogger(__name__)
@@ -23,6 +24,12 @@ class ADLCollectorPlugin(Plugin):
     type = "adl_collector_app_plugin"
     label = "ADL Collector App Plugin"
     
+    # Parcels per chunk yielded by iter_station_data(), and rows per keyset page.
+    station_data_chunk_size = 500
+    station_data_page_size = 2000
+    # Record ids per UPDATE in after_save_records()
+    processed_marking_batch_size = 1000
+    
     def get_urls(self):
         return [
             path("api/adl-collector/", include('adl_collector_app_plugin.urls', namespace="adl_collector_app")),
@@ -39,87 +46,388 @@ class ADLCollectorPlugin(Plugin):
     ) -> None:
         """
         Called by the core after each chunk of ObservationRecords is upserted.
-        Marks all CollectorSubmissionRecord rows whose submission_id appears in
-        this chunk as processed.
+
+        Marks as processed the CollectorSubmissionRecord rows behind the chunk's
+        parcels, found again by query on (observation time, parameter) — every
+        pending record of the link behind a parcel value, including several
+        mapped to the same ADL parameter. Values the core saved, and values it
+        skipped (e.g. unchanged ones, which leave saved_records empty), need no
+        retry.
+
+        Marking a record processed settles the ingestion attempt counted when
+        the sweep read it. Values the core rejected in qc_fail_results, and did
+        not save anyway, are left unsettled: they back off as scheduled at the
+        read, and are dead-lettered once they have used up
+        ADL_COLLECTOR_INGEST_MAX_ATTEMPTS, so a few bad rows are not resent on
+        every sweep. Each rejection's message is written to its records'
+        error_message. Updates run in batches of processed_marking_batch_size ids.
         """
         if not station_records:
             return
         
-        submission_ids = {
-            rec["submission_id"]
-            for rec in station_records
-            if rec.get("submission_id") is not None
-        }
-        if not submission_ids:
+        record_ids_by_key = _parcel_record_ids(station_link, station_records)
+        if not record_ids_by_key:
             return
         
-        now = dj_timezone.now()
-        updated_count = (
-            CollectorSubmissionRecord.objects
-            .filter(submission_id__in=submission_ids, is_processed=False)
-            .update(is_processed=True, processed_at=now)
+        rejections = _qc_failure_messages(qc_fail_results)
+        saved_keys = {_observation_key(rec) for rec in saved_records or []}
+        
+        processed_ids = []
+        failed_ids = []
+        error_messages = {}
+        for key, record_ids in record_ids_by_key.items():
+            if key in rejections and key not in saved_keys:
+                failed_ids.extend(record_ids)
+            else:
+                processed_ids.extend(record_ids)
+            if key in rejections:
+                error_messages.update(dict.fromkeys(record_ids, rejections[key]))
+        
+        batch_size = self.processed_marking_batch_size
+        if error_messages:
+            CollectorSubmissionRecord.objects.set_error_messages(error_messages, batch_size=batch_size)
+        
+        updated_count = CollectorSubmissionRecord.objects.mark_processed(
+            processed_ids, dj_timezone.now(), batch_size=batch_size
+        )
+        dead_lettered = CollectorSubmissionRecord.objects.dead_letter_exhausted(
+            failed_ids, get_max_attempts(), batch_size=batch_size
         )
+        ManualObservationStationLink.adjust_pending_record_count(station_link.pk, -(updated_count + dead_lettered))
         
+        if dead_lettered:
+            logger.warning(
+                "ADLCollectorPlugin.after_save_records: dead-lettered %d CollectorSubmissionRecord value(s) "
+                "for station_link pk=%s after repeated ingestion failures",
+                dead_lettered, station_link.pk,
+            )
         logger.debug(
-            "ADLCollectorPlugin.after_save_records: marked %d CollectorSubmissionRecord "
-            "row(s) as processed for station_link pk=%s (submission_ids=%s)",
-            updated_count, station_link.pk, submission_ids,
+            "ADLCollectorPlugin.after_save_records: marked %d of %d CollectorSubmissionRecord "
+            "value(s) as processed for station_link pk=%s (%d QC failure(s), %d retrying)",
+            updated_count, len(record_ids_by_key), station_link.pk, len(error_messages),
+            len(failed_ids) - dead_lettered,
         )
     
-    def get_station_data(self, station_link: ManualObservationStationLink, start_date=None, end_date=None):
+    def get_station_data(
+            self,
+            station_link: ManualObservationStationLink,
+            start_date=None,
+            end_date=None,
+    ) -> Iterator[dict]:
         """
-        Return a list[dict] where each dict is:
+        Yield dicts of the form:
           {
             "observation_time": <datetime>,
             "<adl_parameter_id>": <value>, ...
           }
 
         Source: unprocessed CollectorSubmissionRecord rows associated with this station_link,
-        grouped by submission.observation_time.
+        grouped by submission.observation_time. A generator over iter_station_data(), so no
+        model instances are created and at most one chunk of parcels is held in memory;
+        callers that can consume chunks should use that directly.
+        """
+        count = 0
+        for chunk in self.iter_station_data(station_link, start_date=start_date, end_date=end_date):
+            count += len(chunk)
+            yield from chunk
+        
+        logger.debug(
+            "ManualObservationPlugin.get_station_data: link=%s start=%s end=%s -> %d records",
+            station_link.id, start_date, end_date, count
+        )
+    
+    def iter_station_data(
+            self,
+            station_link: ManualObservationStationLink,
+            start_date=None,
+            end_date=None,
+            chunk_size: Optional[int] = None,
+    ) -> Iterator[List[dict]]:
+        """
+        Streaming form of get_station_data(): yields lists of at most chunk_size
+        parcels, in observation_time order, so the core can upsert chunk by chunk.
+
+        start_date/end_date bound submission.observation_time in SQL. Rows are
+        read as narrow tuples, one keyset page on (observation_time, pk) at a
+        time, and folded into parcels as they arrive. Because they are ordered by
+        observation_time, a parcel is complete as soon as the time changes, so at
+        most one chunk is held in memory regardless of how large the backlog is.
+
+        Every sweep starts from the beginning: records a sweep did not get to,
+        or that arrived late with an earlier observation_time, are still
+        unprocessed and are read by the next one. Each record read counts an
+        ingestion attempt (see _begin_attempts()), so one whose sweep dies
+        before after_save_records() backs off and is eventually dead-lettered.
         """
+        chunk_size = chunk_size or self.station_data_chunk_size
+        
+        # Cheap answer to "anything to ingest?" for the common idle case: one
+        # EXISTS probe on the partial pending index. pending_record_count is not
+        # trusted here, as a count that drifted low would hold records back until
+        # the next hourly recount.
+        if not _pending_records(start_date, end_date).filter(station_link=station_link).exists():
+            return
+        
+        _supersede_stale_revisions([station_link.pk])
         
-        # Pull unprocessed and not-testing rows for this link
         qs = (
-            CollectorSubmissionRecord.objects
-            .select_related(
-                "submission",
-                "submission__station_link",
-                "variable_mapping__adl_parameter",
-                "variable_mapping__obs_parameter_unit",
-            )
-            .filter(
-                submission__station_link=station_link,
-                submission__is_test_submission=False,
-                is_processed=False,
-            )
+            _pending_records(start_date, end_date)
+            .filter(station_link=station_link)
             .order_by("submission__observation_time", "pk")
+            .values_list(*_PARCEL_ROW_FIELDS)
+        )
+        
+        chunk: List[dict] = []
+        rows = _iter_keyset(qs, self.station_data_page_size)
+        for parcel in _fold_parcels(_begin_attempts(rows, self.station_data_page_size)):
+            chunk.append(parcel)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        
+        if chunk:
+            yield chunk
+    
+    def get_station_data_batch(
+            self,
+            station_links: Iterable[Any],
+            start_date=None,
+            end_date=None,
+    ) -> Dict[int, List[dict]]:
+        """
+        Parcels for many station links at once, as {station_link_id: [parcel, ...]},
+        for the core's process_station_link_batch(). station_links may be
+        instances or ids; links with nothing pending map to [].
+
+        Costs two queries whatever the number of links: one to pick the links
+        with a due pending record (an EXISTS per link on the partial pending
+        index), and one to read all of their pending rows, ordered by link and
+        then as in iter_station_data(), and partitioned by link as they stream
+        in. The parcels themselves are identical to get_station_data()'s.
+        """
+        link_ids = [getattr(sl, "pk", sl) for sl in station_links]
+        result: Dict[int, List[dict]] = {link_id: [] for link_id in link_ids}
+        
+        pending_link_ids = list(
+            ManualObservationStationLink.objects
+            .filter(pk__in=link_ids)
+            .filter(Exists(_pending_records(start_date, end_date).filter(station_link=OuterRef("pk"))))
+            .values_list("pk", flat=True)
         )
+        if not pending_link_ids:
+            return result
+        
+        _supersede_stale_revisions(pending_link_ids)
+        
+        rows = (
+            _pending_records(start_date, end_date)
+            .filter(station_link_id__in=pending_link_ids)
+            # station_link_id, not station_link: ordering by the relation
+            # would expand to StationLink's Meta.ordering and break groupby()
+            .order_by("station_link_id", "submission__observation_time", "pk")
+            .values_list(*_PARCEL_ROW_FIELDS, "station_link_id")
+            .iterator(chunk_size=self.station_data_page_size)
+        )
+        
+        rows = _begin_attempts(rows, self.station_data_page_size)
+        for link_id, link_rows in groupby(rows, key=itemgetter(-1)):
+            result[link_id].extend(_fold_parcels(link_rows))
         
-        # Group by observation_time → {str(param_id): value}
-        grouped: dict[datetime.datetime, dict] = defaultdict(dict)
-        
-        for rec in qs:
-            sub = rec.submission
-            vm: ManualObservationStationLinkVariableMapping = rec.variable_mapping
-            param: DataParameter = vm.adl_parameter
-            
-            t = sub.observation_time
-            parcel = grouped[t]
-            # ensure observation_time present
-            if "observation_time" not in parcel:
-                parcel["observation_time"] = t
-            
-            if "submission_id" not in parcel:
-                parcel["submission_id"] = sub.id
-            
-            # keys as strings
-            parcel[str(param.id)] = rec.value
-        
-        # Return a list
-        records = list(grouped.values())
         logger.debug(
-            "ManualObservationPlugin.get_station_data: link=%s start=%s end=%s -> %d records",
-            station_link.id, start_date, end_date, len(records)
+            "ADLCollectorPlugin.get_station_data_batch: %d link(s), %d with pending records",
+            len(link_ids), len(pending_link_ids),
+        )
+        return result
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+# Columns read for each pending record; the order is what _fold_parcels(),
+# _begin_attempts() and _iter_keyset() unpack.
+_PARCEL_ROW_FIELDS = (
+    "pk",
+    "submission_id",
+    "submission__observation_time",
+    "variable_mapping__adl_parameter_id",
+    "value",
+    "ingest_attempts",
+)
+
+
+def _pending_records(start_date=None, end_date=None):
+    """
+    Unprocessed, non-test records that are due — neither backing off after a
+    failed attempt nor dead-lettered — optionally bounded by observation time.
+    """
+    qs = CollectorSubmissionRecord.objects.filter(
+        Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=dj_timezone.now()),
+        submission__is_test_submission=False,
+        is_processed=False,
+        is_dead_letter=False,
+    )
+    if start_date is not None:
+        qs = qs.filter(submission__observation_time__gte=start_date)
+    if end_date is not None:
+        qs = qs.filter(submission__observation_time__lte=end_date)
+    return qs
+
+
+def _supersede_stale_revisions(station_link_ids):
+    """
+    Retire pending records that a later revision replaces, before a sweep
+    reads them, keeping the links' pending counters in step.
+    """
+    superseded = (
+        CollectorSubmissionRecord.objects
+        .filter(station_link_id__in=station_link_ids)
+        .supersede_stale_revisions(dj_timezone.now())
+    )
+    for station_link_id, count in superseded.items():
+        ManualObservationStationLink.adjust_pending_record_count(station_link_id, -count)
+    if superseded:
+        logger.debug(
+            "ADLCollectorPlugin: superseded %d stale revision record(s) across %d station link(s)",
+            sum(superseded.values()), len(superseded),
+        )
+
+
+def _begin_attempts(rows, page_size):
+    """
+    Pass on _PARCEL_ROW_FIELDS rows page_size at a time, after counting an
+    ingestion attempt against the records of each page with
+    CollectorSubmissionRecord.objects.begin_attempts(). Records that have used
+    up their attempts are dead-lettered there and left out.
+    """
+    rows = iter(rows)
+    max_attempts = get_max_attempts()
+    while True:
+        page = list(islice(rows, page_size))
+        if not page:
+            return
+        exhausted = CollectorSubmissionRecord.objects.begin_attempts(
+            {row[0]: row[5] for row in page}, dj_timezone.now(), max_attempts, retry_delay
+        )
+        if exhausted:
+            logger.warning(
+                "ADLCollectorPlugin: dead-lettered %d CollectorSubmissionRecord value(s) "
+                "after %d ingestion attempts",
+                len(exhausted), max_attempts,
+            )
+        yield from (row for row in page if row[0] not in exhausted)
+
+
+def _fold_parcels(rows):
+    """
+    Fold _PARCEL_ROW_FIELDS rows, ordered by observation time, into parcels,
+    yielding each one as soon as the next one starts. Columns after "value"
+    are ignored.
+
+    Stale revisions have been retired in SQL beforehand, so each parameter of a
+    parcel normally comes from one record; if several remain, the last one read
+    supplies the value. A parcel can combine records of several submissions
+    (each supplying different parameters); its "submission_id" is then the
+    highest of them, which bounds the records after_save_records() marks.
+    """
+    parcel = None
+    for pk, submission_id, observation_time, param_id, value, *_ in rows:
+        if parcel is None or parcel["observation_time"] != observation_time:
+            if parcel is not None:
+                yield parcel
+            parcel = {"observation_time": observation_time, "submission_id": submission_id}
+        
+        parcel["submission_id"] = max(parcel["submission_id"], submission_id)
+        # keys as strings
+        parcel[str(param_id)] = value
+    
+    if parcel is not None:
+        yield parcel
+
+
+def _parcel_record_ids(station_link, parcels) -> dict:
+    """
+    {(observation_time, str(param_id)): [record pk, ...]} for the pending
+    records behind the values of parcels read from station_link.
+
+    Matched by query rather than remembered from the read, so it holds across
+    worker processes: every pending record at a parcel's observation time with
+    one of its parameters, from a submission no later than the parcel's
+    "submission_id". Records of later submissions arrived after the read and
+    stay pending for the next sweep.
+    """
+    parcels_by_time = {parcel["observation_time"]: parcel for parcel in parcels}
+    rows = (
+        CollectorSubmissionRecord.objects
+        .filter(
+            station_link=station_link,
+            submission__is_test_submission=False,
+            submission__observation_time__in=list(parcels_by_time),
+            is_processed=False,
+            is_dead_letter=False,
         )
+        .values_list("pk", "submission_id", "submission__observation_time", "variable_mapping__adl_parameter_id")
+    )
+    
+    record_ids = defaultdict(list)
+    for pk, submission_id, observation_time, param_id in rows:
+        parcel = parcels_by_time[observation_time]
+        if str(param_id) not in parcel or submission_id > parcel.get("submission_id", submission_id):
+            continue
+        record_ids[(observation_time, str(param_id))].append(pk)
+    return dict(record_ids)
+
+
+def _observation_key(record):
+    """
+    (time, str(parameter_id)) for an ObservationRecord the core saved or a QC
+    result it reported, as an instance or a dict with those fields, or None
+    if it has neither. Values whose key cannot be read are never counted as
+    failed.
+    """
+    if isinstance(record, dict):
+        time, param_id = record.get("time"), record.get("parameter_id")
+    else:
+        time, param_id = getattr(record, "time", None), getattr(record, "parameter_id", None)
+    
+    if time is None or param_id is None:
+        return None
+    return time, str(param_id)
+
+
+def _qc_failure_messages(qc_fail_results) -> dict:
+    """Map each QC failure in qc_fail_results to its message, keyed like _observation_key()."""
+    messages = {}
+    for result in qc_fail_results or []:
+        key = _observation_key(result)
+        if key is None:
+            continue
+        if isinstance(result, dict):
+            message = result.get("message") or result.get("reason") or result.get("error")
+        else:
+            message = getattr(result, "message", None) or getattr(result, "reason", None)
+        messages[key] = str(message or result)
+    return messages
+
+
+def _iter_keyset(qs, page_size):
+    """
+    Iterate a values_list() queryset ordered by (submission__observation_time, pk),
+    whose first column is pk and third is observation_time, one page at a time.
+    """
+    after = None
+    while True:
+        page_qs = qs
+        if after is not None:
+            after_time, after_pk = after
+            page_qs = qs.filter(
+                Q(submission__observation_time__gt=after_time)
+                | Q(submission__observation_time=after_time, pk__gt=after_pk)
+            )
         
-        return records
+        page = list(page_qs[:page_size])
+        yield from page
+        
+        if len(page) < page_size:
+            return
+        after = (page[-1][2], page[-1][0])
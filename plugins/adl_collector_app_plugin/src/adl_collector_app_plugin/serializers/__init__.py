@@ -6,10 +6,17 @@ from .base import (  # noqa: F401
     ManualObservationStationLinkVariableMappingSerializer,
     ObserverStationLinkDetailSerializer,
 )
-from .submission import SubmissionRecordInSer, SubmissionInSer  # noqa: F401
+from .submission import (  # noqa: F401
+    SubmissionRecordInSer,
+    SubmissionInSer,
+    BulkSubmissionItemInSer,
+    BulkSubmissionInSer,
+    SubmissionHistoryQuerySer,
+)
 from .office import OfficeSubmissionRecordInSer, OfficeSubmissionInSer  # noqa: F401
 from .synop import (  # noqa: F401
     SynopParameterMappingSerializer,
     SynopDecodeInSer,
     SynopSubmitInSer,
+    SynopBulletinInSer,
 )
@@ -76,7 +76,10 @@ class OfficeSubmissionInSer(serializers.Serializer):
             office_submitted_by=staff_user,
             submission_time=now,
             observation_time=obs_time,
-            data=self.initial_data,
+            data=CollectorSubmission.stored_data(
+                self.initial_data,
+                [(r["variable_mapping_id"], r["value"]) for r in validated["records"]],
+            ),
             idempotency_key="",
             content_hash=chash,
         )
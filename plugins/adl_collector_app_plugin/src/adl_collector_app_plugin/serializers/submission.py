@@ -1,13 +1,18 @@
+import base64
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.utils import timezone as dj_timezone
 from rest_framework import serializers
 
 from .base import AwareDateTimeField
+from ..authz import get_observer_authz
 from ..models import (
     ManualObservationStationLink,
-    ManualObservationStationLinkVariableMapping,
-    ManualObservationStationLinkObserver,
     CollectorSubmission,
     CollectorSubmissionRecord,
+    SubmissionIdempotencyKey,
 )
 from ..utils import compute_submission_hash
 
@@ -27,62 +32,39 @@ class SubmissionInSer(serializers.Serializer):
     meta = serializers.DictField(required=False)
 
     def validate(self, data):
-        request = self.context["request"]
-        user = request.user
-
-        try:
-            sl: ManualObservationStationLink = ManualObservationStationLink.objects.get(pk=data["station_link_id"])
-        except ManualObservationStationLink.DoesNotExist:
+        user = self.context["request"].user
+        
+        # Served from the cached authorization map; the database is only
+        # consulted to word the error for a link the user does not observe
+        grant = get_observer_authz(user).get(data["station_link_id"])
+        if grant is None and not ManualObservationStationLink.objects.filter(pk=data["station_link_id"]).exists():
             raise serializers.ValidationError("Invalid station_link_id.")
-
-        try:
-            observer = ManualObservationStationLinkObserver.objects.select_related("station_link").get(
-                station_link_id=sl.id, user=user, enabled=True
-            )
-        except ManualObservationStationLinkObserver.DoesNotExist:
-            raise serializers.ValidationError("User is not an enabled observer for this station link.")
-
-        submission_time = data["submission_time"]
-
-        if submission_time > dj_timezone.now():
-            raise serializers.ValidationError("submission_time cannot be in the future.")
-
-        # All variable mappings must belong to this station link and be direct-entry eligible
-        ids = [r["variable_mapping_id"] for r in data["records"]]
-        vmaps = list(
-            ManualObservationStationLinkVariableMapping.objects.select_related(
-                "station_link", "adl_parameter", "obs_parameter_unit"
-            ).filter(id__in=ids, station_link_id=sl.id, show_in_direct_entry=True)
-        )
-        if len(vmaps) != len(ids):
-            raise serializers.ValidationError(
-                "One or more variable_mapping_id values are invalid or not available for direct entry.")
-
-        data["_station_link"] = sl
-        data["_observer"] = observer
-        data["_vmaps_by_id"] = {vm.id: vm for vm in vmaps}
+        
+        error = _check_submission(data, grant, dj_timezone.now())
+        if error:
+            raise serializers.ValidationError(error)
+        
+        data["_grant"] = grant
         return data
 
     def create(self, validated):
-        sl = validated["_station_link"]
-        observer = validated["_observer"]
-        payload = self.initial_data
         meta = validated.get("meta") or {}
 
-        chash = compute_submission_hash(
-            station_link_id=sl.id,
+        # The view passes the hash it already computed for its duplicate check
+        chash = validated.get("content_hash") or compute_submission_hash(
+            station_link_id=validated["station_link_id"],
             observation_time=validated["observation_time"],
             records=validated["records"],
             meta=meta,
         )
 
         sub = CollectorSubmission.objects.create(
-            station_link=sl,
-            observer=observer,
+            station_link_id=validated["station_link_id"],
+            observer_id=validated["_grant"]["observer_id"],
             submission_time=validated["submission_time"],
             observation_time=validated["observation_time"],
             is_test_submission=validated["is_test_submission"],
-            data=payload,
+            data=CollectorSubmission.stored_data(self.initial_data, _record_pairs(validated["records"])),
             idempotency_key=validated.get("idempotency_key", ""),
             content_hash=chash,
         )
@@ -90,10 +72,283 @@ class SubmissionInSer(serializers.Serializer):
         recs = [
             CollectorSubmissionRecord(
                 submission=sub,
-                variable_mapping=validated["_vmaps_by_id"][r["variable_mapping_id"]],
+                variable_mapping_id=r["variable_mapping_id"],
                 value=r["value"],
             )
             for r in validated["records"]
         ]
         CollectorSubmissionRecord.objects.bulk_create(recs)
         return sub
+
+
+def _record_pairs(records):
+    return [(r["variable_mapping_id"], r["value"]) for r in records]
+
+
+def _check_submission(data, grant, now):
+    """
+    The per-submission checks shared by SubmissionInSer and BulkSubmissionInSer,
+    against the user's authorization map entry for the station link (None if
+    they are not an observer of it). Returns an error message or None.
+    """
+    if grant is None or not grant["observer_enabled"]:
+        return "User is not an enabled observer for this station link."
+    
+    if data["submission_time"] > now:
+        return "submission_time cannot be in the future."
+    
+    # All variable mappings must belong to this station link and be direct-entry eligible
+    ids = [r["variable_mapping_id"] for r in data["records"]]
+    if len(set(ids)) != len(ids) or not grant["direct_entry_vm_ids"].issuperset(ids):
+        return "One or more variable_mapping_id values are invalid or not available for direct entry."
+    return None
+
+
+# Upper bound on items per bulk request, i.e. per offline-queue flush
+BULK_SUBMISSION_MAX_ITEMS = 200
+
+
+class BulkSubmissionItemInSer(SubmissionInSer):
+    """
+    One item of a bulk submission: field validation only. The database checks
+    of SubmissionInSer.validate() run once for the whole batch in BulkSubmissionInSer.
+    """
+    
+    def validate(self, data):
+        return data
+
+
+class BulkSubmissionInSer(serializers.Serializer):
+    """
+    A batch of SubmissionInSer payloads, e.g. a flush of the PWA's offline queue.
+
+    Items are validated independently, so a bad item does not reject the batch.
+    save() returns one result per item, in request order: "accepted" (with
+    "idempotent" set for a duplicate of a stored submission or of an earlier
+    item) or "rejected" with "errors". An item whose idempotency_key was seen
+    before gets its original result back without being validated. Stored keys
+    are looked up in one query, station links, observers and variable
+    mappings come from the cached authorization map, and duplicates are
+    looked up in one query; new submissions and records are written with one
+    bulk insert each.
+    """
+    submissions = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=BULK_SUBMISSION_MAX_ITEMS,
+    )
+    
+    def validate(self, data):
+        user = self.context["request"].user
+        
+        stored = SubmissionIdempotencyKey.lookup(user, [raw.get("idempotency_key") for raw in data["submissions"]])
+        
+        items = []
+        for raw in data["submissions"]:
+            key = raw.get("idempotency_key")
+            if isinstance(key, str) and key in stored:
+                items.append({"raw": raw, "data": None, "errors": None, "replay": stored[key][1]})
+                continue
+            item_ser = BulkSubmissionItemInSer(data=raw, context=self.context)
+            if item_ser.is_valid():
+                items.append({"raw": raw, "data": item_ser.validated_data, "errors": None, "replay": None})
+            else:
+                items.append({"raw": raw, "data": None, "errors": item_ser.errors, "replay": None})
+        
+        valid = [item for item in items if item["data"] is not None]
+        
+        authz = get_observer_authz(user)
+        unknown_link_ids = {item["data"]["station_link_id"] for item in valid} - authz.keys()
+        if unknown_link_ids:
+            # Only to word the errors: an invalid link vs one the user does not observe
+            unknown_link_ids -= set(
+                ManualObservationStationLink.objects.filter(pk__in=unknown_link_ids).values_list("pk", flat=True)
+            )
+        
+        now = dj_timezone.now()
+        for item in valid:
+            item_data = item["data"]
+            if item_data["station_link_id"] in unknown_link_ids:
+                item["errors"] = {"non_field_errors": ["Invalid station_link_id."]}
+                continue
+            grant = authz.get(item_data["station_link_id"])
+            error = _check_submission(item_data, grant, now)
+            if error:
+                item["errors"] = {"non_field_errors": [error]}
+            else:
+                item_data["_grant"] = grant
+        
+        data["_items"] = items
+        return data
+    
+    def create(self, validated):
+        try:
+            with transaction.atomic():
+                return self._create(validated["_items"])
+        except IntegrityError:
+            # A concurrent request stored one of these submissions first; on the
+            # second pass the duplicate lookup finds it.
+            with transaction.atomic():
+                return self._create(validated["_items"])
+    
+    def _create(self, items):
+        from ..ingestion import enqueue_ingestion
+        
+        keyed = []
+        for item in items:
+            if item["data"] is None or item["errors"] is not None:
+                continue
+            data = item["data"]
+            chash = compute_submission_hash(
+                station_link_id=data["station_link_id"],
+                observation_time=data["observation_time"],
+                records=data["records"],
+                meta=data.get("meta") or {},
+            )
+            keyed.append((item, (data["_grant"]["observer_id"], data["observation_time"], chash)))
+        
+        existing = {}
+        if keyed:
+            for sub in CollectorSubmission.objects.filter(
+                    observer_id__in={key[0] for _, key in keyed},
+                    content_hash__in={key[2] for _, key in keyed},
+            ):
+                existing[(sub.observer_id, sub.observation_time, sub.content_hash)] = sub
+        
+        # The first item with a given key creates the submission; later ones are duplicates of it
+        new_subs = {}
+        creators = {}
+        for item, key in keyed:
+            if key in existing or key in new_subs:
+                continue
+            creators[key] = item
+            data = item["data"]
+            new_subs[key] = CollectorSubmission(
+                station_link_id=data["station_link_id"],
+                observer_id=data["_grant"]["observer_id"],
+                submission_time=data["submission_time"],
+                observation_time=data["observation_time"],
+                is_test_submission=data["is_test_submission"],
+                data=CollectorSubmission.stored_data(item["raw"], _record_pairs(data["records"])),
+                idempotency_key=data.get("idempotency_key", ""),
+                content_hash=key[2],
+            )
+        
+        # bulk_create() skips post_save, so ingestion is queued explicitly below
+        CollectorSubmission.objects.bulk_create(new_subs.values())
+        CollectorSubmissionRecord.objects.bulk_create([
+            CollectorSubmissionRecord(submission=sub, variable_mapping_id=r["variable_mapping_id"], value=r["value"])
+            for key, sub in new_subs.items()
+            for r in creators[key]["data"]["records"]
+        ])
+        enqueue_ingestion(
+            (creators[key]["data"]["_grant"]["network_connection_id"], sub.station_link_id)
+            for key, sub in new_subs.items()
+            if not sub.is_test_submission
+        )
+        
+        results = []
+        new_keys = []
+        keys_by_item = {id(item): key for item, key in keyed}
+        for item in items:
+            if item["replay"] is not None:
+                results.append(item["replay"])
+                continue
+            if item["errors"] is not None:
+                results.append({"status": "rejected", "errors": item["errors"]})
+                continue
+            key = keys_by_item[id(item)]
+            sub = existing.get(key) or new_subs[key]
+            created = creators.get(key) is item
+            result = {
+                "station_link_id": sub.station_link_id,
+                "status": "accepted",
+                "idempotent": not created,
+                "id": sub.pk,
+                "observation_time": sub.observation_time,
+                "is_test_submission": sub.is_test_submission,
+            }
+            results.append(result)
+            if item["data"].get("idempotency_key"):
+                new_keys.append(SubmissionIdempotencyKey(
+                    user=self.context["request"].user,
+                    key=item["data"]["idempotency_key"],
+                    submission=sub,
+                    response_status=201 if created else 200,
+                    response_body=result,
+                ))
+        
+        SubmissionIdempotencyKey.objects.bulk_create(new_keys, ignore_conflicts=True)
+        return results
+
+
+# Upper bound on submissions per history page
+SUBMISSION_HISTORY_MAX_LIMIT = 500
+
+
+def encode_history_cursor(observation_time, pk) -> str:
+    """Opaque cursor resuming a history listing after the (observation_time, pk) key."""
+    return base64.urlsafe_b64encode(f"{observation_time.isoformat()},{pk}".encode()).decode()
+
+
+def decode_history_cursor(cursor):
+    """(observation_time, pk) of an encode_history_cursor() cursor; raises ValueError or UnicodeDecodeError."""
+    observation_time, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit(",", 1)
+    observation_time = datetime.datetime.fromisoformat(observation_time)
+    if observation_time.tzinfo is None:
+        raise ValueError("Cursor time is not timezone-aware")
+    return observation_time, int(pk)
+
+
+class SubmissionHistoryQuerySer(serializers.Serializer):
+    """
+    Query parameters of the observer submission history: one station link,
+    an optional observation_time range [start, end), and the cursor of the
+    previous page.
+    """
+    station_link_id = serializers.IntegerField()
+    start = AwareDateTimeField(required=False)
+    end = AwareDateTimeField(required=False)
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, default=100, min_value=1, max_value=SUBMISSION_HISTORY_MAX_LIMIT)
+    
+    def validate_cursor(self, value):
+        try:
+            return decode_history_cursor(value)
+        except (ValueError, UnicodeDecodeError):
+            raise serializers.ValidationError("Invalid cursor.")
+    
+    def validate(self, data):
+        grant = get_observer_authz(self.context["request"].user).get(data["station_link_id"])
+        if grant is None:
+            raise serializers.ValidationError("User is not an observer for this station link.")
+        data["_observer_id"] = grant["observer_id"]
+        return data
+    
+    def get_page(self):
+        """
+        (submissions, next cursor or None) of the caller's submissions to the
+        station link, in (observation_time, id) order. Reads narrow rows
+        through the (station_link, observation_time) index, one extra row to
+        tell whether another page follows.
+        """
+        data = self.validated_data
+        qs = CollectorSubmission.objects.filter(station_link_id=data["station_link_id"], observer_id=data["_observer_id"])
+        if "start" in data:
+            qs = qs.filter(observation_time__gte=data["start"])
+        if "end" in data:
+            qs = qs.filter(observation_time__lt=data["end"])
+        if "cursor" in data:
+            after_time, after_pk = data["cursor"]
+            qs = qs.filter(Q(observation_time__gt=after_time) | Q(observation_time=after_time, pk__gt=after_pk))
+        
+        limit = data["limit"]
+        rows = list(
+            qs.order_by("observation_time", "pk").values(
+                "id", "observation_time", "submission_time", "idempotency_key", "is_test_submission"
+            )[:limit + 1]
+        )
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_history_cursor(rows[-1]["observation_time"], rows[-1]["id"])
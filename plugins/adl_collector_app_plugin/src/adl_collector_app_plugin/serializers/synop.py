@@ -8,14 +8,15 @@ from adl.api.serializers import ReadOnlyModelSerializer
 
 from ..models import (
     ManualObservationStationLink,
-    ManualObservationStationLinkVariableMapping,
-    ManualObservationStationLinkObserver,
     CollectorSubmission,
     CollectorSubmissionRecord,
     SynopParameterMapping,
     SynopMessage,
 )
-from ..synop_utils import decode_fm12, build_submission_records_from_synop
+from ..decode_cache import decode_fm12_cached
+from ..synop_bulletin import ingest_bulletin, split_bulletin
+from ..synop_resolver import get_station_link_synop_index, get_synop_mappings
+from ..synop_utils import build_submission_records_from_synop
 from ..utils import compute_submission_hash
 
 
@@ -34,6 +35,8 @@ class SynopDecodeInSer(serializers.Serializer):
     raw_message = serializers.CharField()
     observation_year = serializers.IntegerField(required=False, allow_null=True)
     observation_month = serializers.IntegerField(required=False, allow_null=True)
+    # Clients that only show the mapped records can skip the full decoder output
+    include_decoded = serializers.BooleanField(required=False, default=True)
 
     def validate(self, data):
         try:
@@ -44,7 +47,7 @@ class SynopDecodeInSer(serializers.Serializer):
             raise serializers.ValidationError("Invalid station_link_id.")
 
         try:
-            decoded = decode_fm12(data["raw_message"])
+            decoded = decode_fm12_cached(data["raw_message"])
         except (ValueError, ImportError) as exc:
             raise serializers.ValidationError(f"Could not decode SYNOP: {exc}")
 
@@ -55,22 +58,11 @@ class SynopDecodeInSer(serializers.Serializer):
                 f"selected station '{sl.station.wsi_local}'."
             )
 
-        mappings = list(
-            SynopParameterMapping.objects.select_related("adl_parameter", "source_unit").all()
-        )
-
         data["_station_link"] = sl
         data["_decoded"] = decoded
         data["_decoded_station_id"] = decoded_station_id
-        data["_mappings"] = mappings
-
-        show_param_ids = set(
-            ManualObservationStationLinkVariableMapping.objects.filter(
-                station_link=sl,
-                show_in_direct_entry=True,
-            ).values_list("adl_parameter_id", flat=True)
-        )
-        data["_show_param_ids"] = show_param_ids
+        data["_mappings"] = get_synop_mappings()
+        data["_show_param_ids"] = get_station_link_synop_index(sl.pk)["direct_entry_param_ids"]
 
         observation_time = None
         year = data.get("observation_year")
@@ -102,7 +94,7 @@ class SynopSubmitInSer(serializers.Serializer):
         request = self.context["request"]
 
         try:
-            decoded = decode_fm12(data["raw_message"])
+            decoded = decode_fm12_cached(data["raw_message"])
         except (ValueError, ImportError) as exc:
             raise serializers.ValidationError(f"Could not decode SYNOP: {exc}")
 
@@ -118,9 +110,7 @@ class SynopSubmitInSer(serializers.Serializer):
         except ManualObservationStationLink.DoesNotExist:
             raise serializers.ValidationError(f"No station link found for SYNOP station_id {station_id}.")
 
-        mappings = list(
-            SynopParameterMapping.objects.select_related("adl_parameter", "source_unit").all()
-        )
+        mappings = get_synop_mappings()
 
         if not mappings:
             raise serializers.ValidationError("No SYNOP parameter mapping found.")
@@ -166,7 +156,18 @@ class SynopSubmitInSer(serializers.Serializer):
         now = dj_timezone.now()
         raw = validated["raw_message"]
 
-        mapped_records = build_submission_records_from_synop(decoded, mappings)
+        index = get_station_link_synop_index(sl.pk)
+        observer_id = index["observer_ids"].get(user.pk)
+
+        # Deduplicate by variable mapping: if two FM12 paths decode to the same
+        # adl_parameter, keep only the first decoded value to avoid violating
+        # the unique_mapping_per_submission constraint.
+        values = {}
+        for r in build_submission_records_from_synop(decoded, mappings):
+            vm_id = index["vm_ids"].get(r["adl_parameter_id"])
+            if vm_id is not None and vm_id not in values:
+                values[vm_id] = r["value"]
+        submission_records = [{"variable_mapping_id": vm_id, "value": value} for vm_id, value in values.items()]
 
         with transaction.atomic():
             synop_msg = SynopMessage.objects.create(
@@ -177,89 +178,60 @@ class SynopSubmitInSer(serializers.Serializer):
                 decoded_json=decoded,
             )
 
-            if mapped_records:
-                submission_records = [
-                    {"variable_mapping_id": _get_variable_mapping_id(sl, r["adl_parameter_id"]), "value": r["value"]}
-                    for r in mapped_records
-                    if _get_variable_mapping_id(sl, r["adl_parameter_id"]) is not None
-                ]
-
-                if submission_records:
-                    chash = compute_submission_hash(
-                        station_link_id=sl.id,
-                        observation_time=obs_time,
-                        records=submission_records,
-                        meta={"synop": True},
-                    )
-
-                    existing = CollectorSubmission.objects.filter(
+            if submission_records:
+                chash = compute_submission_hash(
+                    station_link_id=sl.id,
+                    observation_time=obs_time,
+                    records=submission_records,
+                    meta={"synop": True},
+                )
+
+                existing = CollectorSubmission.objects.filter(
+                    station_link=sl,
+                    observation_time=obs_time,
+                    content_hash=chash,
+                ).exists()
+
+                if not existing:
+                    sub = CollectorSubmission.objects.create(
                         station_link=sl,
+                        office_submitted_by=None if observer_id else user,
+                        observer_id=observer_id,
+                        submission_time=now,
                         observation_time=obs_time,
+                        data={"synop_message_id": synop_msg.id, "raw_message": raw},
+                        idempotency_key="",
                         content_hash=chash,
-                    ).first()
-
-                    if not existing:
-                        vmaps = {
-                            vm.adl_parameter_id: vm
-                            for vm in ManualObservationStationLinkVariableMapping.objects.filter(
-                                station_link=sl,
-                                adl_parameter_id__in=[r["adl_parameter_id"] for r in mapped_records],
-                            )
-                        }
-
-                        sub = CollectorSubmission.objects.create(
-                            station_link=sl,
-                            office_submitted_by=user if not _is_observer(sl, user) else None,
-                            observer=_get_observer(sl, user),
-                            submission_time=now,
-                            observation_time=obs_time,
-                            data={"synop_message_id": synop_msg.id, "raw_message": raw},
-                            idempotency_key="",
-                            content_hash=chash,
-                        )
-
-                        # Deduplicate by variable_mapping_id: if two FM12 paths decode to
-                        # the same adl_parameter, keep only the first decoded value to
-                        # avoid violating the unique_mapping_per_submission constraint.
-                        recs_by_vm_id = {}
-                        for r in mapped_records:
-                            vm = vmaps.get(r["adl_parameter_id"])
-                            if vm and vm.id not in recs_by_vm_id:
-                                recs_by_vm_id[vm.id] = CollectorSubmissionRecord(
-                                    submission=sub,
-                                    variable_mapping=vm,
-                                    value=r["value"],
-                                )
-                        CollectorSubmissionRecord.objects.bulk_create(recs_by_vm_id.values())
-
-                        synop_msg.submission = sub
-                        synop_msg.save(update_fields=["submission"])
-
-        return synop_msg
-
+                    )
+                    CollectorSubmissionRecord.objects.bulk_create([
+                        CollectorSubmissionRecord(submission=sub, variable_mapping_id=vm_id, value=value)
+                        for vm_id, value in values.items()
+                    ])
 
-# ---------------------------------------------------------------------------
-# Helpers
-# ---------------------------------------------------------------------------
+                    synop_msg.submission = sub
+                    synop_msg.save(update_fields=["submission"])
 
-def _get_variable_mapping_id(station_link, adl_parameter_id):
-    """Return the ManualObservationStationLinkVariableMapping id for a given adl_parameter."""
-    try:
-        return ManualObservationStationLinkVariableMapping.objects.get(
-            station_link=station_link,
-            adl_parameter_id=adl_parameter_id,
-        ).id
-    except ManualObservationStationLinkVariableMapping.DoesNotExist:
-        return None
+        return synop_msg
 
 
-def _is_observer(station_link, user) -> bool:
-    return ManualObservationStationLinkObserver.objects.filter(
-        station_link=station_link, user=user, enabled=True
-    ).exists()
+class SynopBulletinInSer(serializers.Serializer):
+    """
+    A multi-station AAXX bulletin. save() archives and submits each station
+    report (see synop_bulletin.ingest_bulletin) and returns the per-report results.
+    """
+    observation_year = serializers.IntegerField()
+    observation_month = serializers.IntegerField(min_value=1, max_value=12)
+    bulletin = serializers.CharField()
 
+    def validate_bulletin(self, value):
+        if not split_bulletin(value):
+            raise serializers.ValidationError("No station reports found in the bulletin.")
+        return value
 
-def _get_observer(station_link, user):
-    return ManualObservationStationLinkObserver.objects.filter(
-        station_link=station_link, user=user, enabled=True
-    ).first()
+    def create(self, validated):
+        return ingest_bulletin(
+            validated["bulletin"],
+            self.context["request"].user,
+            validated["observation_year"],
+            validated["observation_month"],
+        )
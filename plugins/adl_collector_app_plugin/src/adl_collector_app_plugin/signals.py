@@ -1,10 +1,16 @@
 import logging
 
-from django.db import transaction
-from django.db.models.signals import post_save
+from adl.core.models import DataParameter, Station, Unit
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import CollectorSubmission, ManualObservationStationLink
+from .models import (
+    CollectorSubmission,
+    ManualObservationStationLink,
+    ManualObservationStationLinkObserver,
+    ManualObservationStationLinkVariableMapping,
+    SynopParameterMapping,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -39,32 +45,114 @@ def auto_sync_synop_mappings(sender, instance, created, **kwargs):
 @receiver(post_save, sender=CollectorSubmission)
 def trigger_ingestion_on_submission(sender, instance, created, **kwargs):
     """
-    Immediately queue ingestion for a new non-test submission so records
-    appear in ObservationRecord without waiting for the next Celery Beat tick.
+    Queue ingestion for a new non-test submission so records appear in
+    ObservationRecord without waiting for the next Celery Beat tick.
 
-    Uses transaction.on_commit() so the task is queued only after the full
-    DB transaction (submission + all CollectorSubmissionRecord rows) is committed,
-    preventing the Celery worker from reading rows that don't yet exist.
+    Writes an outbox entry in the submission's own transaction; the drain that
+    turns it into a task is requested only once that transaction commits, so
+    the Celery worker never reads rows that don't yet exist, and a broker
+    outage at that moment leaves the trigger in the outbox rather than losing
+    it (see ingestion.py).
     """
     if not created or instance.is_test_submission:
         return
     
-    conn_id = instance.station_link.network_connection_id
-    sl_id = instance.station_link_id
+    from .ingestion import enqueue_ingestion
     
-    def _queue():
-        try:
-            from adl.core.tasks import process_station_link_batch
-            
-            process_station_link_batch.delay(conn_id, [sl_id])
-            logger.debug(
-                "Queued immediate ingestion for station_link pk=%s after submission pk=%s.",
-                sl_id,
-                instance.pk,
-            )
-        except Exception:
-            logger.exception(
-                "Failed to queue immediate ingestion for submission pk=%s.", instance.pk
-            )
+    enqueue_ingestion([(instance.station_link.network_connection_id, instance.station_link_id)])
+
+
+@receiver([post_save, post_delete], sender=ManualObservationStationLink)
+@receiver([post_save, post_delete], sender=ManualObservationStationLinkObserver)
+@receiver([post_save, post_delete], sender=ManualObservationStationLinkVariableMapping)
+@receiver([post_save, post_delete], sender=Station)
+def invalidate_observer_authz_on_change(sender, **kwargs):
+    """Any change to who may submit what, where, drops every cached observer authorization map."""
+    from .authz import invalidate_observer_authz
+    
+    invalidate_observer_authz()
+
+
+@receiver([post_save, post_delete], sender=ManualObservationStationLink)
+@receiver([post_save, post_delete], sender=ManualObservationStationLinkObserver)
+@receiver([post_save, post_delete], sender=ManualObservationStationLinkVariableMapping)
+def invalidate_station_link_config_on_change(sender, instance, **kwargs):
+    """A change to a link, its observers or its variable mappings drops that link's cached configuration."""
+    from .station_config import invalidate_station_link_config
+    
+    station_link_id = instance.pk if sender is ManualObservationStationLink else instance.station_link_id
+    invalidate_station_link_config(station_link_id)
+
+
+@receiver([post_save, post_delete], sender=Station)
+@receiver([post_save, post_delete], sender=DataParameter)
+@receiver([post_save, post_delete], sender=Unit)
+def invalidate_all_station_link_configs_on_change(sender, **kwargs):
+    """Stations, parameters and units appear in many links' configurations; drop them all."""
+    from .station_config import invalidate_all_station_link_configs
+    
+    invalidate_all_station_link_configs()
+
+
+@receiver([post_save, post_delete], sender=ManualObservationStationLink)
+@receiver([post_save, post_delete], sender=ManualObservationStationLinkObserver)
+@receiver([post_save, post_delete], sender=ManualObservationStationLinkVariableMapping)
+def invalidate_station_link_synop_index_on_change(sender, instance, **kwargs):
+    """A link's SYNOP index holds its variable mappings and enabled observers."""
+    from .synop_resolver import invalidate_station_link_synop_index
+    
+    station_link_id = instance.pk if sender is ManualObservationStationLink else instance.station_link_id
+    invalidate_station_link_synop_index(station_link_id)
+
+
+@receiver([post_save, post_delete], sender=SynopParameterMapping)
+@receiver([post_save, post_delete], sender=DataParameter)
+@receiver([post_save, post_delete], sender=Unit)
+def invalidate_synop_mappings_on_change(sender, **kwargs):
+    """The cached SYNOP mappings carry their ADL parameters and units."""
+    from .synop_resolver import invalidate_synop_mappings
+    
+    invalidate_synop_mappings()
+
+
+@receiver([post_save, post_delete], sender=ManualObservationStationLink)
+def log_station_link_change(sender, instance, **kwargs):
+    from .config_changes import record_config_change
+    
+    record_config_change(instance.pk, deleted=kwargs["signal"] is post_delete)
+
+
+@receiver([post_save, post_delete], sender=ManualObservationStationLinkVariableMapping)
+def log_variable_mapping_change(sender, instance, **kwargs):
+    from .config_changes import record_config_change
+    
+    record_config_change(
+        instance.station_link_id,
+        variable_mapping_id=instance.pk,
+        deleted=kwargs["signal"] is post_delete,
+    )
+
+
+@receiver([post_save, post_delete], sender=ManualObservationStationLinkObserver)
+def log_observer_change(sender, instance, **kwargs):
+    """Logged against the observer's user: their access to the link may have changed."""
+    from .config_changes import record_config_change
+    
+    record_config_change(instance.station_link_id, user_id=instance.user_id, deleted=kwargs["signal"] is post_delete)
+
+
+@receiver(post_save, sender=Station)
+def log_station_change(sender, instance, **kwargs):
+    from .config_changes import record_station_change
+    
+    record_station_change(instance)
+
+
+@receiver(post_save, sender=DataParameter)
+@receiver(post_save, sender=Unit)
+def log_parameter_change(sender, instance, **kwargs):
+    """Parameter and unit names appear in the payloads of the variable mappings using them."""
+    from .config_changes import record_variable_mapping_changes
     
-    transaction.on_commit(_queue)
+    field = "adl_parameter" if sender is DataParameter else "obs_parameter_unit"
+    record_variable_mapping_changes(ManualObservationStationLinkVariableMapping.objects.filter(**{field: instance}))
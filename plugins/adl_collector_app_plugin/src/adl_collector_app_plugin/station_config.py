@@ -0,0 +1,75 @@
+"""
+Cached observer station-link configuration with ETags.
+
+The station-link detail payload (variable mappings with their range checks
+and WMO code-table options, schedule, timezone) is costly to build and rarely
+changes, so get_station_link_config() serializes it once per version and
+keeps it in the cache together with an ETag derived from its content. The
+observer API answers If-None-Match with 304 from that alone.
+
+A link's version combines a per-link counter, which signals.py bumps when
+the link, one of its observers or one of its variable mappings is saved or
+deleted, with a global generation bumped when a station, ADL parameter or
+unit changes. Both are cache_counters.py counters.
+
+ETags are weak: they identify the data, which the API may render as JSON or
+MessagePack, gzipped or not.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .cache_counters import get_counter, invalidate
+
+CONFIG_CACHE_TIMEOUT = 60 * 60 * 24
+_GENERATION_KEY = "adl_collector:config_generation"
+
+
+def _link_version_key(station_link_id) -> str:
+    return f"adl_collector:config_version:{station_link_id}"
+
+
+def compute_etag(data) -> str:
+    content = json.dumps(data, cls=JSONEncoder, sort_keys=True, separators=(",", ":"))
+    return f'W/"{hashlib.sha1(content.encode()).hexdigest()}"'
+
+
+def get_station_link_config(station_link_id):
+    """
+    (etag, data) of ObserverStationLinkDetailSerializer for the station link,
+    from the cache while the link's configuration is unchanged; the link is
+    only read on a miss.
+    """
+    from .models import ManualObservationStationLink
+    from .serializers import ObserverStationLinkDetailSerializer
+    
+    key = f"adl_collector:config:{get_counter(_GENERATION_KEY)}:{get_counter(_link_version_key(station_link_id))}:{station_link_id}"
+    cached = cache.get(key)
+    if cached is None:
+        station_link = ManualObservationStationLink.objects.select_related("station").get(pk=station_link_id)
+        data = dict(ObserverStationLinkDetailSerializer(station_link).data)
+        cached = (compute_etag(data), data)
+        cache.set(key, cached, CONFIG_CACHE_TIMEOUT)
+    return cached
+
+
+def conditional_response(request, response, etag):
+    """
+    response with its ETag set, or 304 Not Modified if the request's
+    If-None-Match already names etag.
+    """
+    response["ETag"] = etag
+    # Clients may keep the payload but must revalidate it before use
+    response["Cache-Control"] = "private, no-cache"
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def invalidate_station_link_config(station_link_id):
+    invalidate(_link_version_key(station_link_id))
+
+
+def invalidate_all_station_link_configs():
+    invalidate(_GENERATION_KEY)
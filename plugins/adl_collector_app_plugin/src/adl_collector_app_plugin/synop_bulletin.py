@@ -0,0 +1,233 @@
+"""
+Ingestion of multi-station FM12 SYNOP bulletins.
+
+An AAXX bulletin carries one "AAXX YYGGiw" section header followed by
+station reports, each terminated by "=", optionally preceded by a WMO
+abbreviated heading and possibly repeated for several sections.
+split_bulletin() turns it into one self-contained "AAXX YYGGiw <report>="
+message per station, the form decode_fm12() and SynopSubmitInSer take.
+
+ingest_bulletin() decodes the reports, resolves every station link,
+variable mapping and observer in one query each, and writes
+the SynopMessage, CollectorSubmission and CollectorSubmissionRecord rows with
+one bulk insert per model in a single transaction. A report that fails never
+rejects the others: the result has a status per report, in bulletin order.
+"""
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+from django.db import transaction
+from django.utils import timezone as dj_timezone
+
+from .decode_cache import get_cached_decodes, store_decodes
+from .synop_resolver import get_station_link_synop_indexes, get_synop_mappings
+from .synop_utils import build_submission_records_from_synop, try_decode_fm12
+from .utils import compute_submission_hash
+
+_SECTION_RE = re.compile(r"\bAAXX\s+(\d{4}[0-4/])")
+# Transmission lines between reports: WMO abbreviated headings (TTAAii CCCC
+# YYGGgg, optionally with BBB), and the ZCZC / NNNN start and end markers
+_TRANSMISSION_LINE_RE = re.compile(
+    r"^[ \t]*(?:[A-Z]{4}\d{2}[ \t]+[A-Z]{4}[ \t]+\d{6}(?:[ \t]+[A-Z]{3})?|ZCZC\b.*|NNNN)[ \t]*\r?$",
+    re.MULTILINE,
+)
+
+
+def split_bulletin(bulletin: str) -> list[str]:
+    """
+    The station reports of an AAXX bulletin, each as a single-station FM12
+    message with its section header. NIL reports are left out, as are
+    headings and end markers, which collectives repeat between sections.
+    """
+    bulletin = _TRANSMISSION_LINE_RE.sub("", bulletin)
+    reports = []
+    sections = list(_SECTION_RE.finditer(bulletin))
+    for i, section in enumerate(sections):
+        end = sections[i + 1].start() if i + 1 < len(sections) else len(bulletin)
+        for chunk in bulletin[section.end():end].split("="):
+            body = " ".join(chunk.split())
+            if not body or body.upper().endswith(" NIL") or body.upper() == "NIL":
+                continue
+            reports.append(f"AAXX {section.group(1)} {body}=")
+    return reports
+
+
+def decode_reports(reports, workers=None) -> list[tuple]:
+    """
+    (decoded or None, error or None) per report. Reports found in the decode
+    cache are not decoded again; the rest are decoded and cached. Decoding
+    is done in this process unless workers asks for more than one, which
+    only pays off for large files, as each worker process starts from scratch.
+    """
+    cached = get_cached_decodes(reports)
+    to_decode = list(dict.fromkeys(raw for raw in reports if raw not in cached))
+    
+    workers = min(workers or 1, len(to_decode))
+    if workers <= 1:
+        outcomes = [try_decode_fm12(raw) for raw in to_decode]
+    else:
+        # spawn: workers must not inherit the parent's database connections
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as executor:
+            outcomes = list(
+                executor.map(try_decode_fm12, to_decode, chunksize=max(1, len(to_decode) // (workers * 4)))
+            )
+    
+    decoded_by_raw = dict(zip(to_decode, outcomes))
+    store_decodes({raw: decoded for raw, (decoded, error) in decoded_by_raw.items() if error is None})
+    return [(cached[raw], None) if raw in cached else decoded_by_raw[raw] for raw in reports]
+
+
+def _observation_time(decoded, year, month):
+    obs_time_info = decoded.get("obs_time") or {}
+    day = (obs_time_info.get("day") or {}).get("value")
+    hour = (obs_time_info.get("hour") or {}).get("value")
+    if day is None or hour is None:
+        raise ValueError("No day or hour found in SYNOP message.")
+    return datetime(year=year, month=month, day=day, hour=hour, tzinfo=timezone.utc)
+
+
+def ingest_bulletin(bulletin, user, observation_year, observation_month, workers=None) -> list[dict]:
+    """
+    Archive every station report of bulletin and create a submission from
+    its mapped values, as SynopSubmitInSer does for a single message.
+
+    Returns one {"index", "raw_message", "status", ...} per report, where
+    status is "created", "duplicate" (the same values were already submitted
+    for that station and time), "archived" (no mapped values, so only the
+    message is kept) or "error" with an "error" message.
+    """
+    from .ingestion import enqueue_ingestion
+    from .models import (
+        CollectorSubmission,
+        CollectorSubmissionRecord,
+        ManualObservationStationLink,
+        SynopMessage,
+    )
+    
+    reports = split_bulletin(bulletin)
+    results = [{"index": i, "raw_message": raw} for i, raw in enumerate(reports)]
+    now = dj_timezone.now()
+    
+    parsed = []
+    for result, (decoded, error) in zip(results, decode_reports(reports, workers)):
+        if error is None:
+            station_id = (decoded.get("station_id") or {}).get("value")
+            result["station_id"] = station_id
+            try:
+                obs_time = _observation_time(decoded, observation_year, observation_month)
+            except ValueError as exc:
+                error = str(exc)
+            else:
+                if station_id is None:
+                    error = "No station_id found in SYNOP message."
+                elif obs_time > now:
+                    error = f"Observation time can not be in the future: {obs_time.isoformat()}"
+        if error is not None:
+            result.update(status="error", error=error)
+            continue
+        result["observation_time"] = obs_time
+        parsed.append((result, decoded))
+    
+    station_ids = {str(result["station_id"]) for result, _ in parsed}
+    links_by_station = {}
+    for sl in ManualObservationStationLink.objects.select_related("network_connection", "station").filter(
+            station__wsi_local__in=station_ids
+    ):
+        links_by_station.setdefault(sl.station.wsi_local, []).append(sl)
+    
+    mappings = get_synop_mappings()
+    resolved = []
+    for result, decoded in parsed:
+        links = links_by_station.get(str(result["station_id"]), [])
+        if len(links) != 1:
+            problem = "No station link found" if not links else "Several station links found"
+            result.update(status="error", error=f"{problem} for SYNOP station_id {result['station_id']}.")
+            continue
+        resolved.append((result, decoded, links[0]))
+    
+    if not resolved:
+        return results
+    
+    link_ids = {sl.pk for _, _, sl in resolved}
+    indexes = get_station_link_synop_indexes(link_ids)
+    
+    # Values per report, deduplicated by variable mapping as in SynopSubmitInSer
+    pending = []
+    for result, decoded, sl in resolved:
+        values = {}
+        for record in build_submission_records_from_synop(decoded, mappings):
+            vm_id = indexes[sl.pk]["vm_ids"].get(record["adl_parameter_id"])
+            if vm_id is not None and vm_id not in values:
+                values[vm_id] = record["value"]
+        records = [{"variable_mapping_id": vm_id, "value": value} for vm_id, value in values.items()]
+        chash = compute_submission_hash(
+            station_link_id=sl.id,
+            observation_time=result["observation_time"],
+            records=records,
+            meta={"synop": True},
+        ) if records else None
+        pending.append((result, decoded, sl, records, chash))
+    
+    with transaction.atomic():
+        existing = set(
+            CollectorSubmission.objects.filter(
+                station_link_id__in=link_ids,
+                content_hash__in={chash for *_, chash in pending if chash},
+            ).values_list("station_link_id", "observation_time", "content_hash")
+        )
+        
+        messages = SynopMessage.objects.bulk_create([
+            SynopMessage(
+                station_link=sl,
+                submitted_by=user,
+                observation_time=result["observation_time"],
+                raw_message=result["raw_message"],
+                decoded_json=decoded,
+            )
+            for result, decoded, sl, _, _ in pending
+        ])
+        
+        new_subs = {}
+        for (result, _, sl, records, chash), message in zip(pending, messages):
+            result["synop_message_id"] = message.pk
+            key = (sl.pk, result["observation_time"], chash)
+            if chash is None:
+                result["status"] = "archived"
+                continue
+            if key in existing or key in new_subs:
+                result["status"] = "duplicate"
+                continue
+            observer_id = indexes[sl.pk]["observer_ids"].get(user.pk)
+            sub = CollectorSubmission(
+                station_link=sl,
+                office_submitted_by=None if observer_id else user,
+                observer_id=observer_id,
+                submission_time=now,
+                observation_time=result["observation_time"],
+                data={"synop_message_id": message.pk, "raw_message": result["raw_message"]},
+                idempotency_key="",
+                content_hash=chash,
+            )
+            new_subs[key] = (sub, message, records)
+            result["status"] = "created"
+        
+        # bulk_create() skips post_save, so ingestion is queued explicitly below
+        CollectorSubmission.objects.bulk_create([sub for sub, _, _ in new_subs.values()])
+        CollectorSubmissionRecord.objects.bulk_create([
+            CollectorSubmissionRecord(submission=sub, variable_mapping_id=r["variable_mapping_id"], value=r["value"])
+            for sub, _, records in new_subs.values()
+            for r in records
+        ])
+        for sub, message, _ in new_subs.values():
+            message.submission = sub
+        SynopMessage.objects.bulk_update([message for _, message, _ in new_subs.values()], ["submission"])
+        enqueue_ingestion(
+            (sub.station_link.network_connection_id, sub.station_link_id) for sub, _, _ in new_subs.values()
+        )
+    
+    submission_ids = {message.pk: sub.pk for sub, message, _ in new_subs.values()}
+    for result, *_ in pending:
+        result["submission_id"] = submission_ids.get(result["synop_message_id"])
+    return results
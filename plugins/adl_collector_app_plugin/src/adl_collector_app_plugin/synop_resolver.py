@@ -0,0 +1,114 @@
+"""
+Cached lookups for turning decoded SYNOP messages into submissions.
+
+get_synop_mappings() returns the global FM12 path -> ADL parameter mappings
+with their parameters and units loaded. get_station_link_synop_indexes()
+returns, per station link, the variable mapping to use for each ADL parameter
+and the link's enabled observers. With both in the cache, saving a SYNOP
+message costs the same few queries however many elements it carries.
+
+The mappings are keyed by a global generation, which signals.py bumps when a
+SYNOP mapping, ADL parameter or unit is saved or deleted. Each link's index
+has its own counter, bumped when the link, one of its variable mappings or
+one of its observers changes. Both are cache_counters.py counters.
+"""
+from django.core.cache import cache
+
+from .cache_counters import get_counter, get_counters, invalidate
+
+RESOLVER_CACHE_TIMEOUT = 60 * 60 * 24
+_MAPPINGS_GENERATION_KEY = "adl_collector:synop_mappings_generation"
+
+
+def _link_version_key(station_link_id) -> str:
+    return f"adl_collector:synop_index_version:{station_link_id}"
+
+
+def get_synop_mappings() -> list:
+    """Every SynopParameterMapping, with adl_parameter and source_unit loaded."""
+    from .models import SynopParameterMapping
+
+    key = f"adl_collector:synop_mappings:{get_counter(_MAPPINGS_GENERATION_KEY)}"
+    mappings = cache.get(key)
+    if mappings is None:
+        mappings = list(
+            SynopParameterMapping.objects.select_related("adl_parameter", "source_unit").order_by("pk")
+        )
+        cache.set(key, mappings, RESOLVER_CACHE_TIMEOUT)
+    return mappings
+
+
+def get_station_link_synop_index(station_link_id) -> dict:
+    """get_station_link_synop_indexes() for a single station link."""
+    return get_station_link_synop_indexes([station_link_id])[station_link_id]
+
+
+def get_station_link_synop_indexes(station_link_ids) -> dict:
+    """
+    {station_link_id: {"vm_ids": {adl_parameter_id: variable_mapping_id},
+                       "direct_entry_param_ids": frozenset,
+                       "observer_ids": {user_id: observer_id}}}
+
+    Where a parameter has several variable mappings on a link the oldest one
+    is used; observers are the enabled ones only. Links missing from the
+    cache are built together, in two queries.
+    """
+    station_link_ids = list(dict.fromkeys(station_link_ids))
+    keys = {
+        station_link_id: f"adl_collector:synop_index:{version}:{station_link_id}"
+        for station_link_id, version in zip(
+            station_link_ids, get_counters([_link_version_key(pk) for pk in station_link_ids])
+        )
+    }
+    cached = cache.get_many(keys.values())
+    indexes = {station_link_id: cached[key] for station_link_id, key in keys.items() if key in cached}
+
+    missing = [station_link_id for station_link_id in station_link_ids if station_link_id not in indexes]
+    if missing:
+        built = _build_indexes(missing)
+        cache.set_many({keys[station_link_id]: built[station_link_id] for station_link_id in missing},
+                       RESOLVER_CACHE_TIMEOUT)
+        indexes.update(built)
+    return indexes
+
+
+def invalidate_synop_mappings():
+    invalidate(_MAPPINGS_GENERATION_KEY)
+
+
+def invalidate_station_link_synop_index(station_link_id):
+    invalidate(_link_version_key(station_link_id))
+
+
+def _build_indexes(station_link_ids) -> dict:
+    from .models import ManualObservationStationLinkObserver, ManualObservationStationLinkVariableMapping
+
+    vm_ids = {station_link_id: {} for station_link_id in station_link_ids}
+    direct_entry = {station_link_id: set() for station_link_id in station_link_ids}
+    for vm_id, station_link_id, adl_parameter_id, show_in_direct_entry in (
+            ManualObservationStationLinkVariableMapping.objects
+            .filter(station_link_id__in=station_link_ids)
+            .order_by("pk")
+            .values_list("pk", "station_link_id", "adl_parameter_id", "show_in_direct_entry")
+    ):
+        vm_ids[station_link_id].setdefault(adl_parameter_id, vm_id)
+        if show_in_direct_entry:
+            direct_entry[station_link_id].add(adl_parameter_id)
+
+    observer_ids = {station_link_id: {} for station_link_id in station_link_ids}
+    for observer_id, station_link_id, user_id in (
+            ManualObservationStationLinkObserver.objects
+            .filter(station_link_id__in=station_link_ids, enabled=True)
+            .order_by("pk")
+            .values_list("pk", "station_link_id", "user_id")
+    ):
+        observer_ids[station_link_id].setdefault(user_id, observer_id)
+
+    return {
+        station_link_id: {
+            "vm_ids": vm_ids[station_link_id],
+            "direct_entry_param_ids": frozenset(direct_entry[station_link_id]),
+            "observer_ids": observer_ids[station_link_id],
+        }
+        for station_link_id in station_link_ids
+    }
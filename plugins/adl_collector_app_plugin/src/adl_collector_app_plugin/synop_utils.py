@@ -117,6 +117,17 @@ def decode_fm12(raw_message: str) -> dict:
         raise ValueError(f"Failed to decode SYNOP message: {exc}") from exc
 
 
+def try_decode_fm12(raw_message: str) -> tuple[Optional[dict], Optional[str]]:
+    """
+    (decoded, None) or (None, error message). Safe to run in a worker process:
+    failures come back as plain data, and this module does not need Django.
+    """
+    try:
+        return decode_fm12(raw_message), None
+    except (ValueError, ImportError) as exc:
+        return None, str(exc)
+
+
 def extract_value_by_path(decoded: dict, path: str) -> Optional[float]:
     """
     Extract a numeric value from a decoded SYNOP dict using dot-notation path.
@@ -150,17 +161,88 @@ def extract_value_by_path(decoded: dict, path: str) -> Optional[float]:
     return None
 
 
-def get_unmapped_elements(decoded: dict, synop_mappings) -> list[dict]:
+def compile_fm12_paths(paths) -> tuple:
+    """
+    Compile dot-notation paths into a prefix trie for extract_fm12_values().
+    Each node is (segment, list index or None, path ending here or None,
+    children), so paths sharing a prefix share its traversal.
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        parts = path.split(".")
+        for depth, part in enumerate(parts):
+            entry = node.setdefault(part, [None, {}])
+            if depth == len(parts) - 1:
+                entry[0] = path
+            node = entry[1]
+    
+    def freeze(node):
+        nodes = []
+        for part, (path, children) in node.items():
+            try:
+                index = int(part)
+            except ValueError:
+                index = None
+            nodes.append((part, index, path, freeze(children)))
+        return tuple(nodes)
+    
+    return freeze(tree)
+
+
+def _walk_fm12(obj, nodes, out):
+    for part, index, path, children in nodes:
+        # Same steps as extract_value_by_path()
+        if isinstance(obj, list):
+            if index is None:
+                continue
+            try:
+                child = obj[index]
+            except IndexError:
+                continue
+        elif isinstance(obj, dict):
+            child = obj.get(part)
+        else:
+            continue
+        if child is None:
+            continue
+        if path is not None and isinstance(child, (int, float)):
+            out[path] = float(child)
+        if children:
+            _walk_fm12(child, children, out)
+
+
+_FM12_PATHS = frozenset(path for path, _ in FM12_ELEMENT_PATH_CHOICES)
+# Every path of FM12_ELEMENT_PATH_CHOICES, compiled once
+FM12_PATH_TRIE = compile_fm12_paths(path for path, _ in FM12_ELEMENT_PATH_CHOICES)
+
+
+def extract_fm12_values(decoded: dict, compiled=FM12_PATH_TRIE) -> dict[str, float]:
+    """
+    {path: value} for every compiled path (default: all FM12_ELEMENT_PATH_CHOICES)
+    that extract_value_by_path() would resolve to a number, in a single
+    traversal of decoded.
+    """
+    out = {}
+    if isinstance(decoded, dict):
+        _walk_fm12(decoded, compiled, out)
+    return out
+
+
+def get_unmapped_elements(decoded: dict, synop_mappings, values=None) -> list[dict]:
     """
     Return FM12 elements that are present in decoded (non-None value) but are NOT
     covered by any entry in synop_mappings.  Used to show users what will be skipped.
+    values may pass in extract_fm12_values(decoded) when the caller already has it.
     """
+    if values is None:
+        values = extract_fm12_values(decoded)
     mapped_paths = {m.fm12_element_path for m in synop_mappings}
     result = []
     for path, label in FM12_ELEMENT_PATH_CHOICES:
         if path in mapped_paths:
             continue
-        value = extract_value_by_path(decoded, path)
+        value = values.get(path)
         if value is not None:
             result.append({"path": path, "label": label, "value": value})
     return result
@@ -224,17 +306,22 @@ def sync_synop_mappings_for_station(station_link) -> int:
     return created
 
 
-def build_submission_records_from_synop(decoded: dict, synop_mappings) -> list[dict]:
+def build_submission_records_from_synop(decoded: dict, synop_mappings, values=None) -> list[dict]:
     """
     Given a decoded SYNOP dict and an iterable of SynopParameterMapping objects,
     return a list of dicts suitable for creating CollectorSubmissionRecord rows:
       [{"variable_mapping_id": ..., "value": ...}, ...]
 
-    Skips mappings whose element path returns None.
+    Skips mappings whose element path returns None. Known paths are read from
+    one extract_fm12_values() traversal (or values, if passed in); paths
+    outside FM12_ELEMENT_PATH_CHOICES fall back to extract_value_by_path().
     """
+    if values is None:
+        values = extract_fm12_values(decoded)
     records = []
     for mapping in synop_mappings:
-        value = extract_value_by_path(decoded, mapping.fm12_element_path)
+        path = mapping.fm12_element_path
+        value = values.get(path) if path in _FM12_PATHS else extract_value_by_path(decoded, path)
         if value is not None:
             records.append({
                 "synop_mapping_id": mapping.id,
@@ -0,0 +1,41 @@
+from celery import shared_task
+
+
+@shared_task
+def drain_ingestion_outbox_task(connection_id=None):
+    """Periodic drain of every connection's ingestion outbox, run by celery beat (see config/settings)."""
+    from .ingestion import drain_ingestion_outbox
+    
+    drain_ingestion_outbox(connection_id=connection_id)
+
+
+@shared_task
+def refresh_pending_record_counts_task():
+    """Hourly recount of every station link's pending_record_count, run by celery beat."""
+    from .models import ManualObservationStationLink
+    
+    ManualObservationStationLink.refresh_pending_record_counts()
+
+
+@shared_task
+def archive_submission_records_task():
+    """Daily move of old processed records to the archive tier, run by celery beat."""
+    from .archive import archive_processed_records
+    
+    archive_processed_records()
+
+
+@shared_task
+def prune_idempotency_keys_task():
+    """Daily deletion of expired submission idempotency keys, run by celery beat."""
+    from .models import SubmissionIdempotencyKey
+    
+    SubmissionIdempotencyKey.prune_expired()
+
+
+@shared_task
+def prune_config_change_log_task():
+    """Daily pruning of the delta-sync change log, run by celery beat."""
+    from .config_changes import prune_config_change_log
+    
+    prune_config_change_log()
@@ -0,0 +1,431 @@
+"""
+Ingestion benchmark for the collector plugin, run by test_benchmark.py.
+
+Builds a synthetic deployment inside a transaction — N connections with M
+station links each, P variable mappings per link, D days of submissions at
+fixed slot times (with a share of revised submissions) plus archived SYNOP
+messages — then times the hot paths against it and rolls everything back:
+
+  - ADLCollectorPlugin.get_station_data / after_save_records
+  - SubmissionInSer and SynopSubmitInSer create (validation included)
+  - the monitoring views
+
+Each measurement records wall-clock statistics and the number of SQL queries,
+so query-count regressions show up as clearly as slowdowns. Results are a
+JSON-serializable dict (see run_benchmark). Only the test database is used —
+PostgreSQL or SQLite — no broker or other service.
+
+Every row is generated, core models included, with factories.create(). An
+error in any step propagates.
+"""
+import datetime
+import platform
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.db import connection as db_connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone as dj_timezone
+
+from .factories import create, unique_name
+
+DEFAULT_SLOTS = ("00:00", "06:00", "12:00", "18:00")
+
+# Section 1 of an FM12 report; day, hour and station are filled in per message
+SYNOP_TEMPLATE = "AAXX {day:02d}{hour:02d}4 {station} 12782 61506 10094 20047 30111 40197 53007 60001="
+# Elements of SYNOP_TEMPLATE given SynopParameterMappings, one per generated parameter
+SYNOP_PATHS = (
+    "air_temperature.value",
+    "dewpoint_temperature.value",
+    "station_pressure.value",
+    "sea_level_pressure.value",
+)
+
+
+def run_benchmark(
+        connections=1,
+        station_links=20,
+        variables=8,
+        days=7,
+        slots=DEFAULT_SLOTS,
+        revision_rate=0.05,
+        synop_rate=0.25,
+        repeat=5,
+        seed=0,
+        log=None,
+):
+    """
+    Generate the synthetic deployment, run every measurement, roll the
+    generated data back and return the results.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+
+    with transaction.atomic():
+        started = time.perf_counter()
+        network = SyntheticNetwork(rng, connections, station_links, variables, days, slots, revision_rate, synop_rate)
+        network.build(log)
+        generation_seconds = time.perf_counter() - started
+        log(
+            f"Generated {network.counts['submissions']} submissions, {network.counts['records']} records and "
+            f"{network.counts['synop_messages']} SYNOP messages in {generation_seconds:.1f}s"
+        )
+
+        results = []
+        for measure in (
+                _measure_station_data,
+                _measure_submission_create,
+                _measure_synop_create,
+                _measure_monitoring_views,
+        ):
+            for result in measure(network, repeat):
+                log(f"  {result['name']}: {result.get('median_ms', '-')} ms, {result.get('queries', '-')} queries")
+                results.append(result)
+
+        transaction.set_rollback(True)
+
+    return {
+        "timestamp": dj_timezone.now().isoformat(),
+        "database": db_connection.vendor,
+        "python": platform.python_version(),
+        "parameters": {
+            "connections": connections,
+            "station_links": station_links,
+            "variables": variables,
+            "days": days,
+            "slots": list(slots),
+            "revision_rate": revision_rate,
+            "synop_rate": synop_rate,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "generated": dict(network.counts),
+        "generation_seconds": round(generation_seconds, 3),
+        "results": results,
+    }
+
+
+class SyntheticNetwork:
+    def __init__(self, rng, connections, station_links, variables, days, slots, revision_rate, synop_rate):
+        self.rng = rng
+        self.n_connections = connections
+        self.n_station_links = station_links
+        self.n_variables = variables
+        self.days = days
+        self.slots = [datetime.time.fromisoformat(slot) for slot in slots]
+        self.revision_rate = revision_rate
+        self.synop_rate = synop_rate
+
+        self.connections = []
+        self.station_links = []
+        self.observers = {}  # station link id -> ManualObservationStationLinkObserver
+        self.vm_ids = {}  # station link id -> [variable mapping id, ...]
+        self.staff_user = None
+        self.counts = {"submissions": 0, "records": 0, "synop_messages": 0}
+
+    def build(self, log):
+        from adl.core.models import DataParameter, Station, Unit
+        from ..models import ManualObservationConnection, ManualObservationStationLink, SynopParameterMapping
+
+        User = get_user_model()
+        self.staff_user = User.objects.create_user(
+            username=unique_name("bench-staff"), is_staff=True, is_superuser=True
+        )
+
+        unit = create(Unit, name=unique_name("bench-unit"))
+        parameters = [
+            create(DataParameter, name=unique_name(f"bench-parameter-{p}"), unit=unit)
+            for p in range(self.n_variables)
+        ]
+        # Created before the links, so their SYNOP variable mappings are synced on creation
+        for path, param in zip(SYNOP_PATHS, parameters):
+            SynopParameterMapping.objects.create(fm12_element_path=path, adl_parameter=param, source_unit=unit)
+
+        station_ids = self._free_station_ids(self.n_connections * self.n_station_links)
+        for c in range(self.n_connections):
+            conn = create(ManualObservationConnection, name=unique_name(f"bench-connection-{c}"))
+            self.connections.append(conn)
+            for _ in range(self.n_station_links):
+                station_id = station_ids.pop()
+                station = create(Station, name=unique_name(f"bench-station-{station_id}"), wsi_local=station_id)
+                self._build_station_link(conn, station, parameters, User)
+            log(f"Built connection {c + 1}/{self.n_connections}")
+
+        ManualObservationStationLink.refresh_pending_record_counts(
+            ManualObservationStationLink.objects.filter(pk__in=[sl.pk for sl in self.station_links])
+        )
+
+    def _free_station_ids(self, count):
+        from adl.core.models import Station
+
+        taken = set(Station.objects.values_list("wsi_local", flat=True))
+        free = [str(n) for n in range(99999, 10000, -1) if str(n) not in taken]
+        if len(free) < count:
+            raise ValueError("Not enough free 5-digit station ids for the synthetic stations.")
+        return free[:count][::-1]
+
+    def _build_station_link(self, conn, station, parameters, User):
+        from ..models import (
+            ManualObservationStationLink,
+            ManualObservationStationLinkObserver,
+            ManualObservationStationLinkVariableMapping,
+        )
+
+        link = create(ManualObservationStationLink, network_connection=conn, station=station, enabled=True)
+        link = ManualObservationStationLink.objects.get(pk=link.pk)
+        self.station_links.append(link)
+
+        # SYNOP mappings were auto-created for the new link; add the direct-entry ones
+        synop_param_ids = set(link.variable_mappings.values_list("adl_parameter_id", flat=True))
+        ManualObservationStationLinkVariableMapping.objects.bulk_create([
+            ManualObservationStationLinkVariableMapping(
+                station_link=link,
+                adl_parameter=param,
+                obs_parameter_unit_id=param.unit_id,
+                show_in_direct_entry=True,
+            )
+            for param in parameters
+            if param.id not in synop_param_ids
+        ])
+        self.vm_ids[link.pk] = list(
+            link.variable_mappings.filter(show_in_direct_entry=True).values_list("pk", flat=True)
+        )
+
+        user = User.objects.create_user(username=unique_name(f"bench-observer-{station.wsi_local}"))
+        self.observers[link.pk] = ManualObservationStationLinkObserver.objects.create(
+            station_link=link, user=user, enabled=True
+        )
+
+        self._build_submissions(link)
+
+    def _build_submissions(self, link):
+        from ..models import CollectorSubmission, CollectorSubmissionRecord, SynopMessage
+        from ..utils import compute_submission_hash
+
+        observer = self.observers[link.pk]
+        vm_ids = self.vm_ids[link.pk]
+        today = dj_timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        submissions = []
+        record_values = []
+        for day in range(self.days, 0, -1):
+            for slot in self.slots:
+                obs_time = today - datetime.timedelta(days=day) + datetime.timedelta(
+                    hours=slot.hour, minutes=slot.minute
+                )
+                revisions = 2 if self.rng.random() < self.revision_rate else 1
+                for revision in range(revisions):
+                    records = [
+                        {"variable_mapping_id": vm_id, "value": round(self.rng.gauss(20, 5), 1)}
+                        for vm_id in vm_ids
+                    ]
+                    submission_time = obs_time + datetime.timedelta(minutes=5 + 30 * revision)
+                    submissions.append(CollectorSubmission(
+                        station_link=link,
+                        observer=observer,
+                        submission_time=submission_time,
+                        observation_time=obs_time,
+                        data={"records": records},
+                        idempotency_key="",
+                        content_hash=compute_submission_hash(
+                            station_link_id=link.pk,
+                            observation_time=obs_time,
+                            records=records,
+                            meta={"revision": revision},
+                        ),
+                    ))
+                    record_values.append(records)
+
+        # bulk_create skips post_save, so no ingestion is triggered for generated data
+        submissions = CollectorSubmission.objects.bulk_create(submissions)
+        if any(sub.pk is None for sub in submissions):
+            # Backends that cannot return ids from a bulk insert
+            submissions = list(
+                CollectorSubmission.objects.filter(station_link=link).order_by("observation_time", "submission_time")
+            )
+
+        CollectorSubmissionRecord.objects.bulk_create([
+            CollectorSubmissionRecord(submission=sub, variable_mapping_id=r["variable_mapping_id"], value=r["value"])
+            for sub, records in zip(submissions, record_values)
+            for r in records
+        ])
+
+        synop_messages = [
+            SynopMessage(
+                station_link=link,
+                submitted_by=observer.user,
+                observation_time=sub.observation_time,
+                raw_message=SYNOP_TEMPLATE.format(
+                    day=sub.observation_time.day, hour=sub.observation_time.hour, station=link.station.wsi_local
+                ),
+                decoded_json={},
+            )
+            for sub in submissions
+            if self.rng.random() < self.synop_rate
+        ]
+        SynopMessage.objects.bulk_create(synop_messages)
+
+        self.counts["submissions"] += len(submissions)
+        self.counts["records"] += sum(len(records) for records in record_values)
+        self.counts["synop_messages"] += len(synop_messages)
+
+
+# ---------------------------------------------------------------------------
+# Measurements
+# ---------------------------------------------------------------------------
+
+def _measure_station_data(network, repeat):
+    from ..models import CollectorSubmissionRecord, ManualObservationStationLink
+    from ..plugins import ADLCollectorPlugin
+
+    plugin = ADLCollectorPlugin()
+    links = list(ManualObservationStationLink.objects.filter(pk__in=[sl.pk for sl in network.station_links]))
+
+    def release():
+        # Each read counts an ingestion attempt and backs the records off;
+        # undo that so every run reads the full backlog
+        CollectorSubmissionRecord.objects.filter(station_link__in=links).update(
+            ingest_attempts=0, next_attempt_at=None
+        )
+
+    yield _timed(
+        "get_station_data",
+        lambda: [list(plugin.get_station_data(sl)) for sl in links],
+        repeat,
+        unit_count=len(links),
+        setup=release,
+    )
+    yield _timed(
+        "get_station_data_batch",
+        lambda: plugin.get_station_data_batch(links),
+        repeat,
+        unit_count=len(links),
+        setup=release,
+    )
+
+    release()
+
+    parcels_by_link = {sl.pk: list(plugin.get_station_data(sl)) for sl in links}
+
+    def save_all():
+        for sl in links:
+            parcels = parcels_by_link[sl.pk]
+            saved = [
+                SimpleNamespace(time=parcel["observation_time"], parameter_id=int(param_id))
+                for parcel in parcels
+                for param_id in parcel
+                if param_id not in ("observation_time", "submission_id")
+            ]
+            plugin.after_save_records(sl, parcels, saved)
+
+    # Marks everything processed, so it can only run once
+    yield _timed("after_save_records", save_all, 1, unit_count=len(links))
+
+
+def _measure_submission_create(network, repeat):
+    from ..serializers import SubmissionInSer
+
+    link = network.station_links[0]
+    observer = network.observers[link.pk]
+    request = SimpleNamespace(user=observer.user)
+    counter = iter(range(10 ** 6))
+
+    def submit():
+        n = next(counter)
+        obs_time = dj_timezone.now().replace(second=0, microsecond=0) - datetime.timedelta(minutes=n + 1)
+        payload = {
+            "submission_time": dj_timezone.now().isoformat(),
+            "observation_time": obs_time.isoformat(),
+            "station_link_id": link.pk,
+            "records": [
+                {"variable_mapping_id": vm_id, "value": network.rng.gauss(20, 5)}
+                for vm_id in network.vm_ids[link.pk]
+            ],
+        }
+        ser = SubmissionInSer(data=payload, context={"request": request})
+        ser.is_valid(raise_exception=True)
+        with transaction.atomic():
+            ser.save()
+
+    yield _timed("SubmissionInSer.create", submit, repeat)
+
+
+def _measure_synop_create(network, repeat):
+    from ..serializers import SynopSubmitInSer
+
+    request = SimpleNamespace(user=network.staff_user)
+    links = iter(network.station_links * repeat)
+
+    def submit():
+        link = next(links)
+        obs_time = dj_timezone.now() - datetime.timedelta(days=1)
+        ser = SynopSubmitInSer(
+            data={
+                "observation_year": obs_time.year,
+                "observation_month": obs_time.month,
+                "raw_message": SYNOP_TEMPLATE.format(
+                    day=obs_time.day, hour=obs_time.hour, station=link.station.wsi_local
+                ),
+            },
+            context={"request": request},
+        )
+        ser.is_valid(raise_exception=True)
+        ser.save()
+
+    yield _timed("SynopSubmitInSer.create", submit, repeat)
+
+
+def _measure_monitoring_views(network, repeat):
+    client = Client()
+    client.force_login(network.staff_user)
+    conn = network.connections[0]
+
+    for name, url_name in (
+            ("monitoring.dashboard", "collector_monitoring"),
+            ("monitoring.submissions", "collector_monitoring_submissions"),
+            ("monitoring.synop", "collector_monitoring_synop"),
+            ("monitoring.observers", "collector_monitoring_observers"),
+            ("monitoring.stations", "collector_monitoring_stations"),
+    ):
+        url = f"{reverse(url_name)}?connection={conn.pk}"
+
+        def get(url=url):
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} returned {response.status_code}")
+
+        yield _timed(name, get, repeat)
+
+
+def _timed(name, fn, repeat, unit_count=None, setup=None):
+    """
+    Run fn repeat times, each after setup (untimed) if given; wall-clock
+    statistics in ms plus the query count of the last run.
+    """
+    durations = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with CaptureQueriesContext(db_connection) as queries:
+            started = time.perf_counter()
+            fn()
+            durations.append((time.perf_counter() - started) * 1000)
+
+    durations.sort()
+    result = {
+        "name": name,
+        "runs": len(durations),
+        "min_ms": round(durations[0], 3),
+        "median_ms": round(statistics.median(durations), 3),
+        "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+        "max_ms": round(durations[-1], 3),
+        "queries": len(queries),
+    }
+    if unit_count:
+        result["units"] = unit_count
+    return result
@@ -0,0 +1,135 @@
+"""
+Row builders for the database tests and the benchmark.
+
+Core models are generated too: their required fields belong to core, so
+create() fills any field it is not given with a synthetic value of the
+field's type.
+"""
+import datetime
+import itertools
+import random
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone as dj_timezone
+
+_sequence = itertools.count(1)
+
+
+def unique_name(prefix):
+    return f"{prefix}-{random.getrandbits(32):08x}"
+
+
+def create(model, **values):
+    """
+    Create a model instance from values, filling every field not in them that
+    has no default, is not nullable and cannot be left empty (or must be
+    unique) with a synthetic value of its type. Foreign keys get an instance
+    created the same way.
+    """
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.name in values or field.attname in values:
+            continue
+        if field.null or field.has_default():
+            continue
+        if field.unique or not field.empty_strings_allowed:
+            values[field.name] = _synthetic_value(model, field)
+    return model.objects.create(**values)
+
+
+def _synthetic_value(model, field):
+    n = next(_sequence)
+    if field.is_relation:
+        return create(field.related_model)
+    if field.choices:
+        return field.choices[0][0]
+    if getattr(field, "geom_type", None):
+        from django.contrib.gis.geos import Point
+
+        return Point(0, 0, srid=getattr(field, "srid", 4326))
+    if getattr(field, "stream_block", None) is not None:
+        return []
+    if isinstance(field, models.BooleanField):
+        return False
+    if isinstance(field, (models.IntegerField, models.FloatField, models.DecimalField)):
+        return n
+    if isinstance(field, models.DateTimeField):
+        return dj_timezone.now()
+    if isinstance(field, models.DateField):
+        return dj_timezone.now().date()
+    if isinstance(field, models.TimeField):
+        return datetime.time(0, 0)
+    if isinstance(field, models.UUIDField):
+        return uuid.uuid4()
+    if isinstance(field, models.JSONField):
+        return {}
+    if isinstance(field, (models.CharField, models.TextField)):
+        return f"synthetic-{field.name}-{n}"[:field.max_length or None]
+    raise TypeError(f"No synthetic value for {model.__name__}.{field.name} ({type(field).__name__}).")
+
+
+def create_station_link(parameters=2, connection=None):
+    """
+    An enabled ManualObservationStationLink on a new station, with a direct-entry
+    variable mapping for each of parameters new DataParameters. Returns
+    (link, [variable mapping, ...]).
+    """
+    from adl.core.models import DataParameter, Station, Unit
+    from ..models import ManualObservationConnection, ManualObservationStationLink
+
+    connection = connection or create(ManualObservationConnection, name=unique_name("test-connection"))
+    station = create(Station, name=unique_name("test-station"), wsi_local=str(10000 + next(_sequence) % 90000))
+    link = create(ManualObservationStationLink, network_connection=connection, station=station, enabled=True)
+    link = ManualObservationStationLink.objects.get(pk=link.pk)
+
+    unit = create(Unit, name=unique_name("test-unit"))
+    mappings = [
+        create_variable_mapping(link, create(DataParameter, name=unique_name("test-parameter"), unit=unit))
+        for _ in range(parameters)
+    ]
+    return link, mappings
+
+
+def create_variable_mapping(link, adl_parameter):
+    """A direct-entry variable mapping of link to adl_parameter, in the parameter's own unit."""
+    from ..models import ManualObservationStationLinkVariableMapping
+
+    return ManualObservationStationLinkVariableMapping.objects.create(
+        station_link=link,
+        adl_parameter=adl_parameter,
+        obs_parameter_unit_id=adl_parameter.unit_id,
+        show_in_direct_entry=True,
+    )
+
+
+def create_observer(link, user=None, enabled=True):
+    from ..models import ManualObservationStationLinkObserver
+
+    user = user or get_user_model().objects.create_user(username=unique_name("test-observer"))
+    return ManualObservationStationLinkObserver.objects.create(station_link=link, user=user, enabled=enabled)
+
+
+def create_submission(link, observation_time, values, observer=None, submission_time=None, **fields):
+    """
+    A CollectorSubmission of link at observation_time with one record per
+    (variable mapping, value) in values, created as the submit endpoints do.
+    Returns (submission, [record, ...]).
+    """
+    from ..models import CollectorSubmission, CollectorSubmissionRecord
+
+    values = list(values)
+    submission = CollectorSubmission.objects.create(
+        station_link=link,
+        observer=observer or create_observer(link),
+        submission_time=submission_time or observation_time + datetime.timedelta(minutes=5),
+        observation_time=observation_time,
+        data={"records": [{"variable_mapping_id": vm.pk, "value": value} for vm, value in values]},
+        content_hash=uuid.uuid4().hex,
+        **fields,
+    )
+    records = CollectorSubmissionRecord.objects.bulk_create([
+        CollectorSubmissionRecord(submission=submission, variable_mapping=vm, value=value)
+        for vm, value in values
+    ])
+    return submission, records
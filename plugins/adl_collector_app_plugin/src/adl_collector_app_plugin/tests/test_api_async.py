@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+from django.utils import timezone as dj_timezone
+
+from adl_collector_app_plugin.models import CollectorSubmission, CollectorSubmissionRecord, SubmissionIdempotencyKey
+
+from .factories import create_observer, create_station_link, unique_name
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+SESSION_AUTH = {"DEFAULT_AUTHENTICATION_CLASSES": ["rest_framework.authentication.SessionAuthentication"]}
+
+T1 = datetime(2025, 9, 1, 6, tzinfo=timezone.utc)
+
+urlpatterns = [
+    path("api/collector/", include("adl_collector_app_plugin.urls")),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, CACHES=LOCMEM_CACHE, REST_FRAMEWORK=SESSION_AUTH)
+class SubmitManualObservationAsyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username=unique_name("test-observer"))
+        self.link, (self.temperature, self.pressure) = create_station_link()
+        create_observer(self.link, user=self.user)
+        self.url = reverse("adl_collector_app_plugin:async_manual_obs_submit")
+
+    def _payload(self, value=21.5, hours=0, **fields):
+        observation_time = T1 + timedelta(hours=hours)
+        return {
+            "submission_time": (observation_time + timedelta(minutes=5)).isoformat(),
+            "observation_time": observation_time.isoformat(),
+            "station_link_id": self.link.pk,
+            "records": [{"variable_mapping_id": self.temperature.pk, "value": value}],
+            **fields,
+        }
+
+    async def _post(self, payload):
+        await self.async_client.aforce_login(self.user)
+        return await self.async_client.post(self.url, payload, content_type="application/json")
+
+    # -----------------------------------------------------------------------
+    # Submission
+    # -----------------------------------------------------------------------
+
+    async def test_stores_a_new_submission(self):
+        response = await self._post(self._payload(idempotency_key="k-1"))
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual((body["status"], body["idempotent"]), ("accepted", False))
+        submission = await CollectorSubmission.objects.aget()
+        self.assertEqual(body["id"], submission.pk)
+        self.assertEqual(await CollectorSubmissionRecord.objects.filter(submission=submission).acount(), 1)
+        key = await SubmissionIdempotencyKey.objects.aget(user=self.user, key="k-1")
+        self.assertEqual((key.submission_id, key.response_status), (submission.pk, 201))
+
+    async def test_a_duplicate_without_a_key_is_answered_idempotently(self):
+        first = await self._post(self._payload())
+        again = await self._post(self._payload())
+
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()["id"], first.json()["id"])
+        self.assertTrue(again.json()["idempotent"])
+        self.assertNotIn("Idempotent-Replayed", again.headers)
+
+    async def test_an_invalid_payload_is_refused(self):
+        response = await self._post(self._payload(value="warm"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("records", response.json())
+        self.assertFalse(await CollectorSubmission.objects.aexists())
+
+    async def test_an_anonymous_request_is_refused(self):
+        response = await self.async_client.post(self.url, self._payload(), content_type="application/json")
+        self.assertEqual(response.status_code, 403)
+
+    # -----------------------------------------------------------------------
+    # Replay
+    # -----------------------------------------------------------------------
+
+    async def test_a_used_key_replays_the_stored_response(self):
+        first = await self._post(self._payload(idempotency_key="k-1"))
+        # Replayed before validation, even though the values differ
+        replay = await self._post(self._payload(value=99.0, idempotency_key="k-1"))
+
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(await CollectorSubmission.objects.acount(), 1)
+
+    async def test_an_expired_key_is_not_replayed(self):
+        first = await self._post(self._payload(idempotency_key="k-1"))
+        await SubmissionIdempotencyKey.objects.aupdate(expires_at=dj_timezone.now() - timedelta(seconds=1))
+
+        again = await self._post(self._payload(idempotency_key="k-1"))
+        self.assertNotIn("Idempotent-Replayed", again.headers)
+        self.assertEqual((again.status_code, again.json()["id"]), (200, first.json()["id"]))
+
+    # -----------------------------------------------------------------------
+    # Throttling
+    # -----------------------------------------------------------------------
+
+    @override_settings(ADL_COLLECTOR_OBSERVER_SUBMISSION_BURST=1)
+    async def test_over_the_limit_is_throttled(self):
+        self.assertEqual((await self._post(self._payload())).status_code, 201)
+
+        response = await self._post(self._payload(hours=1))
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers["Retry-After"]), 1)
+        self.assertEqual(await CollectorSubmission.objects.acount(), 1)
+
+    @override_settings(ADL_COLLECTOR_OBSERVER_SUBMISSION_BURST=2)
+    async def test_a_replay_is_answered_before_throttling(self):
+        first = await self._post(self._payload(idempotency_key="k-1"))
+
+        for _ in range(2):
+            replay = await self._post(self._payload(idempotency_key="k-1"))
+            self.assertEqual((replay.status_code, replay.json()), (201, first.json()))
+        # The replays took no tokens, so one is left for a new submission
+        self.assertEqual((await self._post(self._payload(hours=1))).status_code, 201)
+        self.assertEqual((await self._post(self._payload(hours=2))).status_code, 429)
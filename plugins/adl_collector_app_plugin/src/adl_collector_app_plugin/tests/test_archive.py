@@ -0,0 +1,150 @@
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone as dj_timezone
+
+from adl_collector_app_plugin.archive import archive_processed_records
+from adl_collector_app_plugin.models import ArchivedSubmissionRecord, CollectorSubmission, CollectorSubmissionRecord
+
+from .factories import create_station_link, create_submission
+
+T1 = datetime(2025, 9, 1, 6, tzinfo=timezone.utc)
+
+
+def _process(records, days_ago, error_message=""):
+    CollectorSubmissionRecord.objects.filter(pk__in=[record.pk for record in records]).update(
+        is_processed=True,
+        processed_at=dj_timezone.now() - timedelta(days=days_ago),
+        error_message=error_message,
+    )
+
+
+def _live_pks():
+    return set(CollectorSubmissionRecord.objects.values_list("pk", flat=True))
+
+
+def _archived_pks():
+    return set(ArchivedSubmissionRecord.objects.values_list("pk", flat=True))
+
+
+# ---------------------------------------------------------------------------
+# archive_processed_records
+# ---------------------------------------------------------------------------
+
+class ArchiveProcessedRecordsTests(TestCase):
+    def setUp(self):
+        self.link, (self.temperature, self.pressure) = create_station_link()
+        self.submission, self.records = create_submission(
+            self.link, T1, [(self.temperature, 21.5), (self.pressure, 1013.2)]
+        )
+
+    def test_moves_old_processed_records_keeping_their_pks(self):
+        _process(self.records, days_ago=100, error_message="Above the range limit")
+
+        self.assertEqual(archive_processed_records(older_than_days=90), 2)
+
+        self.assertEqual(_live_pks(), set())
+        self.assertEqual(_archived_pks(), {record.pk for record in self.records})
+        archived = ArchivedSubmissionRecord.objects.get(pk=self.records[0].pk)
+        self.assertEqual(
+            (archived.submission_id, archived.station_link_id, archived.variable_mapping_id, archived.value,
+             archived.observation_time, archived.error_message),
+            (self.submission.pk, self.link.pk, self.temperature.pk, 21.5, T1, "Above the range limit"),
+        )
+
+    def test_leaves_pending_and_recent_records_live(self):
+        _, (recent,) = create_submission(self.link, T1 + timedelta(hours=1), [(self.temperature, 22.0)])
+        _, (test_record,) = create_submission(
+            self.link, T1 + timedelta(hours=2), [(self.temperature, 23.0)], is_test_submission=True
+        )
+        _process([self.records[0]], days_ago=100)
+        _process([recent], days_ago=10)
+
+        self.assertEqual(archive_processed_records(older_than_days=90), 1)
+        self.assertEqual(_live_pks(), {self.records[1].pk, recent.pk, test_record.pk})
+
+    def test_resumes_where_a_bounded_run_stopped(self):
+        _process(self.records, days_ago=100)
+
+        self.assertEqual(archive_processed_records(older_than_days=90, batch_size=1, max_batches=1), 1)
+        self.assertEqual(_archived_pks(), {self.records[0].pk})
+
+        self.assertEqual(archive_processed_records(older_than_days=90, batch_size=1), 1)
+        self.assertEqual(_archived_pks(), {record.pk for record in self.records})
+
+    def test_a_non_positive_age_archives_nothing(self):
+        _process(self.records, days_ago=100)
+        self.assertEqual(archive_processed_records(older_than_days=0), 0)
+        self.assertEqual(_live_pks(), {record.pk for record in self.records})
+
+
+# ---------------------------------------------------------------------------
+# CollectorSubmission.all_records
+# ---------------------------------------------------------------------------
+
+class AllRecordsTests(TestCase):
+    def setUp(self):
+        self.link, (self.temperature, self.pressure) = create_station_link()
+        self.submission, self.records = create_submission(
+            self.link, T1, [(self.temperature, 21.5), (self.pressure, 1013.2)]
+        )
+
+    def test_returns_live_and_archived_records(self):
+        _process([self.records[0]], days_ago=100)
+        archive_processed_records(older_than_days=90)
+
+        records = CollectorSubmission.objects.get(pk=self.submission.pk).all_records()
+        self.assertEqual(
+            sorted((record.pk, type(record), record.value) for record in records),
+            [
+                (self.records[0].pk, ArchivedSubmissionRecord, 21.5),
+                (self.records[1].pk, CollectorSubmissionRecord, 1013.2),
+            ],
+        )
+        self.assertTrue(all(record.is_processed for record in records if isinstance(record, ArchivedSubmissionRecord)))
+
+    def test_prefetched_tiers_need_no_queries(self):
+        _process([self.records[0]], days_ago=100)
+        archive_processed_records(older_than_days=90)
+
+        submission = CollectorSubmission.objects.prefetch_related("records", "archived_records").get(
+            pk=self.submission.pk
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(len(submission.all_records()), 2)
+
+
+@unittest.skipUnless(connection.features.has_select_for_update_skip_locked, "needs SELECT ... SKIP LOCKED")
+class ArchiveLockingTests(TransactionTestCase):
+    def setUp(self):
+        self.link, (temperature, pressure) = create_station_link()
+        _, self.records = create_submission(self.link, T1, [(temperature, 21.5), (pressure, 1013.2)])
+        _process(self.records, days_ago=100)
+
+    def test_skips_records_another_transaction_has_locked(self):
+        locked, free = self.records
+        result = {}
+
+        def concurrent_archive():
+            try:
+                result["moved"] = archive_processed_records(older_than_days=90)
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            # An admin edit (or another run) holds this record
+            list(CollectorSubmissionRecord.objects.select_for_update().filter(pk=locked.pk))
+            thread = threading.Thread(target=concurrent_archive)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(result["moved"], 1)
+        self.assertEqual(_archived_pks(), {free.pk})
+        self.assertEqual(_live_pks(), {locked.pk})
+
+        # The next run picks the released record up under its own pk
+        self.assertEqual(archive_processed_records(older_than_days=90), 1)
+        self.assertEqual(_archived_pks(), {locked.pk, free.pk})
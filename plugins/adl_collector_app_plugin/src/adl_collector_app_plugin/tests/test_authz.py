@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from adl_collector_app_plugin.authz import get_observer_authz, is_active
+from adl_collector_app_plugin.serializers import SubmissionInSer
+
+from .factories import create_observer, create_station_link, unique_name
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+T1 = datetime(2025, 9, 1, 6, tzinfo=timezone.utc)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ObserverAuthzTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username=unique_name("test-observer"))
+        self.link, (self.temperature, self.pressure) = create_station_link()
+        self.observer = create_observer(self.link, user=self.user)
+
+    def _grant(self):
+        return get_observer_authz(self.user).get(self.link.pk)
+
+    def _validate(self, vm=None):
+        serializer = SubmissionInSer(
+            data={
+                "submission_time": (T1 + timedelta(minutes=5)).isoformat(),
+                "observation_time": T1.isoformat(),
+                "station_link_id": self.link.pk,
+                "records": [{"variable_mapping_id": (vm or self.temperature).pk, "value": 21.5}],
+            },
+            context={"request": SimpleNamespace(user=self.user)},
+        )
+        return serializer.is_valid(), serializer.errors
+
+    # -----------------------------------------------------------------------
+    # Cached map
+    # -----------------------------------------------------------------------
+
+    def test_grants_hold_plain_values(self):
+        self.assertEqual(
+            self._grant(),
+            {
+                "observer_id": self.observer.pk,
+                "observer_enabled": True,
+                "station_link_enabled": True,
+                "network_connection_id": self.link.network_connection_id,
+                "station_name": self.link.station.name,
+                "direct_entry_vm_ids": frozenset({self.temperature.pk, self.pressure.pk}),
+            },
+        )
+
+    def test_an_unchanged_map_is_served_from_the_cache(self):
+        self._grant()
+        with self.assertNumQueries(0):
+            self.assertTrue(is_active(self._grant()))
+
+    def test_an_enabled_observer_row_wins_over_a_disabled_one(self):
+        create_observer(self.link, user=self.user, enabled=False)
+        self.assertEqual(self._grant()["observer_id"], self.observer.pk)
+
+    def test_submission_validates_against_the_map(self):
+        self.assertEqual(self._validate(), (True, {}))
+
+    # -----------------------------------------------------------------------
+    # Revocation takes effect on the next request
+    # -----------------------------------------------------------------------
+
+    def test_disabling_the_observer(self):
+        self._grant()
+        self.observer.enabled = False
+        self.observer.save()
+
+        self.assertFalse(is_active(self._grant()))
+        valid, errors = self._validate()
+        self.assertFalse(valid)
+        self.assertEqual(errors["non_field_errors"], ["User is not an enabled observer for this station link."])
+
+    def test_deleting_the_observer(self):
+        self._grant()
+        self.observer.delete()
+
+        self.assertIsNone(self._grant())
+        self.assertFalse(self._validate()[0])
+
+    def test_disabling_the_station_link(self):
+        self._grant()
+        self.link.enabled = False
+        self.link.save()
+
+        self.assertFalse(is_active(self._grant()))
+
+    def test_taking_a_variable_mapping_out_of_direct_entry(self):
+        self._grant()
+        self.pressure.show_in_direct_entry = False
+        self.pressure.save()
+
+        self.assertEqual(self._grant()["direct_entry_vm_ids"], frozenset({self.temperature.pk}))
+        self.assertFalse(self._validate(self.pressure)[0])
+        self.assertTrue(self._validate(self.temperature)[0])
@@ -0,0 +1,25 @@
+"""
+Runs the ingestion benchmark (benchmark.py) against the test database.
+
+Skipped unless ADL_COLLECTOR_BENCHMARK names the JSON file to write the
+results to. ADL_COLLECTOR_BENCHMARK_PARAMS may hold a JSON object of
+run_benchmark() arguments, e.g. {"station_links": 50, "days": 30}.
+"""
+import json
+import os
+import unittest
+
+from django.test import TestCase
+
+from .benchmark import run_benchmark
+
+OUTPUT = os.getenv("ADL_COLLECTOR_BENCHMARK")
+
+
+@unittest.skipUnless(OUTPUT, "set ADL_COLLECTOR_BENCHMARK=<results.json> to run the benchmark")
+class CollectorBenchmark(TestCase):
+    def test_benchmark(self):
+        params = json.loads(os.getenv("ADL_COLLECTOR_BENCHMARK_PARAMS") or "{}")
+        results = run_benchmark(log=print, **params)
+        with open(OUTPUT, "w") as f:
+            f.write(json.dumps(results, indent=2) + "\n")
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from adl_collector_app_plugin.models import CollectorSubmission, CollectorSubmissionRecord, SubmissionIdempotencyKey
+from adl_collector_app_plugin.views import SubmitManualObservationBulk
+
+from .factories import create_observer, create_station_link, unique_name
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+T1 = datetime(2025, 9, 1, 6, tzinfo=timezone.utc)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BulkSubmissionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username=unique_name("test-observer"))
+        self.link, (self.temperature, self.pressure) = create_station_link()
+        self.observer = create_observer(self.link, user=self.user)
+
+    def _item(self, values, hours=0, **fields):
+        observation_time = T1 + timedelta(hours=hours)
+        return {
+            "submission_time": (observation_time + timedelta(minutes=5)).isoformat(),
+            "observation_time": observation_time.isoformat(),
+            "station_link_id": self.link.pk,
+            "records": [{"variable_mapping_id": vm.pk, "value": value} for vm, value in values],
+            **fields,
+        }
+
+    def _post(self, items):
+        request = APIRequestFactory().post("/", {"submissions": items}, format="json")
+        force_authenticate(request, user=self.user)
+        return SubmitManualObservationBulk.as_view()(request)
+
+    def _results(self, items):
+        response = self._post(items)
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+
+# ---------------------------------------------------------------------------
+# Per-item validation
+# ---------------------------------------------------------------------------
+
+class BulkValidationTests(BulkSubmissionTestCase):
+    def test_rejects_bad_items_and_stores_the_rest(self):
+        unobserved, (unobserved_vm, _) = create_station_link(connection=self.link.network_connection)
+        items = [
+            self._item([(self.temperature, 21.5)]),
+            self._item([(self.temperature, "warm")], hours=1),
+            self._item([(unobserved_vm, 21.5)], hours=2, station_link_id=unobserved.pk),
+            self._item([(self.temperature, 21.5)], hours=3, station_link_id=0),
+            self._item([(unobserved_vm, 21.5)], hours=4),
+            self._item([(self.pressure, 1013.2)], hours=5),
+        ]
+
+        results = self._results(items)
+
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["accepted", "rejected", "rejected", "rejected", "rejected", "accepted"],
+        )
+        self.assertIn("records", results[1]["errors"])
+        self.assertEqual(
+            [result["errors"]["non_field_errors"] for result in results[2:5]],
+            [
+                ["User is not an enabled observer for this station link."],
+                ["Invalid station_link_id."],
+                ["One or more variable_mapping_id values are invalid or not available for direct entry."],
+            ],
+        )
+        self.assertEqual(
+            set(CollectorSubmission.objects.values_list("pk", flat=True)),
+            {results[0]["id"], results[5]["id"]},
+        )
+
+    def test_a_disabled_observer_is_rejected(self):
+        self.observer.enabled = False
+        self.observer.save()
+
+        (result,) = self._results([self._item([(self.temperature, 21.5)])])
+        self.assertEqual(result["status"], "rejected")
+        self.assertFalse(CollectorSubmission.objects.exists())
+
+    def test_an_empty_batch_is_refused(self):
+        self.assertEqual(self._post([]).status_code, 400)
+
+
+# ---------------------------------------------------------------------------
+# Per-item responses
+# ---------------------------------------------------------------------------
+
+class BulkResponseTests(BulkSubmissionTestCase):
+    def test_accepted_items_are_stored_with_their_records(self):
+        (result,) = self._results([self._item([(self.temperature, 21.5), (self.pressure, 1013.2)])])
+
+        submission = CollectorSubmission.objects.get()
+        self.assertEqual(
+            result,
+            {
+                "station_link_id": self.link.pk,
+                "status": "accepted",
+                "idempotent": False,
+                "id": submission.pk,
+                "observation_time": T1,
+                "is_test_submission": False,
+            },
+        )
+        self.assertEqual(
+            sorted(CollectorSubmissionRecord.objects.filter(submission=submission).values_list("value", flat=True)),
+            [21.5, 1013.2],
+        )
+
+    def test_a_duplicate_in_the_batch_points_at_the_first(self):
+        item = self._item([(self.temperature, 21.5)])
+        first, second = self._results([item, dict(item)])
+
+        self.assertEqual((first["idempotent"], second["idempotent"]), (False, True))
+        self.assertEqual(first["id"], second["id"])
+        self.assertEqual(CollectorSubmission.objects.count(), 1)
+
+    def test_a_duplicate_of_a_stored_submission_points_at_it(self):
+        item = self._item([(self.temperature, 21.5)])
+        (stored,) = self._results([item])
+        (again,) = self._results([item])
+
+        self.assertTrue(again["idempotent"])
+        self.assertEqual(again["id"], stored["id"])
+        self.assertEqual(CollectorSubmission.objects.count(), 1)
+
+    def test_a_used_idempotency_key_replays_its_result(self):
+        (stored,) = self._results([self._item([(self.temperature, 21.5)], idempotency_key="queue-1")])
+        key = SubmissionIdempotencyKey.objects.get(user=self.user, key="queue-1")
+        self.assertEqual((key.submission_id, key.response_status), (stored["id"], 201))
+
+        # Replayed without validation, even though the values differ
+        (replayed,) = self._results([self._item([(self.temperature, 99.0)], idempotency_key="queue-1")])
+        self.assertEqual(replayed["id"], stored["id"])
+        self.assertFalse(replayed["idempotent"])
+        self.assertEqual(CollectorSubmission.objects.count(), 1)
+
+    def test_results_follow_request_order(self):
+        items = [self._item([(self.temperature, value)], hours=hours) for hours, value in ((2, 23.0), (0, 21.0), (1, 22.0))]
+        results = self._results(items)
+
+        self.assertEqual(
+            [result["observation_time"] for result in results],
+            [T1 + timedelta(hours=2), T1, T1 + timedelta(hours=1)],
+        )
+        self.assertEqual(len({result["id"] for result in results}), 3)
+
+
+# ---------------------------------------------------------------------------
+# Concurrent requests
+# ---------------------------------------------------------------------------
+
+class BulkConcurrencyTests(BulkSubmissionTestCase):
+    def test_a_submission_stored_concurrently_is_returned_as_a_duplicate(self):
+        item = self._item([(self.temperature, 21.5)])
+        (stored,) = self._results([item])
+
+        real_filter = CollectorSubmission.objects.filter
+        calls = []
+
+        def filter_missing_the_stored_submission(*args, **kwargs):
+            # The first duplicate lookup runs before the concurrent request commits
+            calls.append(kwargs)
+            qs = real_filter(*args, **kwargs)
+            return qs.none() if len(calls) == 1 else qs
+
+        with mock.patch.object(CollectorSubmission.objects, "filter", side_effect=filter_missing_the_stored_submission):
+            again, _ = self._results([item, self._item([(self.pressure, 1013.2)], hours=1)])
+
+        # The insert hit the unique constraint and the retry found the stored row
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((again["id"], again["idempotent"]), (stored["id"], True))
+        self.assertEqual(CollectorSubmission.objects.count(), 2)
+        self.assertEqual(CollectorSubmissionRecord.objects.count(), 2)
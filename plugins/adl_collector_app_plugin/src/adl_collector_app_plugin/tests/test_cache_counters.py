@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from adl_collector_app_plugin.cache_counters import bump_counter, get_counter, get_counters
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CacheCounterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counter_is_stable_until_bumped(self):
+        value = get_counter("adl_collector:test_counter")
+        self.assertEqual(get_counter("adl_collector:test_counter"), value)
+        bump_counter("adl_collector:test_counter")
+        self.assertEqual(get_counter("adl_collector:test_counter"), value + 1)
+
+    def test_evicted_counter_never_comes_back_lower(self):
+        bump_counter("adl_collector:test_counter")
+        value = get_counter("adl_collector:test_counter")
+        cache.delete("adl_collector:test_counter")
+        self.assertGreater(get_counter("adl_collector:test_counter"), value)
+
+    def test_counters_match_single_lookups(self):
+        bump_counter("adl_collector:test_counter:1")
+        values = get_counters(["adl_collector:test_counter:1", "adl_collector:test_counter:2"])
+        self.assertEqual(values, [get_counter("adl_collector:test_counter:1"),
+                                  get_counter("adl_collector:test_counter:2")])
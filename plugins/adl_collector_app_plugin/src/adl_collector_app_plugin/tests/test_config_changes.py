@@ -0,0 +1,39 @@
+import pytest
+
+from adl_collector_app_plugin.config_changes import MAX_CURSOR_GAPS, decode_config_cursor, encode_config_cursor
+
+
+# ---------------------------------------------------------------------------
+# encode_config_cursor / decode_config_cursor
+# ---------------------------------------------------------------------------
+
+def test_cursor_without_gaps_is_the_latest_key():
+    assert encode_config_cursor(42) == "42"
+    assert decode_config_cursor("42") == (42, [])
+
+
+def test_cursor_round_trips_its_gaps():
+    gaps = [(3, 3), (7, 9)]
+    assert encode_config_cursor(12, gaps) == "12:3,7-9"
+    assert decode_config_cursor(encode_config_cursor(12, gaps)) == (12, gaps)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "abc",
+    "-1",
+    "12:x",
+    "12:0",
+    "12:13",
+    "12:9-7",
+    "12:3-",
+])
+def test_bad_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_config_cursor(cursor)
+
+
+def test_cursor_with_too_many_gaps_is_rejected():
+    gaps = ",".join(str(pk) for pk in range(1, 2 * MAX_CURSOR_GAPS + 4, 2))
+    with pytest.raises(ValueError):
+        decode_config_cursor(f"{2 * MAX_CURSOR_GAPS + 4}:{gaps}")
@@ -0,0 +1,69 @@
+import copy
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from adl_collector_app_plugin import decode_cache
+from adl_collector_app_plugin.decode_cache import decode_fm12_cached, get_cached_decodes, normalize_fm12
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+    "synop_decodes": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "synop_decodes"},
+}
+
+MESSAGE = "AAXX 12064 63740 32970 20000 10261 20180="
+DECODED = {"station_id": {"value": "63740"}, "obs_time": {"day": {"value": 12}, "hour": {"value": 6}}}
+
+
+@override_settings(CACHES=CACHES, ADL_COLLECTOR_SYNOP_DECODE_CACHE="synop_decodes")
+class DecodeCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches["synop_decodes"].clear()
+        decode_cache._lru.clear()
+        patcher = mock.patch.object(decode_cache, "decode_fm12", side_effect=lambda raw: copy.deepcopy(DECODED))
+        self.decode = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(decode_cache._lru.clear)
+
+    def test_miss_decodes_and_hit_does_not(self):
+        self.assertEqual(decode_fm12_cached(MESSAGE), DECODED)
+        self.assertEqual(decode_fm12_cached(MESSAGE), DECODED)
+        self.decode.assert_called_once_with(MESSAGE)
+
+    def test_whitespace_variants_share_an_entry(self):
+        decode_fm12_cached(MESSAGE)
+        spaced = "  AAXX 12064\r\n63740  32970 20000\n\t10261 20180=\n"
+        self.assertEqual(normalize_fm12(spaced), MESSAGE)
+        self.assertEqual(decode_fm12_cached(spaced), DECODED)
+        self.decode.assert_called_once_with(MESSAGE)
+
+    def test_message_is_decoded_normalized(self):
+        decode_fm12_cached("AAXX 12064\n63740 32970 20000 10261 20180=")
+        self.decode.assert_called_once_with(MESSAGE)
+
+    def test_callers_get_their_own_copy(self):
+        decode_fm12_cached(MESSAGE)["station_id"]["value"] = "changed"
+        self.assertEqual(decode_fm12_cached(MESSAGE), DECODED)
+
+    def test_failed_decodes_are_not_cached(self):
+        self.decode.side_effect = ValueError("Bad message")
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                decode_fm12_cached(MESSAGE)
+        self.assertEqual(self.decode.call_count, 2)
+        self.assertEqual(get_cached_decodes([MESSAGE]), {})
+
+    def test_shared_cache_serves_other_processes(self):
+        decode_fm12_cached(MESSAGE)
+        # Another worker process starts with an empty LRU
+        decode_cache._lru.clear()
+        self.assertEqual(get_cached_decodes([MESSAGE]), {MESSAGE: DECODED})
+        self.decode.assert_called_once()
+
+    @override_settings(ADL_COLLECTOR_SYNOP_DECODE_CACHE="")
+    def test_empty_alias_keeps_decodes_in_process(self):
+        decode_fm12_cached(MESSAGE)
+        self.assertEqual(len(decode_cache._lru), 1)
+        decode_cache._lru.clear()
+        self.assertEqual(get_cached_decodes([MESSAGE]), {})
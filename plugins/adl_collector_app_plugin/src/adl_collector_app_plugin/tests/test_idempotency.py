@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone as dj_timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from adl_collector_app_plugin.models import CollectorSubmission, SubmissionIdempotencyKey
+from adl_collector_app_plugin.tasks import prune_idempotency_keys_task
+from adl_collector_app_plugin.views import SubmitManualObservation
+
+from .factories import create_observer, create_station_link, create_submission, unique_name
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+T1 = datetime(2025, 9, 1, 6, tzinfo=timezone.utc)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IdempotencyTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username=unique_name("test-observer"))
+        self.link, (self.temperature, _) = create_station_link()
+        self.observer = create_observer(self.link, user=self.user)
+
+    def _payload(self, value=21.5, key="k-1"):
+        return {
+            "idempotency_key": key,
+            "submission_time": (T1 + timedelta(minutes=5)).isoformat(),
+            "observation_time": T1.isoformat(),
+            "station_link_id": self.link.pk,
+            "records": [{"variable_mapping_id": self.temperature.pk, "value": value}],
+        }
+
+    def _post(self, payload, user=None):
+        request = APIRequestFactory().post("/", payload, format="json")
+        force_authenticate(request, user=user or self.user)
+        return SubmitManualObservation.as_view()(request)
+
+    def _expire_keys(self):
+        SubmissionIdempotencyKey.objects.update(expires_at=dj_timezone.now() - timedelta(seconds=1))
+
+
+# ---------------------------------------------------------------------------
+# Storing and replaying responses
+# ---------------------------------------------------------------------------
+
+class SubmissionIdempotencyTests(IdempotencyTestCase):
+    def test_stores_the_response_under_the_key(self):
+        response = self._post(self._payload())
+
+        self.assertEqual(response.status_code, 201)
+        stored = SubmissionIdempotencyKey.objects.get(user=self.user, key="k-1")
+        self.assertEqual(
+            (stored.submission_id, stored.response_status, stored.response_body["id"]),
+            (response.data["id"], 201, response.data["id"]),
+        )
+        self.assertGreater(stored.expires_at, dj_timezone.now())
+
+    def test_a_retry_replays_the_stored_response(self):
+        first = self._post(self._payload())
+        retry = self._post(self._payload())
+
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.data["id"], first.data["id"])
+        self.assertEqual(CollectorSubmission.objects.count(), 1)
+
+    def test_a_different_payload_under_a_used_key_gets_the_first_response(self):
+        first = self._post(self._payload(value=21.5))
+        conflicting = self._post(self._payload(value=30.0))
+
+        self.assertEqual(conflicting["Idempotent-Replayed"], "true")
+        self.assertEqual(conflicting.data["id"], first.data["id"])
+        self.assertEqual(CollectorSubmission.objects.count(), 1)
+
+    def test_a_duplicate_under_a_new_key_is_remembered_as_such(self):
+        first = self._post(self._payload(key="k-1"))
+        duplicate = self._post(self._payload(key="k-2"))
+
+        self.assertEqual((duplicate.status_code, duplicate.data["id"]), (200, first.data["id"]))
+        stored = SubmissionIdempotencyKey.objects.get(user=self.user, key="k-2")
+        self.assertEqual((stored.submission_id, stored.response_status), (first.data["id"], 200))
+
+    def test_keys_are_per_user(self):
+        other = get_user_model().objects.create_user(username=unique_name("test-observer"))
+        create_observer(self.link, user=other)
+        self._post(self._payload())
+
+        response = self._post(self._payload(), user=other)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(SubmissionIdempotencyKey.objects.filter(key="k-1").count(), 2)
+
+
+# ---------------------------------------------------------------------------
+# Expiry
+# ---------------------------------------------------------------------------
+
+class IdempotencyKeyExpiryTests(IdempotencyTestCase):
+    def test_an_expired_key_falls_back_to_the_content_hash(self):
+        first = self._post(self._payload())
+        self._expire_keys()
+
+        retry = self._post(self._payload())
+        self.assertNotIn("Idempotent-Replayed", retry)
+        self.assertEqual((retry.status_code, retry.data["id"]), (200, first.data["id"]))
+
+    def test_an_expired_key_can_be_used_again(self):
+        self._post(self._payload(value=21.5))
+        self._expire_keys()
+
+        response = self._post(self._payload(value=30.0))
+        self.assertEqual(response.status_code, 201)
+        stored = SubmissionIdempotencyKey.objects.get(user=self.user, key="k-1")
+        self.assertEqual(stored.submission_id, response.data["id"])
+        self.assertGreater(stored.expires_at, dj_timezone.now())
+
+    def test_prune_task_deletes_only_expired_keys(self):
+        submission, _ = create_submission(self.link, T1, [(self.temperature, 21.5)], observer=self.observer)
+        now = dj_timezone.now()
+        for key, expires_at in (("expired", now - timedelta(seconds=1)), ("live", now + timedelta(days=1))):
+            SubmissionIdempotencyKey.objects.create(
+                user=self.user, key=key, submission=submission,
+                response_status=201, response_body={}, expires_at=expires_at,
+            )
+
+        prune_idempotency_keys_task()
+
+        self.assertEqual(list(SubmissionIdempotencyKey.objects.values_list("key", flat=True)), ["live"])
+
+    def test_prune_expired_returns_the_count(self):
+        submission, _ = create_submission(self.link, T1, [(self.temperature, 21.5)], observer=self.observer)
+        SubmissionIdempotencyKey.objects.create(
+            user=self.user, key="expired", submission=submission, response_status=201, response_body={},
+            expires_at=dj_timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(SubmissionIdempotencyKey.prune_expired(), 1)
+        self.assertEqual(SubmissionIdempotencyKey.prune_expired(), 0)
@@ -0,0 +1,204 @@
+import threading
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone as dj_timezone
+
+from adl_collector_app_plugin.ingestion import DISPATCHED_RETENTION, drain_ingestion_outbox, enqueue_ingestion
+from adl_collector_app_plugin.models import IngestionOutboxEntry
+
+from .factories import create_station_link
+
+
+def _pending():
+    return set(IngestionOutboxEntry.objects.filter(dispatched_at__isnull=True).values_list("station_link_id", flat=True))
+
+
+class OutboxTestCase(TestCase):
+    def setUp(self):
+        self.link, _ = create_station_link(parameters=0)
+        self.sibling, _ = create_station_link(parameters=0, connection=self.link.network_connection)
+        self.other, _ = create_station_link(parameters=0)
+        IngestionOutboxEntry.objects.all().delete()
+        patcher = mock.patch("adl.core.tasks.process_station_link_batch")
+        self.task = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _enqueue(self, *links):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_ingestion((link.network_connection_id, link.pk) for link in links)
+
+
+# ---------------------------------------------------------------------------
+# enqueue_ingestion
+# ---------------------------------------------------------------------------
+
+class EnqueueIngestionTests(OutboxTestCase):
+    def test_writes_one_pending_entry_per_link(self):
+        with mock.patch("adl_collector_app_plugin.ingestion.request_drain"):
+            self._enqueue(self.link, self.sibling, self.link)
+        self.assertEqual(_pending(), {self.link.pk, self.sibling.pk})
+
+    def test_a_link_already_pending_is_skipped(self):
+        with mock.patch("adl_collector_app_plugin.ingestion.request_drain"):
+            self._enqueue(self.link)
+            self._enqueue(self.link)
+        self.assertEqual(IngestionOutboxEntry.objects.count(), 1)
+
+    def test_requests_one_drain_per_connection_on_commit(self):
+        with mock.patch("adl_collector_app_plugin.ingestion.request_drain") as request_drain:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                enqueue_ingestion([
+                    (self.link.network_connection_id, self.link.pk),
+                    (self.sibling.network_connection_id, self.sibling.pk),
+                    (self.other.network_connection_id, self.other.pk),
+                ])
+                request_drain.assert_not_called()
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual(
+            {call.args[0] for call in request_drain.call_args_list},
+            {self.link.network_connection_id, self.other.network_connection_id},
+        )
+
+    def test_dispatches_on_commit(self):
+        self._enqueue(self.link, self.sibling)
+        self.task.delay.assert_called_once_with(self.link.network_connection_id, sorted([self.link.pk, self.sibling.pk]))
+        self.assertEqual(_pending(), set())
+
+    def test_a_failed_drain_request_leaves_the_entry(self):
+        with mock.patch("adl_collector_app_plugin.ingestion.request_drain", side_effect=OSError("broker down")):
+            self._enqueue(self.link)
+        self.assertEqual(_pending(), {self.link.pk})
+
+    def test_nothing_to_enqueue(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            enqueue_ingestion([])
+        self.assertEqual(callbacks, [])
+
+
+# ---------------------------------------------------------------------------
+# drain_ingestion_outbox
+# ---------------------------------------------------------------------------
+
+class DrainIngestionOutboxTests(OutboxTestCase):
+    def setUp(self):
+        super().setUp()
+        with mock.patch("adl_collector_app_plugin.ingestion.request_drain"):
+            self._enqueue(self.link, self.sibling, self.other)
+
+    def test_dispatches_one_task_per_connection(self):
+        self.assertEqual(drain_ingestion_outbox(), 3)
+
+        self.assertEqual(
+            sorted(call.args for call in self.task.delay.call_args_list),
+            sorted([
+                (self.link.network_connection_id, sorted([self.link.pk, self.sibling.pk])),
+                (self.other.network_connection_id, [self.other.pk]),
+            ]),
+        )
+        self.assertEqual(_pending(), set())
+
+    def test_drains_only_the_given_connection(self):
+        self.assertEqual(drain_ingestion_outbox(connection_id=self.other.network_connection_id), 1)
+        self.task.delay.assert_called_once_with(self.other.network_connection_id, [self.other.pk])
+        self.assertEqual(_pending(), {self.link.pk, self.sibling.pk})
+
+    def test_dispatches_in_batches(self):
+        self.assertEqual(drain_ingestion_outbox(batch_size=2), 3)
+        dispatched = [sl_id for call in self.task.delay.call_args_list for sl_id in call.args[1]]
+        self.assertEqual(sorted(dispatched), sorted([self.link.pk, self.sibling.pk, self.other.pk]))
+        self.assertEqual(_pending(), set())
+
+    def test_dispatched_entries_are_not_dispatched_again(self):
+        drain_ingestion_outbox()
+        self.task.delay.reset_mock()
+        self.assertEqual(drain_ingestion_outbox(), 0)
+        self.task.delay.assert_not_called()
+
+    def test_publishes_after_the_claim_is_written(self):
+        def publish(*args):
+            # The entries are already marked dispatched when the task goes out
+            self.assertFalse(IngestionOutboxEntry.objects.filter(dispatched_at__isnull=True).exists())
+
+        self.task.delay.side_effect = publish
+        drain_ingestion_outbox()
+        self.assertEqual(self.task.delay.call_count, 2)
+
+    def test_a_publish_failure_returns_unpublished_links_to_the_outbox(self):
+        published = []
+
+        def publish(connection_id, sl_ids):
+            if published:
+                raise OSError("broker down")
+            published.append(sl_ids)
+
+        self.task.delay.side_effect = publish
+        with self.assertRaises(OSError):
+            drain_ingestion_outbox()
+
+        self.assertEqual(_pending(), {self.link.pk, self.sibling.pk, self.other.pk} - set(published[0]))
+
+        # The next drain redispatches them
+        self.task.delay.side_effect = None
+        self.assertEqual(drain_ingestion_outbox(), 3 - len(published[0]))
+        self.assertEqual(_pending(), set())
+
+    def test_a_link_enqueued_again_during_a_failed_publish_keeps_one_entry(self):
+        def publish(connection_id, sl_ids):
+            with mock.patch("adl_collector_app_plugin.ingestion.request_drain"):
+                enqueue_ingestion([(self.link.network_connection_id, self.link.pk)])
+            raise OSError("broker down")
+
+        self.task.delay.side_effect = publish
+        with self.assertRaises(OSError):
+            drain_ingestion_outbox(connection_id=self.link.network_connection_id)
+
+        self.assertEqual(
+            IngestionOutboxEntry.objects.filter(station_link=self.link, dispatched_at__isnull=True).count(), 1
+        )
+        self.assertEqual(_pending(), {self.link.pk, self.sibling.pk, self.other.pk})
+
+    def test_deletes_entries_dispatched_before_the_retention(self):
+        drain_ingestion_outbox(connection_id=self.other.network_connection_id)
+        IngestionOutboxEntry.objects.filter(station_link=self.other).update(
+            dispatched_at=dj_timezone.now() - DISPATCHED_RETENTION - timedelta(minutes=1)
+        )
+        drain_ingestion_outbox()
+        self.assertFalse(IngestionOutboxEntry.objects.filter(station_link=self.other).exists())
+        self.assertTrue(IngestionOutboxEntry.objects.filter(station_link=self.link).exists())
+
+
+@unittest.skipUnless(connection.features.has_select_for_update_skip_locked, "needs SELECT ... SKIP LOCKED")
+class DrainClaimingTests(TransactionTestCase):
+    def setUp(self):
+        self.link, _ = create_station_link(parameters=0)
+        self.sibling, _ = create_station_link(parameters=0, connection=self.link.network_connection)
+        IngestionOutboxEntry.objects.all().delete()
+        with mock.patch("adl_collector_app_plugin.ingestion.request_drain"):
+            enqueue_ingestion((link.network_connection_id, link.pk) for link in (self.link, self.sibling))
+        patcher = mock.patch("adl.core.tasks.process_station_link_batch")
+        self.task = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_skips_entries_another_drain_has_locked(self):
+        result = {}
+
+        def concurrent_drain():
+            try:
+                result["dispatched"] = drain_ingestion_outbox()
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            # Another drain holds the link's entry while claiming it
+            list(IngestionOutboxEntry.objects.select_for_update().filter(station_link=self.link))
+            thread = threading.Thread(target=concurrent_drain)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(result["dispatched"], 1)
+        self.task.delay.assert_called_once_with(self.link.network_connection_id, [self.sibling.pk])
+        self.assertEqual(_pending(), {self.link.pk})
@@ -0,0 +1,240 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from django.test import TestCase, override_settings
+from django.utils import timezone as dj_timezone
+
+from adl_collector_app_plugin.models import CollectorSubmissionRecord, ManualObservationStationLink
+from adl_collector_app_plugin.plugins import ADLCollectorPlugin
+
+from .factories import create_station_link, create_submission, create_variable_mapping
+
+T1 = datetime(2025, 9, 1, 6, tzinfo=timezone.utc)
+T2 = datetime(2025, 9, 1, 9, tzinfo=timezone.utc)
+
+
+def _saved(parcels):
+    """What the core reports saved for parcels: every value in them."""
+    return [
+        SimpleNamespace(time=parcel["observation_time"], parameter_id=int(key))
+        for parcel in parcels
+        for key in parcel
+        if key not in ("observation_time", "submission_id")
+    ]
+
+
+def _read(plugin, link):
+    return list(plugin.get_station_data(link))
+
+
+class SweepTests(TestCase):
+    def setUp(self):
+        self.link, (self.temperature, self.pressure) = create_station_link()
+
+    def _pending_count(self):
+        return ManualObservationStationLink.objects.get(pk=self.link.pk).pending_record_count
+
+    def _refresh_link(self):
+        self.link = ManualObservationStationLink.objects.get(pk=self.link.pk)
+
+    @property
+    def t_key(self):
+        return str(self.temperature.adl_parameter_id)
+
+    def test_get_station_data_is_a_generator_over_the_chunks(self):
+        create_submission(self.link, T1, [(self.temperature, 21.5)])
+        create_submission(self.link, T2, [(self.temperature, 24.0)])
+        self._refresh_link()
+        plugin = ADLCollectorPlugin()
+
+        parcels = plugin.get_station_data(self.link)
+        self.assertNotIsInstance(parcels, list)
+        self.assertEqual([(parcel["observation_time"], parcel[self.t_key]) for parcel in parcels], [(T1, 21.5), (T2, 24.0)])
+
+    def test_saving_marks_every_record_processed(self):
+        create_submission(self.link, T1, [(self.temperature, 21.5), (self.pressure, 1013.2)])
+        create_submission(self.link, T2, [(self.temperature, 24.0)])
+        self._refresh_link()
+
+        parcels = _read(ADLCollectorPlugin(), self.link)
+        self.assertEqual([parcel["observation_time"] for parcel in parcels], [T1, T2])
+
+        ADLCollectorPlugin().after_save_records(self.link, parcels, _saved(parcels))
+
+        self.assertFalse(CollectorSubmissionRecord.objects.filter(is_processed=False).exists())
+        self.assertEqual(self._pending_count(), 0)
+
+    def test_records_mapped_to_the_same_parameter_are_all_marked(self):
+        duplicate = create_variable_mapping(self.link, self.temperature.adl_parameter)
+        create_submission(self.link, T1, [(self.temperature, 21.5), (duplicate, 21.5)])
+        self._refresh_link()
+
+        plugin = ADLCollectorPlugin()
+        parcels = _read(plugin, self.link)
+        plugin.after_save_records(self.link, parcels, _saved(parcels))
+
+        self.assertFalse(CollectorSubmissionRecord.objects.filter(is_processed=False).exists())
+        self.assertEqual(self._pending_count(), 0)
+
+    def test_records_submitted_after_the_read_stay_pending(self):
+        create_submission(self.link, T1, [(self.temperature, 21.5)])
+        self._refresh_link()
+        plugin = ADLCollectorPlugin()
+        parcels = _read(plugin, self.link)
+
+        _, (late,) = create_submission(self.link, T1, [(self.temperature, 22.0)])
+        plugin.after_save_records(self.link, parcels, _saved(parcels))
+
+        self.assertEqual(
+            list(CollectorSubmissionRecord.objects.filter(is_processed=False).values_list("pk", flat=True)),
+            [late.pk],
+        )
+        self.assertEqual(self._pending_count(), 1)
+
+    def test_a_count_drifted_low_does_not_hold_records_back(self):
+        create_submission(self.link, T1, [(self.temperature, 21.5)])
+        ManualObservationStationLink.objects.filter(pk=self.link.pk).update(pending_record_count=0)
+        self._refresh_link()
+
+        self.assertEqual(len(_read(ADLCollectorPlugin(), self.link)), 1)
+
+    def test_a_count_drifted_low_does_not_hold_records_back_from_a_batch(self):
+        create_submission(self.link, T1, [(self.temperature, 21.5)])
+        ManualObservationStationLink.objects.filter(pk=self.link.pk).update(pending_record_count=0)
+
+        self.assertEqual(len(ADLCollectorPlugin().get_station_data_batch([self.link.pk])[self.link.pk]), 1)
+
+    def test_a_count_drifted_high_reads_nothing(self):
+        ManualObservationStationLink.objects.filter(pk=self.link.pk).update(pending_record_count=5)
+        self._refresh_link()
+
+        self.assertEqual(_read(ADLCollectorPlugin(), self.link), [])
+        self.assertEqual(ADLCollectorPlugin().get_station_data_batch([self.link]), {self.link.pk: []})
+
+    def test_batch_parcels_are_partitioned_by_link(self):
+        other, (other_temperature, _) = create_station_link(connection=self.link.network_connection)
+        first, _ = create_submission(self.link, T1, [(self.temperature, 21.5), (self.pressure, 1013.2)])
+        other_first, _ = create_submission(other, T2, [(other_temperature, 24.0)])
+        second, _ = create_submission(self.link, T2, [(self.temperature, 22.0)])
+        idle, _ = create_station_link(connection=self.link.network_connection)
+
+        p_key = str(self.pressure.adl_parameter_id)
+        self.assertEqual(
+            ADLCollectorPlugin().get_station_data_batch([self.link, other.pk, idle]),
+            {
+                self.link.pk: [
+                    {"observation_time": T1, "submission_id": first.pk, self.t_key: 21.5, p_key: 1013.2},
+                    {"observation_time": T2, "submission_id": second.pk, self.t_key: 22.0},
+                ],
+                other.pk: [
+                    {"observation_time": T2, "submission_id": other_first.pk,
+                     str(other_temperature.adl_parameter_id): 24.0},
+                ],
+                idle.pk: [],
+            },
+        )
+
+
+@override_settings(ADL_COLLECTOR_INGEST_MAX_ATTEMPTS=2)
+class AttemptLifecycleTests(TestCase):
+    """An attempt is counted when a sweep reads a record and settled when it is processed."""
+
+    def setUp(self):
+        self.link, (self.temperature, _) = create_station_link()
+        _, (self.record,) = create_submission(self.link, T1, [(self.temperature, 21.5)])
+        self.plugin = ADLCollectorPlugin()
+
+    def _record(self):
+        return CollectorSubmissionRecord.objects.get(pk=self.record.pk)
+
+    def _expire_back_off(self):
+        CollectorSubmissionRecord.objects.update(next_attempt_at=dj_timezone.now() - timedelta(seconds=1))
+
+    def _rejection(self, parcels):
+        key = str(self.temperature.adl_parameter_id)
+        return [{"time": parcels[0]["observation_time"], "parameter_id": key, "message": "Above the range limit"}]
+
+    def test_reading_counts_an_attempt_and_backs_the_record_off(self):
+        self.assertEqual(len(_read(self.plugin, self.link)), 1)
+
+        record = self._record()
+        self.assertEqual(record.ingest_attempts, 1)
+        self.assertGreater(record.next_attempt_at, dj_timezone.now())
+        self.assertEqual(_read(self.plugin, self.link), [])
+
+    def test_a_first_attempt_in_flight_is_not_a_failure(self):
+        _read(self.plugin, self.link)
+        self.assertFalse(CollectorSubmissionRecord.objects.failed().exists())
+
+    def test_processing_settles_the_attempt(self):
+        parcels = _read(self.plugin, self.link)
+        self.plugin.after_save_records(self.link, parcels, _saved(parcels))
+
+        record = self._record()
+        self.assertTrue(record.is_processed)
+        self.assertEqual((record.ingest_attempts, record.next_attempt_at), (0, None))
+
+    def test_a_sweep_that_dies_before_saving_is_retried_after_its_back_off(self):
+        _read(self.plugin, self.link)
+        self._expire_back_off()
+
+        self.assertEqual(list(CollectorSubmissionRecord.objects.failed()), [self.record])
+        self.assertEqual(len(_read(self.plugin, self.link)), 1)
+        self.assertEqual(self._record().ingest_attempts, 2)
+
+    def test_a_record_whose_sweeps_keep_dying_is_dead_lettered(self):
+        for _ in range(2):
+            _read(self.plugin, self.link)
+            self._expire_back_off()
+
+        self.assertEqual(_read(self.plugin, self.link), [])
+        record = self._record()
+        self.assertTrue(record.is_dead_letter)
+        self.assertEqual(ManualObservationStationLink.objects.get(pk=self.link.pk).pending_record_count, 0)
+
+    def test_a_qc_rejection_backs_off_then_dead_letters(self):
+        parcels = _read(self.plugin, self.link)
+        self.plugin.after_save_records(self.link, parcels, [], self._rejection(parcels))
+
+        record = self._record()
+        self.assertFalse(record.is_dead_letter)
+        self.assertEqual(record.error_message, "Above the range limit")
+        self.assertGreater(record.next_attempt_at, dj_timezone.now())
+
+        self._expire_back_off()
+        parcels = _read(self.plugin, self.link)
+        self.plugin.after_save_records(self.link, parcels, [], self._rejection(parcels))
+
+        record = self._record()
+        self.assertTrue(record.is_dead_letter)
+        self.assertEqual(record.ingest_attempts, 2)
+        self.assertEqual(ManualObservationStationLink.objects.get(pk=self.link.pk).pending_record_count, 0)
+
+    def test_a_rejected_value_the_core_saved_anyway_is_processed(self):
+        parcels = _read(self.plugin, self.link)
+        self.plugin.after_save_records(self.link, parcels, _saved(parcels), self._rejection(parcels))
+
+        record = self._record()
+        self.assertTrue(record.is_processed)
+        self.assertEqual(record.error_message, "Above the range limit")
+
+    def test_requeue_returns_a_dead_letter_to_the_sweep(self):
+        for _ in range(3):
+            _read(self.plugin, self.link)
+            self._expire_back_off()
+        self.assertTrue(self._record().is_dead_letter)
+
+        self.assertEqual(CollectorSubmissionRecord.objects.requeue(), {self.link.pk})
+        record = self._record()
+        self.assertEqual(
+            (record.is_dead_letter, record.ingest_attempts, record.next_attempt_at, record.error_message),
+            (False, 0, None, ""),
+        )
+        self.assertEqual(len(_read(self.plugin, self.link)), 1)
+
+    def test_requeue_leaves_processed_and_untried_records_alone(self):
+        _, (untried,) = create_submission(self.link, T2, [(self.temperature, 24.0)])
+        CollectorSubmissionRecord.objects.filter(pk=self.record.pk).update(is_processed=True, ingest_attempts=3)
+
+        self.assertEqual(CollectorSubmissionRecord.objects.requeue(), set())
+        self.assertEqual(self._record().ingest_attempts, 3)
@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from adl_collector_app_plugin.plugins import _fold_parcels, _observation_key, _qc_failure_messages
+
+T1 = datetime(2025, 9, 1, 6, tzinfo=timezone.utc)
+T2 = datetime(2025, 9, 1, 9, tzinfo=timezone.utc)
+
+
+# ---------------------------------------------------------------------------
+# _fold_parcels — rows (pk, submission_id, observation_time, param_id, value)
+# ---------------------------------------------------------------------------
+
+def test_fold_parcels_groups_rows_by_observation_time():
+    rows = [
+        (1, 10, T1, 5, 21.5),
+        (2, 10, T1, 6, 1013.2),
+        (3, 11, T2, 5, 24.0),
+    ]
+    assert list(_fold_parcels(rows)) == [
+        {"observation_time": T1, "submission_id": 10, "5": 21.5, "6": 1013.2},
+        {"observation_time": T2, "submission_id": 11, "5": 24.0},
+    ]
+
+
+def test_fold_parcels_keeps_record_ids_out_of_the_parcel():
+    parcel, = _fold_parcels([(1, 10, T1, 5, 21.5)])
+    assert set(parcel) == {"observation_time", "submission_id", "5"}
+
+
+def test_fold_parcels_takes_the_latest_submission_of_a_combined_parcel():
+    rows = [
+        (1, 12, T1, 5, 21.5),
+        (2, 10, T1, 6, 1013.2),
+    ]
+    parcel, = _fold_parcels(rows)
+    assert parcel["submission_id"] == 12
+
+
+def test_fold_parcels_takes_the_last_of_several_values_for_a_parameter():
+    rows = [
+        (1, 10, T1, 5, 21.5),
+        (2, 10, T1, 5, 22.0),
+    ]
+    parcel, = _fold_parcels(rows)
+    assert parcel["5"] == 22.0
+
+
+def test_fold_parcels_on_no_rows():
+    assert list(_fold_parcels([])) == []
+
+
+# ---------------------------------------------------------------------------
+# _observation_key / _qc_failure_messages
+# ---------------------------------------------------------------------------
+
+def test_observation_key_of_a_saved_record():
+    assert _observation_key(SimpleNamespace(time=T1, parameter_id=5)) == (T1, "5")
+
+
+def test_observation_key_of_a_dict():
+    assert _observation_key({"time": T1, "parameter_id": 5}) == (T1, "5")
+
+
+def test_observation_key_matches_the_parcel_keys():
+    parcel, = _fold_parcels([(1, 10, T1, 5, 21.5)])
+    assert _observation_key({"time": T1, "parameter_id": 5}) == (parcel["observation_time"], "5")
+    assert "5" in parcel
+
+
+def test_observation_key_of_an_unreadable_record():
+    assert _observation_key({"observation_time": T1, "parameter": 5}) is None
+    assert _observation_key(SimpleNamespace(time=T1)) is None
+
+
+def test_qc_failure_messages_skip_unreadable_results():
+    results = [
+        {"time": T1, "parameter_id": 5, "message": "Above the range limit"},
+        {"parameter": 6, "message": "Unreadable"},
+    ]
+    assert _qc_failure_messages(results) == {(T1, "5"): "Above the range limit"}
+
+
+def test_qc_failure_messages_of_nothing():
+    assert _qc_failure_messages(None) == {}
@@ -0,0 +1,48 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from adl_collector_app_plugin.serializers.submission import decode_history_cursor, encode_history_cursor
+
+T = datetime(2025, 9, 1, 6, tzinfo=timezone.utc)
+
+
+def _raw_cursor(text):
+    return base64.urlsafe_b64encode(text.encode("latin-1")).decode()
+
+
+# ---------------------------------------------------------------------------
+# encode_history_cursor / decode_history_cursor
+# ---------------------------------------------------------------------------
+
+def test_cursor_round_trips():
+    assert decode_history_cursor(encode_history_cursor(T, 42)) == (T, 42)
+
+
+def test_cursor_keeps_the_utc_offset():
+    local = T.astimezone(timezone(timedelta(hours=3)))
+    observation_time, pk = decode_history_cursor(encode_history_cursor(local, 7))
+    assert observation_time == T
+    assert observation_time.utcoffset() == timedelta(hours=3)
+    assert pk == 7
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_history_cursor(T, 10 ** 12)
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "abc",
+    "!!!!",
+    _raw_cursor("2025-09-01T06:00:00+00:00"),
+    _raw_cursor("yesterday,4"),
+    _raw_cursor("2025-09-01T06:00:00+00:00,x"),
+    _raw_cursor("2025-09-01T06:00:00,4"),
+    _raw_cursor("\xff\xfe,1"),
+])
+def test_bad_cursors_are_rejected(cursor):
+    with pytest.raises((ValueError, UnicodeDecodeError)):
+        decode_history_cursor(cursor)
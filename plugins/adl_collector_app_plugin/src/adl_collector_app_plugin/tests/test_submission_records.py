@@ -0,0 +1,212 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+from django.utils import timezone as dj_timezone
+
+from adl_collector_app_plugin.models import (
+    CollectorSubmission,
+    CollectorSubmissionRecord,
+    ManualObservationStationLink,
+)
+
+from .factories import create_observer, create_station_link, create_submission, create_variable_mapping
+
+T1 = datetime(2025, 9, 1, 6, tzinfo=timezone.utc)
+
+
+class RecordTestCase(TestCase):
+    def setUp(self):
+        self.link, (self.temperature, self.pressure) = create_station_link()
+        self.observer = create_observer(self.link)
+
+    def _submit(self, values, minutes=5, **fields):
+        return create_submission(
+            self.link, T1, values, observer=self.observer, submission_time=T1 + timedelta(minutes=minutes), **fields
+        )
+
+    def _pending_count(self):
+        return ManualObservationStationLink.objects.get(pk=self.link.pk).pending_record_count
+
+
+# ---------------------------------------------------------------------------
+# bulk_create — denormalized station link and pending counters
+# ---------------------------------------------------------------------------
+
+class BulkCreateTests(RecordTestCase):
+    def test_fills_the_station_link_and_counts_pending_records(self):
+        _, records = self._submit([(self.temperature, 21.5), (self.pressure, 1013.2)])
+        self.assertEqual({record.station_link_id for record in records}, {self.link.pk})
+        self.assertEqual(self._pending_count(), 2)
+
+    def test_leaves_test_submissions_out_of_the_count(self):
+        self._submit([(self.temperature, 21.5)], is_test_submission=True)
+        self.assertEqual(self._pending_count(), 0)
+
+    def test_leaves_records_created_processed_out_of_the_count(self):
+        submission, _ = self._submit([])
+        CollectorSubmissionRecord.objects.bulk_create([
+            CollectorSubmissionRecord(submission=submission, variable_mapping=self.temperature, value=21.5),
+            CollectorSubmissionRecord(
+                submission=submission, variable_mapping=self.pressure, value=1013.2, is_processed=True
+            ),
+        ])
+        self.assertEqual(self._pending_count(), 1)
+
+    def test_the_count_matches_a_recount(self):
+        self._submit([(self.temperature, 21.5), (self.pressure, 1013.2)])
+        self._submit([(self.temperature, 22.0)], minutes=35, is_test_submission=True)
+        counted = self._pending_count()
+        ManualObservationStationLink.refresh_pending_record_counts()
+        self.assertEqual(self._pending_count(), counted)
+
+
+# ---------------------------------------------------------------------------
+# adjust_pending_record_count / refresh_pending_record_counts
+# ---------------------------------------------------------------------------
+
+class PendingRecordCountTests(RecordTestCase):
+    def _set_count(self, count):
+        ManualObservationStationLink.objects.filter(pk=self.link.pk).update(pending_record_count=count)
+
+    def test_adjust_adds_and_subtracts(self):
+        ManualObservationStationLink.adjust_pending_record_count(self.link.pk, 3)
+        ManualObservationStationLink.adjust_pending_record_count(self.link.pk, -1)
+        self.assertEqual(self._pending_count(), 2)
+
+    def test_adjust_never_goes_below_zero(self):
+        self._set_count(1)
+        ManualObservationStationLink.adjust_pending_record_count(self.link.pk, -5)
+        self.assertEqual(self._pending_count(), 0)
+
+    def test_adjust_touches_only_its_link(self):
+        other, _ = create_station_link(connection=self.link.network_connection)
+        ManualObservationStationLink.adjust_pending_record_count(self.link.pk, 2)
+        self.assertEqual(ManualObservationStationLink.objects.get(pk=other.pk).pending_record_count, 0)
+
+    def test_refresh_recounts_pending_records_only(self):
+        _, (temperature, _) = self._submit([(self.temperature, 21.5), (self.pressure, 1013.2)])
+        _, (dead,) = self._submit([(self.temperature, 22.0)], minutes=35)
+        self._submit([(self.pressure, 1000.0)], minutes=65, is_test_submission=True)
+        CollectorSubmissionRecord.objects.mark_processed([temperature.pk], dj_timezone.now())
+        CollectorSubmissionRecord.objects.filter(pk=dead.pk).update(is_dead_letter=True)
+        self._set_count(40)
+
+        self.assertEqual(ManualObservationStationLink.refresh_pending_record_counts(), 1)
+        self.assertEqual(self._pending_count(), 1)
+
+    def test_refresh_zeroes_a_link_with_nothing_pending(self):
+        self._set_count(7)
+        ManualObservationStationLink.refresh_pending_record_counts()
+        self.assertEqual(self._pending_count(), 0)
+
+    def test_refresh_only_touches_the_queryset(self):
+        other, (other_temperature, _) = create_station_link(connection=self.link.network_connection)
+        create_submission(other, T1, [(other_temperature, 21.5)])
+        ManualObservationStationLink.objects.update(pending_record_count=9)
+
+        ManualObservationStationLink.refresh_pending_record_counts(
+            ManualObservationStationLink.objects.filter(pk=other.pk)
+        )
+        self.assertEqual(self._pending_count(), 9)
+        self.assertEqual(ManualObservationStationLink.objects.get(pk=other.pk).pending_record_count, 1)
+
+
+# ---------------------------------------------------------------------------
+# supersede_stale_revisions
+# ---------------------------------------------------------------------------
+
+class SupersedeStaleRevisionsTests(RecordTestCase):
+    def _supersede(self):
+        return CollectorSubmissionRecord.objects.filter(station_link=self.link).supersede_stale_revisions(
+            dj_timezone.now()
+        )
+
+    def test_retires_earlier_revisions(self):
+        _, (old_temperature, old_pressure) = self._submit([(self.temperature, 21.5), (self.pressure, 1013.2)])
+        _, (new_temperature,) = self._submit([(self.temperature, 22.0)], minutes=35)
+
+        self.assertEqual(self._supersede(), {self.link.pk: 1})
+
+        old_temperature.refresh_from_db()
+        self.assertTrue(old_temperature.is_processed)
+        self.assertEqual(old_temperature.error_message, "Superseded by a later revision.")
+        self.assertEqual(
+            set(CollectorSubmissionRecord.objects.filter(is_processed=False).values_list("pk", flat=True)),
+            {old_pressure.pk, new_temperature.pk},
+        )
+
+    def test_ranks_by_adl_parameter_across_variable_mappings(self):
+        remapped = create_variable_mapping(self.link, self.temperature.adl_parameter)
+        _, (old,) = self._submit([(self.temperature, 21.5)])
+        _, (new,) = self._submit([(remapped, 22.0)], minutes=35)
+
+        self.assertEqual(self._supersede(), {self.link.pk: 1})
+        self.assertEqual(
+            list(CollectorSubmissionRecord.objects.filter(is_processed=False).values_list("pk", flat=True)),
+            [new.pk],
+        )
+
+    def test_keeps_the_highest_record_of_a_parameter_mapped_twice_in_one_submission(self):
+        remapped = create_variable_mapping(self.link, self.temperature.adl_parameter)
+        _, records = self._submit([(self.temperature, 21.5), (remapped, 22.0)])
+
+        self._supersede()
+        self.assertEqual(
+            list(CollectorSubmissionRecord.objects.filter(is_processed=False).values_list("pk", flat=True)),
+            [max(record.pk for record in records)],
+        )
+
+    def test_a_late_older_revision_does_not_replace_an_ingested_one(self):
+        _, (new,) = self._submit([(self.temperature, 22.0)], minutes=35)
+        CollectorSubmissionRecord.objects.mark_processed([new.pk], dj_timezone.now())
+        _, (late,) = self._submit([(self.temperature, 21.5)])
+
+        self.assertEqual(self._supersede(), {self.link.pk: 1})
+        late.refresh_from_db()
+        self.assertTrue(late.is_processed)
+
+    def test_test_submissions_take_no_part(self):
+        self._submit([(self.temperature, 21.5)])
+        self._submit([(self.temperature, 22.0)], minutes=35, is_test_submission=True)
+        self.assertEqual(self._supersede(), {})
+
+    def test_nothing_to_supersede(self):
+        self._submit([(self.temperature, 21.5), (self.pressure, 1013.2)])
+        self.assertEqual(self._supersede(), {})
+        self.assertFalse(CollectorSubmissionRecord.objects.filter(is_processed=True).exists())
+
+
+# ---------------------------------------------------------------------------
+# set_error_messages
+# ---------------------------------------------------------------------------
+
+class SetErrorMessagesTests(RecordTestCase):
+    def test_writes_each_record_its_own_message(self):
+        _, (temperature, pressure) = self._submit([(self.temperature, 99.0), (self.pressure, 1013.2)])
+        CollectorSubmissionRecord.objects.set_error_messages(
+            {temperature.pk: "Above the range limit", pressure.pk: "Step too large"}
+        )
+        self.assertEqual(
+            dict(CollectorSubmissionRecord.objects.values_list("pk", "error_message")),
+            {temperature.pk: "Above the range limit", pressure.pk: "Step too large"},
+        )
+
+    def test_applies_a_shared_message_across_batches(self):
+        _, records = self._submit([(self.temperature, 99.0), (self.pressure, 2000.0)])
+        CollectorSubmissionRecord.objects.set_error_messages(
+            dict.fromkeys([record.pk for record in records], "Above the range limit"), batch_size=1
+        )
+        self.assertEqual(
+            set(CollectorSubmissionRecord.objects.values_list("error_message", flat=True)),
+            {"Above the range limit"},
+        )
+
+    def test_leaves_other_records_alone(self):
+        _, (temperature, pressure) = self._submit([(self.temperature, 99.0), (self.pressure, 1013.2)])
+        CollectorSubmissionRecord.objects.set_error_messages({temperature.pk: "Above the range limit"})
+        pressure.refresh_from_db()
+        self.assertEqual(pressure.error_message, "")
+
+    def test_nothing_to_write(self):
+        CollectorSubmissionRecord.objects.set_error_messages({})
+        self.assertFalse(CollectorSubmission.objects.exists())
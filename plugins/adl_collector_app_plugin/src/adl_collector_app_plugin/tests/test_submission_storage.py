@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from adl_collector_app_plugin.models import CollectorSubmission
+from adl_collector_app_plugin.models.submission import COMPACT_MARKER
+
+SUBMISSION_TIME = datetime(2025, 9, 1, 6, 5, tzinfo=timezone.utc)
+OBSERVATION_TIME = datetime(2025, 9, 1, 6, tzinfo=timezone.utc)
+
+PAYLOAD = {
+    "idempotency_key": "0b6c1e2a-4f0e-4c53-9a55-8f4f3c0b9e11",
+    "submission_time": SUBMISSION_TIME.isoformat(),
+    "observation_time": OBSERVATION_TIME.isoformat(),
+    "station_link_id": 7,
+    "is_test_submission": False,
+    "records": [
+        {"variable_mapping_id": 3, "value": 21.5},
+        {"variable_mapping_id": 4, "value": 1013.2},
+    ],
+    "meta": {"app_version": "1.4.0"},
+}
+RECORDS = [(3, 21.5), (4, 1013.2)]
+
+
+class SubmissionStorageRoundTripTests(SimpleTestCase):
+    def _store(self):
+        submission = CollectorSubmission(
+            pk=1,
+            idempotency_key=PAYLOAD["idempotency_key"],
+            submission_time=SUBMISSION_TIME,
+            observation_time=OBSERVATION_TIME,
+            station_link_id=PAYLOAD["station_link_id"],
+            is_test_submission=PAYLOAD["is_test_submission"],
+            data=CollectorSubmission.stored_data(PAYLOAD, RECORDS),
+        )
+        records = [
+            SimpleNamespace(pk=pk, variable_mapping_id=vm_id, value=value)
+            for pk, (vm_id, value) in enumerate(RECORDS, start=1)
+        ]
+        return submission, mock.patch.object(CollectorSubmission, "all_records", return_value=records)
+
+    def test_full_storage_is_the_default(self):
+        submission, records = self._store()
+        with records:
+            self.assertEqual(submission.data, PAYLOAD)
+            self.assertFalse(submission.is_compact)
+            self.assertEqual(submission.payload, PAYLOAD)
+
+    @override_settings(ADL_COLLECTOR_SUBMISSION_DATA_STORAGE="full")
+    def test_full_storage_round_trip(self):
+        submission, records = self._store()
+        with records:
+            self.assertEqual(submission.payload, PAYLOAD)
+
+    @override_settings(ADL_COLLECTOR_SUBMISSION_DATA_STORAGE="compact")
+    def test_compact_storage_round_trip(self):
+        submission, records = self._store()
+        self.assertTrue(submission.is_compact)
+        self.assertEqual(set(submission.data), {"meta", COMPACT_MARKER})
+        with records:
+            self.assertEqual(submission.payload, PAYLOAD)
+
+    @override_settings(ADL_COLLECTOR_SUBMISSION_DATA_STORAGE="compact")
+    def test_compact_storage_keeps_records_that_differ_from_the_saved_ones(self):
+        payload = {**PAYLOAD, "records": [{"variable_mapping_id": 3, "value": 21.5, "comment": "gusty"}]}
+        data = CollectorSubmission.stored_data(payload, RECORDS[:1])
+        self.assertEqual(data["records"], payload["records"])
+        self.assertNotIn("records", data[COMPACT_MARKER])
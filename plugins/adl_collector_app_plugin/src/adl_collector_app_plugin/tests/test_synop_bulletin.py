@@ -0,0 +1,64 @@
+from adl_collector_app_plugin.synop_bulletin import split_bulletin
+
+
+# ---------------------------------------------------------------------------
+# split_bulletin
+# ---------------------------------------------------------------------------
+
+def test_split_bulletin_one_report_per_station():
+    bulletin = """
+AAXX 12064
+63740 32970 20000 10261 20180 39095 40117 58005=
+63741 32965 10502 10245 20170 39101 40120 58002=
+"""
+    assert split_bulletin(bulletin) == [
+        "AAXX 12064 63740 32970 20000 10261 20180 39095 40117 58005=",
+        "AAXX 12064 63741 32965 10502 10245 20170 39101 40120 58002=",
+    ]
+
+
+def test_split_bulletin_joins_reports_spread_over_lines():
+    bulletin = "AAXX 12064\n63740 32970 20000\n      10261 20180=\n"
+    assert split_bulletin(bulletin) == ["AAXX 12064 63740 32970 20000 10261 20180="]
+
+
+def test_split_bulletin_leaves_out_nil_reports():
+    bulletin = "AAXX 12064\n63740 NIL=\n63741 32965 10502 10245=\n63742 nil=\n"
+    assert split_bulletin(bulletin) == ["AAXX 12064 63741 32965 10502 10245="]
+
+
+def test_split_bulletin_keeps_each_section_header():
+    bulletin = "AAXX 12064\n63740 32970 20000=\nAAXX 12094\n63740 32970 20100=\n"
+    assert split_bulletin(bulletin) == [
+        "AAXX 12064 63740 32970 20000=",
+        "AAXX 12094 63740 32970 20100=",
+    ]
+
+
+def test_split_bulletin_drops_headings_and_end_markers():
+    bulletin = """ZCZC 123
+SMKN01 HKNC 120600
+AAXX 12064
+63740 32970 20000 10261=
+SMKN02 HKNC 120600 RRA
+AAXX 12064
+63741 32965 10502 10245=
+NNNN
+"""
+    assert split_bulletin(bulletin) == [
+        "AAXX 12064 63740 32970 20000 10261=",
+        "AAXX 12064 63741 32965 10502 10245=",
+    ]
+
+
+def test_split_bulletin_drops_a_heading_between_reports_of_a_section():
+    bulletin = "AAXX 12064\r\n63740 32970 20000=\r\nSMKN02 HKNC 120600\r\n63741 32965 10502=\r\nNNNN\r\n"
+    assert split_bulletin(bulletin) == [
+        "AAXX 12064 63740 32970 20000=",
+        "AAXX 12064 63741 32965 10502=",
+    ]
+
+
+def test_split_bulletin_without_a_section_header():
+    assert split_bulletin("63740 32970 20000=") == []
+    assert split_bulletin("") == []
@@ -1,4 +1,13 @@
-from adl_collector_app_plugin.synop_utils import extract_value_by_path, FM12_ELEMENT_PATH_CHOICES
+from types import SimpleNamespace
+
+from adl_collector_app_plugin.synop_utils import (
+    build_submission_records_from_synop,
+    compile_fm12_paths,
+    extract_fm12_values,
+    extract_value_by_path,
+    get_unmapped_elements,
+    FM12_ELEMENT_PATH_CHOICES,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -104,3 +113,76 @@ def test_list_indexed_paths_present():
     assert "cloud_layer.3.cloud_genus._code" in paths
     assert "cloud_base_below_station.0.upper_surface_altitude.value" in paths
     assert "cloud_base_below_station.2.description._code" in paths
+
+
+# ---------------------------------------------------------------------------
+# extract_fm12_values — compiled single-pass extraction
+# ---------------------------------------------------------------------------
+
+SAMPLE_DECODED = {
+    "air_temperature": {"value": 9.4, "unit": "Cel"},
+    "dewpoint_temperature": {"value": -4.7, "unit": "Cel"},
+    "station_pressure": {"value": 1011.1, "unit": "hPa"},
+    "surface_wind": {"direction": {"value": 150}, "speed": {"value": 6, "unit": "KT"}},
+    "cloud_cover": {"value": 6, "_code": 6},
+    "visibility": {"value": 10000, "_code": 82, "quantifier": None},
+    "lowest_cloud_base": {"min": 600, "max": 1000, "_code": 5},
+    "present_weather": {"value": "02"},
+    "past_weather": [{"value": 0}, {"value": 1}],
+    "cloud_layer": [
+        {"cloud_cover": {"_code": 3}, "cloud_genus": {"value": "Sc", "_code": 6}, "cloud_height": {"value": 600}},
+        {"cloud_cover": {"_code": 5}, "cloud_genus": None, "cloud_height": {"value": 3000, "_code": 60}},
+    ],
+    "cloud_base_below_station": [],
+    "pressure_tendency": {"tendency": {"value": 3}, "change": {"value": 1.5}},
+}
+
+
+def test_extract_fm12_values_matches_extract_value_by_path():
+    values = extract_fm12_values(SAMPLE_DECODED)
+    for path, _ in FM12_ELEMENT_PATH_CHOICES:
+        assert values.get(path) == extract_value_by_path(SAMPLE_DECODED, path), path
+
+
+def test_extract_fm12_values_skips_non_numeric_leaves():
+    values = extract_fm12_values(SAMPLE_DECODED)
+    assert "present_weather.value" not in values
+    assert "cloud_layer.0.cloud_genus._code" in values
+    assert "cloud_layer.1.cloud_genus._code" not in values
+
+
+def test_extract_fm12_values_on_empty_input():
+    assert extract_fm12_values({}) == {}
+    assert extract_fm12_values(None) == {}
+
+
+def test_compiled_custom_paths():
+    compiled = compile_fm12_paths(["a.0.b", "a.1.b", "a", "c.d"])
+    decoded = {"a": [{"b": 1}, {"b": 2.5}], "c": {"d": 4}}
+    assert extract_fm12_values(decoded, compiled) == {"a.0.b": 1.0, "a.1.b": 2.5, "c.d": 4.0}
+
+
+def _mapping(pk, path):
+    return SimpleNamespace(
+        id=pk,
+        fm12_element_path=path,
+        adl_parameter_id=pk,
+        adl_parameter=SimpleNamespace(name=path),
+        source_unit=SimpleNamespace(name="unit"),
+    )
+
+
+def test_build_records_falls_back_for_unknown_paths():
+    mappings = [_mapping(1, "air_temperature.value"), _mapping(2, "surface_wind.speed.unit"),
+                _mapping(3, "lowest_cloud_base.max")]
+    records = build_submission_records_from_synop(SAMPLE_DECODED, mappings)
+    assert [(r["synop_mapping_id"], r["value"]) for r in records] == [(1, 9.4), (3, 1000.0)]
+
+
+def test_unmapped_elements_use_precomputed_values():
+    mappings = [_mapping(1, "air_temperature.value")]
+    values = extract_fm12_values(SAMPLE_DECODED)
+    unmapped = get_unmapped_elements(SAMPLE_DECODED, mappings, values)
+    paths = [u["path"] for u in unmapped]
+    assert "air_temperature.value" not in paths
+    assert paths == [path for path, _ in FM12_ELEMENT_PATH_CHOICES if path in values and path != "air_temperature.value"]
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from adl_collector_app_plugin.models import SubmissionIdempotencyKey
+from adl_collector_app_plugin.throttling import reserve_tokens, unanswered_payloads
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# (cache key, cost, burst, tokens per second)
+OBSERVER = ("adl_collector:throttle:observer:1", 1, 3, 1.0)
+CONNECTION = ("adl_collector:throttle:connection:1", 1, 10, 1.0)
+
+
+def _charge(bucket, cost):
+    key, _, burst, per_second = bucket
+    return key, cost, burst, per_second
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ReserveTokensTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_no_buckets(self):
+        self.assertIsNone(reserve_tokens([]))
+
+    def test_takes_from_a_full_bucket_until_it_is_empty(self):
+        for _ in range(3):
+            self.assertIsNone(reserve_tokens([OBSERVER], now=100.0))
+        self.assertEqual(reserve_tokens([OBSERVER], now=100.0), 1.0)
+
+    def test_refills_at_the_bucket_rate(self):
+        self.assertIsNone(reserve_tokens([_charge(OBSERVER, 3)], now=100.0))
+        self.assertEqual(reserve_tokens([_charge(OBSERVER, 2)], now=101.0), 1.0)
+        self.assertIsNone(reserve_tokens([_charge(OBSERVER, 2)], now=102.0))
+
+    def test_refills_no_further_than_the_burst(self):
+        self.assertIsNone(reserve_tokens([_charge(OBSERVER, 3)], now=100.0))
+        self.assertIsNone(reserve_tokens([_charge(OBSERVER, 3)], now=1000.0))
+        self.assertEqual(reserve_tokens([OBSERVER], now=1000.0), 1.0)
+
+    def test_rejection_takes_nothing_from_any_bucket(self):
+        self.assertIsNone(reserve_tokens([_charge(OBSERVER, 3)], now=100.0))
+        self.assertEqual(reserve_tokens([CONNECTION, OBSERVER], now=100.0), 1.0)
+        # The connection bucket was not charged for the refused request
+        self.assertIsNone(reserve_tokens([_charge(CONNECTION, 10)], now=100.0))
+
+    def test_wait_is_for_the_slowest_bucket(self):
+        slow = ("adl_collector:throttle:connection:2", 1, 1, 0.25)
+        self.assertIsNone(reserve_tokens([OBSERVER, slow], now=100.0))
+        self.assertEqual(reserve_tokens([OBSERVER, slow], now=100.0), 4.0)
+
+    def test_a_cost_over_the_burst_takes_the_whole_bucket(self):
+        self.assertIsNone(reserve_tokens([_charge(OBSERVER, 50)], now=100.0))
+        self.assertEqual(reserve_tokens([OBSERVER], now=100.0), 1.0)
+
+
+class UnansweredPayloadsTests(SimpleTestCase):
+    def test_leaves_out_payloads_with_a_stored_response(self):
+        payloads = [{"idempotency_key": "a"}, {"idempotency_key": "b"}, {}, {"idempotency_key": ["a"]}]
+        with mock.patch.object(SubmissionIdempotencyKey, "lookup", return_value={"a": (201, {})}) as lookup:
+            self.assertEqual(unanswered_payloads(None, payloads), payloads[1:])
+        lookup.assert_called_once_with(None, ["a", "b", None, None])
+
+    def test_keeps_every_payload_when_nothing_is_stored(self):
+        payloads = [{"idempotency_key": "a"}, "not an object"]
+        with mock.patch.object(SubmissionIdempotencyKey, "lookup", return_value={}):
+            self.assertEqual(unanswered_payloads(None, payloads), payloads)
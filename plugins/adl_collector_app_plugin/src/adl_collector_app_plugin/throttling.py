@@ -0,0 +1,163 @@
+"""
+Token-bucket backpressure for the submission endpoints.
+
+Every observer and every connection has a bucket of submissions that refills
+at a steady rate up to a burst size. A request takes one token per
+submission it carries from the observer's bucket and from the bucket of each
+connection it submits to. When any of them is short, nothing is taken and the
+request is refused with 429 and a Retry-After hint, so a district coming back
+online drains its offline queues over minutes instead of saturating database
+connections and Celery workers at once.
+
+Retries of requests that were already answered are free: a submission whose
+idempotency key has a stored response is replayed from it, so it costs
+nothing and is never refused.
+
+Buckets live in the default cache as (tokens, timestamp) pairs. Updates are
+not atomic, so concurrent requests can overshoot a limit slightly; the point
+is to shape bursts, not to enforce an exact quota. A request carrying more
+submissions than a bucket holds is charged the whole bucket, so the largest
+bulk flush always goes through on a full bucket.
+
+Limits are configured per minute with ADL_COLLECTOR_OBSERVER_SUBMISSIONS_PER_MINUTE
+and ADL_COLLECTOR_CONNECTION_SUBMISSIONS_PER_MINUTE, and burst sizes with
+ADL_COLLECTOR_OBSERVER_SUBMISSION_BURST and ADL_COLLECTOR_CONNECTION_SUBMISSION_BURST.
+A rate or burst of 0 disables that bucket.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from .authz import get_observer_authz
+
+DEFAULT_OBSERVER_SUBMISSIONS_PER_MINUTE = 30
+DEFAULT_OBSERVER_SUBMISSION_BURST = 200
+DEFAULT_CONNECTION_SUBMISSIONS_PER_MINUTE = 600
+DEFAULT_CONNECTION_SUBMISSION_BURST = 2000
+
+
+def get_observer_bucket():
+    """(burst, tokens per second) of each observer's bucket."""
+    return (
+        getattr(settings, "ADL_COLLECTOR_OBSERVER_SUBMISSION_BURST", DEFAULT_OBSERVER_SUBMISSION_BURST),
+        getattr(settings, "ADL_COLLECTOR_OBSERVER_SUBMISSIONS_PER_MINUTE",
+                DEFAULT_OBSERVER_SUBMISSIONS_PER_MINUTE) / 60,
+    )
+
+
+def get_connection_bucket():
+    """(burst, tokens per second) of each connection's bucket."""
+    return (
+        getattr(settings, "ADL_COLLECTOR_CONNECTION_SUBMISSION_BURST", DEFAULT_CONNECTION_SUBMISSION_BURST),
+        getattr(settings, "ADL_COLLECTOR_CONNECTION_SUBMISSIONS_PER_MINUTE",
+                DEFAULT_CONNECTION_SUBMISSIONS_PER_MINUTE) / 60,
+    )
+
+
+def _bucket_key(scope, ident) -> str:
+    return f"adl_collector:throttle:{scope}:{ident}"
+
+
+def submission_buckets(user, payloads) -> list:
+    """
+    The (cache key, cost, burst, tokens per second) buckets charged for the
+    user submitting payloads. Station links come from the cached
+    authorization map; payloads for links the user does not observe only
+    count against the observer, as validation rejects them anyway.
+    """
+    buckets = []
+    burst, per_second = get_observer_bucket()
+    if burst > 0 and per_second > 0:
+        buckets.append((_bucket_key("observer", user.pk), len(payloads), burst, per_second))
+    
+    burst, per_second = get_connection_bucket()
+    if burst > 0 and per_second > 0:
+        authz = get_observer_authz(user)
+        cost_by_connection = {}
+        for payload in payloads:
+            try:
+                grant = authz.get(int(payload.get("station_link_id")))
+            except (AttributeError, TypeError, ValueError):
+                continue
+            if grant is not None:
+                connection_id = grant["network_connection_id"]
+                cost_by_connection[connection_id] = cost_by_connection.get(connection_id, 0) + 1
+        buckets.extend(
+            (_bucket_key("connection", connection_id), cost, burst, per_second)
+            for connection_id, cost in cost_by_connection.items()
+        )
+    return buckets
+
+
+def reserve_tokens(buckets, now=None):
+    """
+    Take each bucket's cost from it, or nothing at all if any bucket is short.
+    Returns None when the tokens were taken, else the seconds until they
+    would all be available.
+    """
+    if not buckets:
+        return None
+    now = time.time() if now is None else now
+    
+    states = cache.get_many([key for key, *_ in buckets])
+    updated = {}
+    wait = 0.0
+    timeout = 0
+    for key, cost, burst, per_second in buckets:
+        cost = min(cost, burst)
+        tokens, stamp = states.get(key, (burst, now))
+        tokens = min(burst, tokens + max(now - stamp, 0) * per_second)
+        if tokens < cost:
+            wait = max(wait, (cost - tokens) / per_second)
+        updated[key] = (tokens - cost, now)
+        # An untouched bucket is full again after this long and can be forgotten
+        timeout = max(timeout, math.ceil(burst / per_second))
+    
+    if wait:
+        return wait
+    cache.set_many(updated, timeout)
+    return None
+
+
+def unanswered_payloads(user, payloads) -> list:
+    """
+    Those of payloads that do not carry an idempotency key the user already
+    has a stored response for, i.e. the ones that will not be replayed.
+    """
+    from .models import SubmissionIdempotencyKey
+    
+    keys = [_idempotency_key(payload) for payload in payloads]
+    stored = SubmissionIdempotencyKey.lookup(user, keys)
+    if not stored:
+        return list(payloads)
+    return [payload for payload, key in zip(payloads, keys) if key not in stored]
+
+
+def _idempotency_key(payload):
+    key = payload.get("idempotency_key") if isinstance(payload, dict) else None
+    return key if isinstance(key, str) else None
+
+
+def _payloads(data):
+    if isinstance(data, dict) and isinstance(data.get("submissions"), list):
+        return data["submissions"]
+    return [data]
+
+
+class SubmissionRateThrottle(BaseThrottle):
+    """
+    DRF throttle charging a request's submissions (one, or the "submissions"
+    of a bulk request) against the observer and connection buckets. DRF
+    throttles before the view runs, so replays are left out here.
+    """
+    
+    def allow_request(self, request, view):
+        payloads = unanswered_payloads(request.user, _payloads(request.data))
+        self._wait = reserve_tokens(submission_buckets(request.user, payloads))
+        return self._wait is None
+    
+    def wait(self):
+        return self._wait
@@ -3,9 +3,16 @@ from django.urls import path
 from .views import (
     get_observer_station_links,
     get_station_link,
+    get_station_link_changes,
     SubmitManualObservation,
+    SubmitManualObservationBulk,
+    get_submission_history,
+    get_observer_station_links_async,
+    get_station_link_async,
+    submit_manual_observation_async,
     DecodeSynopView,
     SubmitSynopView,
+    SubmitSynopBulletinView,
 )
 
 app_name = "adl_collector_app_plugin"
@@ -13,7 +20,15 @@ app_name = "adl_collector_app_plugin"
 urlpatterns = [
     path("station-link/", get_observer_station_links, name="observer_station_links"),
     path("station-link/<int:station_link_id>/", get_station_link, name="observer_station_link"),
+    path("station-link/changes/", get_station_link_changes, name="observer_station_link_changes"),
     path("manual-obs/submit/", SubmitManualObservation.as_view(), name="manual_obs_submit"),
+    path("manual-obs/submit-bulk/", SubmitManualObservationBulk.as_view(), name="manual_obs_submit_bulk"),
+    path("manual-obs/history/", get_submission_history, name="manual_obs_history"),
+    # Async equivalents for ASGI deployments
+    path("async/station-link/", get_observer_station_links_async, name="async_observer_station_links"),
+    path("async/station-link/<int:station_link_id>/", get_station_link_async, name="async_observer_station_link"),
+    path("async/manual-obs/submit/", submit_manual_observation_async, name="async_manual_obs_submit"),
     path("synop/decode/", DecodeSynopView.as_view(), name="synop_decode"),
     path("synop/submit/", SubmitSynopView.as_view(), name="synop_submit"),
+    path("synop/bulletin/", SubmitSynopBulletinView.as_view(), name="synop_bulletin"),
 ]
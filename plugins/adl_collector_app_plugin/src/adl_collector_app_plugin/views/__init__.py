@@ -1,5 +1,17 @@
 # Re-export shim — all callers (wagtail_hooks.py, urls.py) import from here.
-from .api import get_observer_station_links, get_station_link, SubmitManualObservation  # noqa: F401
+from .api import (  # noqa: F401
+    get_observer_station_links,
+    get_station_link,
+    get_station_link_changes,
+    SubmitManualObservation,
+    SubmitManualObservationBulk,
+    get_submission_history,
+)
+from .api_async import (  # noqa: F401
+    get_observer_station_links_async,
+    get_station_link_async,
+    submit_manual_observation_async,
+)
 from .station import (  # noqa: F401
     connection_overview,
     connection_selector,
@@ -7,12 +19,19 @@ from .station import (  # noqa: F401
     StationDetailView,
     view_test_collector_submissions,
 )
-from .office import OfficeEntryView, OfficeSynopView, DecodeSynopView, SubmitSynopView  # noqa: F401
+from .office import (  # noqa: F401
+    OfficeEntryView,
+    OfficeSynopView,
+    DecodeSynopView,
+    SubmitSynopView,
+    SubmitSynopBulletinView,
+)
 from .synop_wizard import SynopSetupWizardView, SYNOP_WIZARD_SESSION_KEY  # noqa: F401
 from .pwa import field_pwa, field_service_worker  # noqa: F401
 from .monitoring import (  # noqa: F401
     MonitoringDashboardView,
     TriggerReprocessView,
+    MonitoringFailedRecordsView,
     MonitoringSubmissionsListView,
     MonitoringSynopListView,
     MonitoringObserversListView,
@@ -1,91 +1,186 @@
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.utils import timezone as dj_timezone
 from rest_framework import status, permissions
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ..models import ManualObservationStationLink, CollectorSubmission
+from ..api_encoding import CompactEncodingMixin
+from ..authz import get_observer_authz, is_active
+from ..config_changes import decode_config_cursor, get_config_changes
+from ..models import CollectorSubmission, SubmissionIdempotencyKey
 from ..serializers import (
-    ObserverStationLinkListSerializer,
-    ObserverStationLinkDetailSerializer,
     SubmissionInSer,
+    BulkSubmissionInSer,
+    SubmissionHistoryQuerySer,
 )
+from ..station_config import compute_etag, conditional_response, get_station_link_config
+from ..throttling import SubmissionRateThrottle
 from ..utils import compute_submission_hash
 
 
 @api_view(['GET'])
 def get_observer_station_links(request):
-    user = request.user
-    
-    station_links = ManualObservationStationLink.objects.filter(
-        enabled=True,
-        observers__user=user,
-        observers__enabled=True).distinct()
-    
-    data = ObserverStationLinkListSerializer(station_links, many=True).data
-    return Response(data)
+    data = _station_link_list(get_observer_authz(request.user))
+    return conditional_response(request, Response(data), compute_etag(data))
+
+
+def _station_link_list(authz):
+    """ObserverStationLinkListSerializer's output for the active grants of an authorization map, without reading the links."""
+    return [
+        {"id": station_link_id, "name": grant["station_name"]}
+        for station_link_id, grant in sorted(authz.items())
+        if is_active(grant)
+    ]
 
 
 @api_view(['GET'])
 def get_station_link(request, station_link_id):
-    user = request.user
-    try:
-        station_link = ManualObservationStationLink.objects.get(id=station_link_id, observers__user=user)
-    except ManualObservationStationLink.DoesNotExist:
+    grant = get_observer_authz(request.user).get(station_link_id)
+    if grant is None:
         return Response({'detail': 'Not found.'}, status=404)
-    data = ObserverStationLinkDetailSerializer(station_link).data
-    return Response(data)
+    # Served from the cache, so an unchanged configuration is not re-serialized
+    etag, data = get_station_link_config(station_link_id)
+    return conditional_response(request, Response(data), etag)
+
+
+@api_view(['GET'])
+def get_station_link_changes(request):
+    """
+    Configuration changes since ?cursor=<cursor from the previous response>;
+    without one, every visible station link in full ("full_sync": true).
+    """
+    cursor = request.query_params.get("cursor")
+    if cursor not in (None, ""):
+        try:
+            cursor = decode_config_cursor(cursor)
+        except ValueError:
+            return Response({'detail': 'Invalid cursor.'}, status=400)
+    else:
+        cursor = None
+    return Response(get_config_changes(request.user, cursor))
 
 
-class SubmitManualObservation(APIView):
+class SubmitManualObservation(CompactEncodingMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [SubmissionRateThrottle]
     
     def post(self, request):
+        # A retry of a request that was already answered costs one indexed lookup
+        key = request.data.get("idempotency_key") if isinstance(request.data, dict) else None
+        replay = _replay_response(request.user, key)
+        if replay is not None:
+            return replay
+        
         serialized = SubmissionInSer(data=request.data, context={"request": request})
         serialized.is_valid(raise_exception=True)
         
-        station_link = serialized.validated_data["_station_link"]
+        grant = serialized.validated_data["_grant"]
         obs_time = serialized.validated_data["observation_time"]
         meta = serialized.validated_data.get("meta") or {}
         records = serialized.validated_data["records"]
         
         chash = compute_submission_hash(
-            station_link_id=station_link.id,
+            station_link_id=serialized.validated_data["station_link_id"],
             observation_time=obs_time,
             records=records,
             meta=meta,
         )
         
         existing = CollectorSubmission.objects.filter(
-            observer=serialized.validated_data["_observer"],
+            observer_id=grant["observer_id"],
             observation_time=obs_time,
             content_hash=chash,
         ).first()
         
         if existing:
-            return Response(
-                {
-                    "station_link_id": station_link.id,
-                    "status": "accepted",
-                    "idempotent": True,
-                    "id": existing.pk,
-                    "observation_time": existing.observation_time,
-                    "is_test_submission": existing.is_test_submission,
-                },
-                status=status.HTTP_200_OK,
-            )
+            body = _submission_response(existing, idempotent=True)
+            if key:
+                SubmissionIdempotencyKey.objects.bulk_create(
+                    [SubmissionIdempotencyKey(user=request.user, key=key, submission=existing,
+                                              response_status=status.HTTP_200_OK, response_body=body)],
+                    ignore_conflicts=True,
+                )
+            return Response(body, status=status.HTTP_200_OK)
         
-        with transaction.atomic():
-            submission = serialized.save()
+        try:
+            body = _store_submission(serialized, chash, request.user, key)
+        except IntegrityError:
+            # A concurrent retry of the same request got there first
+            replay = _replay_response(request.user, key)
+            if replay is None:
+                raise
+            return replay
         
-        return Response(
-            {
-                "station_link_id": station_link.id,
-                "status": "accepted",
-                "idempotent": False,
-                "id": submission.pk,
-                "observation_time": submission.observation_time,
-                "is_test_submission": submission.is_test_submission,
-            },
-            status=status.HTTP_201_CREATED,
-        )
+        return Response(body, status=status.HTTP_201_CREATED)
+
+
+def _store_submission(serialized, content_hash, user, key):
+    """
+    Save a validated SubmissionInSer and, given an idempotency key, remember
+    the response under it, in one transaction. Returns the response body.
+    """
+    with transaction.atomic():
+        submission = serialized.save(content_hash=content_hash)
+        body = _submission_response(submission, idempotent=False)
+        if key:
+            # An expired row still holds the (user, key) constraint
+            SubmissionIdempotencyKey.objects.filter(user=user, key=key, expires_at__lte=dj_timezone.now()).delete()
+            SubmissionIdempotencyKey.objects.create(
+                user=user, key=key, submission=submission,
+                response_status=status.HTTP_201_CREATED, response_body=body,
+            )
+    return body
+
+
+def _submission_response(submission, idempotent):
+    return {
+        "station_link_id": submission.station_link_id,
+        "status": "accepted",
+        "idempotent": idempotent,
+        "id": submission.pk,
+        "observation_time": submission.observation_time,
+        "is_test_submission": submission.is_test_submission,
+    }
+
+
+def _replay_response(user, key):
+    """The stored response to the user's earlier request with this idempotency key, if any."""
+    if not isinstance(key, str) or not key:
+        return None
+    stored = SubmissionIdempotencyKey.lookup(user, [key]).get(key)
+    if stored is None:
+        return None
+    response_status, body = stored
+    return Response(body, status=response_status, headers={"Idempotent-Replayed": "true"})
+
+
+class SubmitManualObservationBulk(CompactEncodingMixin, APIView):
+    """
+    Several submissions in one request, e.g. an offline queue being flushed.
+    Responds 200 with {"results": [...]}, one entry per submission in request
+    order, shaped like SubmitManualObservation's response, or
+    {"status": "rejected", "errors": {...}} for a submission that failed validation.
+    A batch over the submission rate limits is refused whole with 429.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [SubmissionRateThrottle]
+    
+    def post(self, request):
+        serialized = BulkSubmissionInSer(data=request.data, context={"request": request})
+        serialized.is_valid(raise_exception=True)
+        results = serialized.save()
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_submission_history(request):
+    """
+    The caller's submissions to ?station_link_id= with observation_time in
+    [?start=, ?end=), slim and paged by ?cursor= / ?limit=, so the app can
+    show which slots were already submitted without re-sending anything.
+    """
+    query = SubmissionHistoryQuerySer(data=request.query_params, context={"request": request})
+    query.is_valid(raise_exception=True)
+    results, next_cursor = query.get_page()
+    return Response({"results": results, "next_cursor": next_cursor})
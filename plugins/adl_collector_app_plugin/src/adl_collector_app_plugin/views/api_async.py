@@ -0,0 +1,169 @@
+"""
+Async counterparts of the observer API in api.py, for deployments served
+over ASGI.
+
+Under ASGI, Django reads the request body before calling the view and these
+views await every query, so a slow upload ties up no worker thread. Only
+the code that is inherently synchronous runs in a thread through
+sync_to_async: DRF authentication, serializer validation and the write
+transaction. Responses, validation and idempotency semantics are the same as
+the synchronous views, whose helpers these reuse, including the compressed
+and MessagePack encodings of api_encoding.py and the submission rate limits
+of throttling.py.
+"""
+import math
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from ..api_encoding import parse_request_body, render_response_body
+from ..authz import aget_observer_authz
+from ..models import CollectorSubmission, SubmissionIdempotencyKey
+from ..serializers import SubmissionInSer
+from ..station_config import compute_etag, conditional_response, get_station_link_config
+from ..throttling import reserve_tokens, submission_buckets
+from ..utils import compute_submission_hash
+from .api import _station_link_list, _store_submission, _submission_response
+
+
+def _api_response(request, data, status_code=status.HTTP_200_OK, headers=None):
+    # DRF's renderers, negotiated from the Accept header, so the body is
+    # exactly what the synchronous views would send
+    content, content_type = render_response_body(request, data)
+    return HttpResponse(content, content_type=content_type, status=status_code, headers=headers)
+
+
+async def _authenticate(request):
+    """
+    Run the project's DRF authentication classes on a plain Django request.
+    Returns (DRF request, None) for an authenticated user, or (None, error response).
+    """
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = await sync_to_async(lambda: drf_request.user)()
+    except exceptions.APIException as exc:
+        return None, _api_response(request, {"detail": exc.detail}, exc.status_code)
+
+    if user is None or not user.is_authenticated:
+        exc = exceptions.NotAuthenticated()
+        authenticate_header = drf_request.authenticators and drf_request.authenticators[0].authenticate_header(
+            drf_request
+        )
+        if authenticate_header:
+            return None, _api_response(request, {"detail": exc.detail}, status.HTTP_401_UNAUTHORIZED,
+                                       headers={"WWW-Authenticate": authenticate_header})
+        return None, _api_response(request, {"detail": exc.detail}, status.HTTP_403_FORBIDDEN)
+    return drf_request, None
+
+
+async def _replay_response(request, user, key):
+    """api._replay_response() for the async view: the stored response to the user's earlier request with this key."""
+    if not isinstance(key, str) or not key:
+        return None
+    stored = (await SubmissionIdempotencyKey.alookup(user, [key])).get(key)
+    if stored is None:
+        return None
+    response_status, body = stored
+    return _api_response(request, body, response_status, headers={"Idempotent-Replayed": "true"})
+
+
+@require_GET
+@gzip_page
+async def get_observer_station_links_async(request):
+    drf_request, error = await _authenticate(request)
+    if error:
+        return error
+
+    data = _station_link_list(await aget_observer_authz(drf_request.user))
+    return conditional_response(request, _api_response(request, data), compute_etag(data))
+
+
+@require_GET
+@gzip_page
+async def get_station_link_async(request, station_link_id):
+    drf_request, error = await _authenticate(request)
+    if error:
+        return error
+
+    grant = (await aget_observer_authz(drf_request.user)).get(station_link_id)
+    if grant is None:
+        return _api_response(request, {"detail": "Not found."}, status.HTTP_404_NOT_FOUND)
+
+    etag, data = await sync_to_async(get_station_link_config)(station_link_id)
+    return conditional_response(request, _api_response(request, data), etag)
+
+
+@csrf_exempt
+@require_POST
+@gzip_page
+async def submit_manual_observation_async(request):
+    # CSRF is enforced by DRF's SessionAuthentication for session users, as in
+    # the APIView; token clients need no CSRF token
+    drf_request, error = await _authenticate(request)
+    if error:
+        return error
+    user = drf_request.user
+
+    try:
+        payload = parse_request_body(request)
+    except exceptions.APIException as exc:
+        return _api_response(request, {"detail": exc.detail}, exc.status_code)
+
+    # Replays come first, so a retry of an answered request is never throttled
+    key = payload.get("idempotency_key") if isinstance(payload, dict) else None
+    replay = await _replay_response(request, user, key)
+    if replay is not None:
+        return replay
+
+    wait = await sync_to_async(lambda: reserve_tokens(submission_buckets(user, [payload])))()
+    if wait is not None:
+        exc = exceptions.Throttled(wait)
+        return _api_response(request, {"detail": exc.detail}, exc.status_code,
+                             headers={"Retry-After": str(math.ceil(wait))})
+
+    serialized = SubmissionInSer(data=payload, context={"request": drf_request})
+    if not await sync_to_async(serialized.is_valid)():
+        return _api_response(request, serialized.errors, status.HTTP_400_BAD_REQUEST)
+
+    validated = serialized.validated_data
+    chash = compute_submission_hash(
+        station_link_id=validated["station_link_id"],
+        observation_time=validated["observation_time"],
+        records=validated["records"],
+        meta=validated.get("meta") or {},
+    )
+
+    existing = await CollectorSubmission.objects.filter(
+        observer_id=validated["_grant"]["observer_id"],
+        observation_time=validated["observation_time"],
+        content_hash=chash,
+    ).afirst()
+
+    if existing:
+        body = _submission_response(existing, idempotent=True)
+        if key:
+            await SubmissionIdempotencyKey.objects.abulk_create(
+                [SubmissionIdempotencyKey(user=user, key=key, submission=existing,
+                                          response_status=status.HTTP_200_OK, response_body=body)],
+                ignore_conflicts=True,
+            )
+        return _api_response(request, body, status.HTTP_200_OK)
+
+    try:
+        # Transactions are synchronous-only
+        body = await sync_to_async(_store_submission)(serialized, chash, user, key)
+    except IntegrityError:
+        # A concurrent retry of the same request got there first
+        replay = await _replay_response(request, user, key)
+        if replay is None:
+            raise
+        return replay
+
+    return _api_response(request, body, status.HTTP_201_CREATED)
@@ -8,9 +8,11 @@ from django.utils import timezone as dj_timezone
 from django.utils.decorators import method_decorator
 from django.views import View
 
+from ..ingestion import enqueue_ingestion
 from ..models import (
     CollectorSubmission,
     CollectorSubmissionRecord,
+    IngestionOutboxEntry,
     ManualObservationConnection,
     ManualObservationStationLink,
     ManualObservationStationLinkObserver,
@@ -83,12 +85,25 @@ class MonitoringDashboardView(View):
             CollectorSubmissionRecord.objects
             .filter(
                 is_processed=False,
+                is_dead_letter=False,
                 submission__created_at__gte=since,
-                submission__station_link__network_connection=connection,
+                station_link__network_connection=connection,
             )
             .count()
         )
 
+        failed_count = (
+            CollectorSubmissionRecord.objects
+            .failed()
+            .filter(station_link__network_connection=connection)
+            .count()
+        )
+
+        outbox_backlog = IngestionOutboxEntry.objects.filter(
+            connection=connection,
+            dispatched_at__isnull=True,
+        ).count()
+
         recent_submissions = (
             CollectorSubmission.objects
             .filter(
@@ -124,6 +139,8 @@ class MonitoringDashboardView(View):
             "station_stats": station_stats,
             "observer_activity": observer_activity,
             "unprocessed_count": unprocessed_count,
+            "failed_count": failed_count,
+            "outbox_backlog": outbox_backlog,
             "recent_submissions": recent_submissions,
             "synop_messages": synop_messages,
         }
@@ -136,11 +153,14 @@ class TriggerReprocessView(View):
     def post(self, request):
         connection = get_object_or_404(ManualObservationConnection, pk=request.POST.get("connection", 0))
 
+        # Reprocessing is the operator's "something looks stuck" lever, so recount
+        # first rather than trusting counters that may have drifted
+        station_links = ManualObservationStationLink.objects.filter(network_connection=connection)
+        ManualObservationStationLink.refresh_pending_record_counts(station_links)
         sl_ids = list(
-            CollectorSubmissionRecord.objects
-            .filter(is_processed=False, submission__station_link__network_connection=connection)
-            .values_list("submission__station_link_id", flat=True)
-            .distinct()
+            station_links
+            .filter(pending_record_count__gt=0)
+            .values_list("pk", flat=True)
         )
 
         if sl_ids:
@@ -151,6 +171,48 @@ class TriggerReprocessView(View):
         return redirect(reverse("collector_monitoring") + f"?connection={connection.pk}&days={days}")
 
 
+@method_decorator(staff_member_required, name="dispatch")
+class MonitoringFailedRecordsView(View):
+    """Records that failed ingestion, backing off or dead-lettered, with a requeue action."""
+
+    def get(self, request):
+        connection = get_object_or_404(ManualObservationConnection, pk=request.GET.get("connection", 0))
+
+        records = (
+            CollectorSubmissionRecord.objects
+            .failed()
+            .filter(station_link__network_connection=connection)
+            .select_related("submission", "station_link__station", "variable_mapping__adl_parameter")
+            .order_by("-is_dead_letter", "station_link__station__name", "-submission__observation_time")[:200]
+        )
+
+        return render(
+            request,
+            "adl_collector_app_plugin/monitoring/failed_records.html",
+            {
+                "page_title": "Failed Records — " + connection.name,
+                "connection": connection,
+                "records": records,
+            },
+        )
+
+    def post(self, request):
+        connection = get_object_or_404(ManualObservationConnection, pk=request.POST.get("connection", 0))
+
+        records = CollectorSubmissionRecord.objects.filter(station_link__network_connection=connection)
+        if not request.POST.get("all"):
+            records = records.filter(pk__in=request.POST.getlist("record"))
+
+        sl_ids = records.requeue()
+        if sl_ids:
+            ManualObservationStationLink.refresh_pending_record_counts(
+                ManualObservationStationLink.objects.filter(pk__in=sl_ids)
+            )
+            enqueue_ingestion((connection.pk, sl_id) for sl_id in sl_ids)
+
+        return redirect(reverse("collector_monitoring_failed") + f"?connection={connection.pk}")
+
+
 def _parse_date(date_str):
     if not date_str:
         return None
@@ -13,30 +13,33 @@ from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from ..api_encoding import CompactEncodingMixin
 from ..forms import SynopForm
 from ..models import (
     ManualObservationStationLink,
     ManualObservationStationLinkVariableMapping,
     CollectorSubmission,
-    SynopParameterMapping,
     SynopMessage,
 )
 from ..serializers import (
     OfficeSubmissionInSer,
     SynopDecodeInSer,
     SynopSubmitInSer,
+    SynopBulletinInSer,
 )
-from ..synop_utils import build_submission_records_from_synop, get_unmapped_elements
+from ..synop_resolver import get_station_link_synop_index, get_synop_mappings
+from ..synop_utils import build_submission_records_from_synop, extract_fm12_values, get_unmapped_elements
 from ..wmo_codes import WMO_CODE_TABLES
 
 _SYNOP_TPL = "adl_collector_app_plugin/office/synop.html"
 
 
-class DecodeSynopView(APIView):
+class DecodeSynopView(CompactEncodingMixin, APIView):
     """
     POST /api/adl-collector/synop/decode/
     Decode a raw FM12 SYNOP message and return the decoded values mapped to
-    ADL parameters. Does NOT persist anything — preview only.
+    ADL parameters. Does NOT persist anything — preview only. The raw decoder
+    output is left out of the response when include_decoded is false.
     """
     permission_classes = [permissions.IsAuthenticated]
     
@@ -58,18 +61,19 @@ class DecodeSynopView(APIView):
         ]
 
         response_data = {
-            "decoded": decoded,
             "mapped_records": visible_records,
             "unmapped_count": len(mappings) - len(mapped_records),
             "station_id": decoded_station_id,
         }
+        if ser.validated_data["include_decoded"]:
+            response_data["decoded"] = decoded
         if observation_time is not None:
             response_data["observation_time"] = observation_time.isoformat()
 
         return Response(response_data)
 
 
-class SubmitSynopView(APIView):
+class SubmitSynopView(CompactEncodingMixin, APIView):
     """
     POST /api/adl-collector/synop/submit/
     Archive a SYNOP message and create a CollectorSubmission from decoded values.
@@ -92,6 +96,31 @@ class SubmitSynopView(APIView):
         )
 
 
+class SubmitSynopBulletinView(CompactEncodingMixin, APIView):
+    """
+    POST /api/adl-collector/synop/bulletin/
+    Archive every station report of an AAXX bulletin and create a
+    CollectorSubmission from each. Responds 200 with one result per report;
+    a report that fails does not reject the others.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        ser = SynopBulletinInSer(data=request.data, context={"request": request})
+        ser.is_valid(raise_exception=True)
+        
+        results = ser.save()
+        
+        return Response(
+            {
+                "reports": results,
+                "created": sum(1 for r in results if r["status"] == "created"),
+                "errors": sum(1 for r in results if r["status"] == "error"),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 @method_decorator(staff_member_required, name="dispatch")
 class OfficeEntryView(View):
     """
@@ -138,7 +167,7 @@ class OfficeEntryView(View):
             try:
                 editing_sub = (
                     CollectorSubmission.objects
-                    .prefetch_related("records__variable_mapping")
+                    .prefetch_related("records", "archived_records")
                     .get(pk=editing_submission_id)
                 )
                 try:
@@ -148,7 +177,7 @@ class OfficeEntryView(View):
                 
                 if editing_submission_id:
                     pre_filled_values_json = json.dumps(
-                        {str(r.variable_mapping_id): r.value for r in editing_sub.records.all()}
+                        {str(r.variable_mapping_id): r.value for r in editing_sub.all_records()}
                     )
                     pre_filled_obs_time = editing_sub.observation_time.strftime("%Y-%m-%dT%H:%M")
             except CollectorSubmission.DoesNotExist:
@@ -241,14 +270,15 @@ class OfficeSynopView(View):
         return self._save(request, form)
     
     def _decode_preview(self, request, form):
-        from ..synop_utils import decode_fm12
+        from ..decode_cache import decode_fm12_cached
         
         raw = form.cleaned_data["raw_message"]
         year = form.cleaned_data["observation_year"]
         month = form.cleaned_data["observation_month"]
         
         try:
-            decoded = decode_fm12(raw)
+            # Cached, so the save step that follows does not decode it again
+            decoded = decode_fm12_cached(raw)
         except (ValueError, ImportError) as exc:
             form.add_error("raw_message", str(exc))
             return render(request, _SYNOP_TPL, {"page_title": "SYNOP FM12 Entry", "step": 1, "form": form})
@@ -269,17 +299,14 @@ class OfficeSynopView(View):
                     "station", "network_connection"
                 ).get(station__wsi_local=station_id)
                 connection = station_link.network_connection
-                mappings = list(
-                    SynopParameterMapping.objects.select_related("adl_parameter", "source_unit").all()
-                )
-                mapped_records = build_submission_records_from_synop(decoded, mappings)
-                unmapped_elements = get_unmapped_elements(decoded, mappings)
+                mappings = get_synop_mappings()
+                values = extract_fm12_values(decoded)
+                mapped_records = build_submission_records_from_synop(decoded, mappings, values)
+                unmapped_elements = get_unmapped_elements(decoded, mappings, values)
                 # Detect station-level gaps: globally mapped but no station-level
                 # ManualObservationStationLinkVariableMapping for this station.
                 # These would silently fail at save time — surface them now.
-                station_param_ids = set(
-                    station_link.variable_mappings.values_list("adl_parameter_id", flat=True)
-                )
+                station_param_ids = get_station_link_synop_index(station_link.pk)["vm_ids"]
                 importable = [r for r in mapped_records if r["adl_parameter_id"] in station_param_ids]
                 gap = [r for r in mapped_records if r["adl_parameter_id"] not in station_param_ids]
                 mapped_records = importable
@@ -13,6 +13,7 @@ from django.views import View
 from ..models import (
     ManualObservationStationLink,
     CollectorSubmission,
+    ArchivedSubmissionRecord,
     CollectorSubmissionRecord,
     ManualObservationConnection,
     SynopMessage,
@@ -174,7 +175,14 @@ class StationDetailView(View):
                         "variable_mapping__adl_parameter",
                         "variable_mapping__obs_parameter_unit",
                     ),
-                )
+                ),
+                Prefetch(
+                    "archived_records",
+                    queryset=ArchivedSubmissionRecord.objects.select_related(
+                        "variable_mapping__adl_parameter",
+                        "variable_mapping__obs_parameter_unit",
+                    ),
+                ),
             )
             .select_related("observer__user", "office_submitted_by")
             .order_by("observation_time")
@@ -192,7 +200,7 @@ class StationDetailView(View):
 
         params_seen = {}
         for sub in submissions:
-            for rec in sub.records.all():
+            for rec in sub.all_records():
                 p = rec.variable_mapping.adl_parameter
                 params_seen[p.id] = p
         sorted_params = sorted(params_seen.values(), key=lambda p: p.name)
@@ -201,7 +209,7 @@ class StationDetailView(View):
         for sub in submissions:
             values_by_param = {
                 rec.variable_mapping.adl_parameter_id: rec.value
-                for rec in sub.records.all()
+                for rec in sub.all_records()
             }
 
             if sub.id in synop_sub_ids:
@@ -250,7 +258,11 @@ def view_test_collector_submissions(request):
             Prefetch(
                 "records",
                 queryset=CollectorSubmissionRecord.objects.select_related("variable_mapping"),
-            )
+            ),
+            Prefetch(
+                "archived_records",
+                queryset=ArchivedSubmissionRecord.objects.select_related("variable_mapping"),
+            ),
         )
         .order_by("-created_at")[:100]
     )
@@ -12,6 +12,7 @@ from ..models import (
     ManualObservationConnection,
     SynopParameterMapping,
 )
+from ..synop_resolver import get_synop_mappings
 
 SYNOP_WIZARD_SESSION_KEY = "synop_setup_wizard"
 
@@ -156,7 +157,7 @@ class SynopSetupWizardView(View):
         
         existing = {
             m.fm12_element_path: m
-            for m in SynopParameterMapping.objects.select_related("adl_parameter", "source_unit").all()
+            for m in get_synop_mappings()
         }
         
         param_rows = []
@@ -353,14 +354,18 @@ class SynopSetupWizardView(View):
             network_connection=conn, enabled=True
         ).select_related("station")
         
+        proposed = [
+            m for m in state.get("mappings", [])
+            if m["action"] == "use_existing" and m.get("adl_parameter_id") and m.get("unit_id")
+        ]
+        params = DataParameter.objects.in_bulk([m["adl_parameter_id"] for m in proposed])
+        units = Unit.objects.in_bulk([m["unit_id"] for m in proposed])
+        
         enriched = []
-        for m in state.get("mappings", []):
-            if m["action"] != "use_existing" or not m.get("adl_parameter_id") or not m.get("unit_id"):
-                continue
-            try:
-                param = DataParameter.objects.get(pk=m["adl_parameter_id"])
-                unit = Unit.objects.get(pk=m["unit_id"])
-            except (DataParameter.DoesNotExist, Unit.DoesNotExist):
+        for m in proposed:
+            param = params.get(m["adl_parameter_id"])
+            unit = units.get(m["unit_id"])
+            if param is None or unit is None:
                 continue
             enriched.append({**m, "adl_parameter_name": param.name, "unit_name": unit.name})
         
@@ -422,12 +427,23 @@ class SynopSetupWizardView(View):
         created_station = 0
         
         with transaction.atomic():
-            for m in mappings:
-                if m["action"] != "use_existing" or not m.get("adl_parameter_id") or not m.get("unit_id"):
-                    continue
-                
-                param = DataParameter.objects.get(pk=m["adl_parameter_id"])
-                unit = Unit.objects.get(pk=m["unit_id"])
+            params = DataParameter.objects.in_bulk([m["adl_parameter_id"] for m in proposed])
+            units = Unit.objects.in_bulk([m["unit_id"] for m in proposed])
+            # (station_link_id, adl_parameter_id) pairs that already have a
+            # station-level variable mapping, kept current as rows are added
+            mapped_pairs = set(
+                ManualObservationStationLinkVariableMapping.objects.filter(
+                    station_link__in=stations
+                ).values_list("station_link_id", "adl_parameter_id")
+            )
+            
+            for m in proposed:
+                param = params.get(m["adl_parameter_id"])
+                unit = units.get(m["unit_id"])
+                if param is None:
+                    raise DataParameter.DoesNotExist(f"DataParameter {m['adl_parameter_id']} does not exist.")
+                if unit is None:
+                    raise Unit.DoesNotExist(f"Unit {m['unit_id']} does not exist.")
                 
                 _, synop_created = SynopParameterMapping.objects.get_or_create(
                     fm12_element_path=m["path"],
@@ -438,7 +454,8 @@ class SynopSetupWizardView(View):
                 
                 show_direct = m.get("show_in_direct_entry", not m.get("is_coded", False))
                 for sl in stations:
-                    if not sl.variable_mappings.filter(adl_parameter=param).exists():
+                    if (sl.pk, param.pk) not in mapped_pairs:
+                        mapped_pairs.add((sl.pk, param.pk))
                         ManualObservationStationLinkVariableMapping.objects.create(
                             station_link=sl,
                             adl_parameter=param,
@@ -456,7 +473,8 @@ class SynopSetupWizardView(View):
             ).all()
             for sl in stations:
                 for spm in all_synop_mappings:
-                    if not sl.variable_mappings.filter(adl_parameter=spm.adl_parameter).exists():
+                    if (sl.pk, spm.adl_parameter_id) not in mapped_pairs:
+                        mapped_pairs.add((sl.pk, spm.adl_parameter_id))
                         ManualObservationStationLinkVariableMapping.objects.create(
                             station_link=sl,
                             adl_parameter=spm.adl_parameter,
@@ -16,6 +16,7 @@ from .views import (
     sync_station_synop_mappings_view,
     MonitoringDashboardView,
     TriggerReprocessView,
+    MonitoringFailedRecordsView,
     MonitoringSubmissionsListView,
     MonitoringSynopListView,
     MonitoringObserversListView,
@@ -87,6 +88,11 @@ def urlconf_adl_collector_app_plugin():
             TriggerReprocessView.as_view(),
             name="collector_monitoring_reprocess",
         ),
+        path(
+            "adl-collector-app-plugin/monitoring/failed/",
+            MonitoringFailedRecordsView.as_view(),
+            name="collector_monitoring_failed",
+        ),
         path(
             "adl-collector-app-plugin/connections/<int:pk>/",
             connection_overview,